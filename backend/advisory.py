@@ -0,0 +1,247 @@
+# backend/advisory.py - BACKGROUND AI ADVISORY JOBS
+
+import math
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+# Band widths used to bucket the inputs of create_gemini_prompt. Samples falling in the same
+# bands get the same advisory, so e.g. repeated Real-Time Test presets cost one LLM call.
+ADVISORY_BANDS = {'confidence': 0.10, 'ph': 0.5, 'Turbidity': 0.5, 'Solids': 250.0}
+
+
+def _band(value, width):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else int(value // width)
+
+
+def advisory_cache_key(prediction, confidence, data):
+    """Prediction plus quantized confidence/pH/Turbidity/Solids bands."""
+    return (prediction,
+            _band(confidence[prediction], ADVISORY_BANDS['confidence']),
+            _band(data.get('ph'), ADVISORY_BANDS['ph']),
+            _band(data.get('Turbidity'), ADVISORY_BANDS['Turbidity']),
+            _band(data.get('Solids'), ADVISORY_BANDS['Solids']))
+
+
+class AdvisoryCache:
+    """
+    LRU + TTL cache of generated advisories with a memory cap (bytes of cached text).
+    Thread-safe; lookups are a dict access under a lock, so hits return in microseconds.
+    """
+
+    def __init__(self, ttl_seconds=6 * 3600, max_bytes=16 * 1024 * 1024):
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (expires_at, size, advice)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, advice):
+        size = sys.getsizeof(advice)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + self.ttl, size, advice)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                self._drop(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _drop(self, key):
+        self._bytes -= self._entries.pop(key)[1]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries), 'bytes': self._bytes, 'max_bytes': self.max_bytes,
+                    'ttl_seconds': self.ttl, 'hits': self.hits, 'misses': self.misses,
+                    'evictions': self.evictions, 'hit_ratio': round(self.hits / lookups, 4) if lookups else None}
+
+
+JOBS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS advisory_jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    advice TEXT,
+    source TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    finished REAL
+);
+CREATE INDEX IF NOT EXISTS advisory_jobs_created ON advisory_jobs(created)
+"""
+SQL_INSERT_JOB = "INSERT INTO advisory_jobs (id, status, created) VALUES (?, 'pending', ?)"
+SQL_FINISH_JOB = "UPDATE advisory_jobs SET status = ?, advice = ?, source = ?, error = ?, finished = ? WHERE id = ?"
+SQL_SELECT_JOB = "SELECT id, status, advice, source, error FROM advisory_jobs WHERE id = ? AND created > ?"
+SQL_EXPIRE_JOBS = "DELETE FROM advisory_jobs WHERE created <= ?"
+# How often get() re-reads a job another process is running while a client long-polls it.
+JOB_POLL_SECONDS = 0.1
+
+
+class AdvisoryJobs:
+    """
+    Runs the (slow, paid) LLM advisory off the request thread. /predict submits a job and returns
+    the verdict straight away; clients fetch the advisory later by id, either polling or
+    long-polling with a `wait` timeout. `generate(*args)` returns (advice, source), where source
+    says who wrote it (e.g. 'gemini', or 'offline' for a fallback).
+
+    A job runs in the process that submitted it, but with `path` its state is also written to
+    that SQLite file (WAL), so any serve.py worker can answer /advisory/<id>: the submitting one
+    from memory, the others by reading (and, long-polling, re-reading) the row. Errors of that
+    file are logged and leave the job in memory only, like the other caches.
+    """
+
+    def __init__(self, generate, max_workers=4, ttl_seconds=900, max_jobs=10000, path=None):
+        self._generate = generate
+        self._max_workers = max_workers
+        self._ttl = ttl_seconds
+        self._max_jobs = max_jobs
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._executor = None
+        self.path = path
+        self._local = threading.local()
+        if path:
+            with self._write() as conn:
+                for statement in JOBS_SCHEMA.split(';'):
+                    conn.execute(statement)
+
+    # --- SHARED STATE (SQLite) ---
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def close(self):
+        """Closes this thread's connection, e.g. in a parent process before it forks workers."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def _share(self, sql, params, prune_before=None):
+        if not self.path:
+            return
+        try:
+            with self._write() as conn:
+                if prune_before is not None:
+                    conn.execute(SQL_EXPIRE_JOBS, (prune_before,))
+                conn.execute(sql, params)
+        except sqlite3.Error as e:
+            print(f"⚠️ Advisory job store failed: {e}")
+
+    def _shared_view(self, job_id, wait):
+        """A job submitted by another process, from the SQLite file; re-read until it finishes or `wait` ends."""
+        if not self.path:
+            return None
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                row = self._conn().execute(SQL_SELECT_JOB, (job_id, time.time() - self._ttl)).fetchone()
+            except sqlite3.Error as e:
+                print(f"⚠️ Advisory job lookup failed: {e}")
+                return None
+            if row is None:
+                return None
+            remaining = deadline - time.monotonic()
+            if row[1] != 'pending' or remaining <= 0:
+                return dict(zip(('id', 'status', 'advice', 'source', 'error'), row))
+            time.sleep(min(JOB_POLL_SECONDS, remaining))
+
+    def _pool(self):
+        # Created on first use so the pool is never inherited half-alive across a fork.
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='advisory')
+        return self._executor
+
+    def _prune(self, now):
+        expired = [job_id for job_id, job in self._jobs.items() if now - job['created'] > self._ttl]
+        for job_id in expired:
+            del self._jobs[job_id]
+        # Still too many (burst of traffic): drop the oldest finished jobs first.
+        if len(self._jobs) >= self._max_jobs:
+            finished = sorted((j for j in self._jobs.values() if j['event'].is_set()), key=lambda j: j['created'])
+            for job in finished[:len(self._jobs) - self._max_jobs + 1]:
+                del self._jobs[job['id']]
+
+    def submit(self, *args):
+        """Queues an advisory for `generate(*args)` and returns its job id."""
+        now = time.time()
+        job = {'id': uuid.uuid4().hex, 'status': 'pending', 'advice': None, 'source': None, 'error': None,
+               'created': now, 'finished': None, 'event': threading.Event()}
+        with self._lock:
+            self._prune(now)
+            self._jobs[job['id']] = job
+        self._share(SQL_INSERT_JOB, (job['id'], now), prune_before=now - self._ttl)
+        self._pool().submit(self._run, job, args)
+        return job['id']
+
+    def _run(self, job, args):
+        try:
+            job['advice'], job['source'] = self._generate(*args)
+            job['status'] = 'done'
+        except Exception as e:
+            job['error'] = str(e)
+            job['status'] = 'error'
+        job['finished'] = time.time()
+        self._share(SQL_FINISH_JOB, (job['status'], job['advice'], job['source'], job['error'], job['finished'], job['id']))
+        job['event'].set()
+
+    def get(self, job_id, wait=0):
+        """Returns the public view of a job, blocking up to `wait` seconds for it to finish. None if unknown."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None:
+            return self._shared_view(job_id, wait)
+        if wait > 0:
+            job['event'].wait(wait)
+        return {'id': job['id'], 'status': job['status'], 'advice': job['advice'], 'source': job['source'],
+                'error': job['error']}
@@ -1,43 +1,87 @@
 # backend/app.py - FINAL, PRODUCTION-READY BACKEND WITH CORS
 
-from flask import Flask, request, jsonify, render_template
+from flask import Flask, request, jsonify, render_template, stream_with_context
 from flask_cors import CORS  # <-- 1. IMPORT THE LIBRARY
-import joblib
-import pandas as pd
-import numpy as np # <-- Make sure numpy is imported for the summary endpoint
-import google.generativeai as genai
+from werkzeug.exceptions import RequestEntityTooLarge
+import hmac
 import os
+import sys
+import json
+import sqlite3
+import time
 import base64
-from math import radians, cos, sin, asin, sqrt
+from datetime import date, datetime, timedelta, timezone
+from model_registry import ModelRegistry, ModelManager
+from advisory import AdvisoryJobs, AdvisoryCache, advisory_cache_key
+from offline_advisory import offline_advisory, parse_languages
+from llm_gateway import LLMGateway, CircuitBreaker, LLMUnavailable
+from geo import GridIndex
+from store import WaterStore, GRANULARITIES, EXPORT_COLUMNS
+from state import WaterPointState
+from response_cache import ResponseCache
+from imaging import ImageNormalizer, ImageWorkerError
+from vision_cache import VisionCache, image_digest
+from startup import LazyGenerativeModel, WarmUp, start_background
+import columnar
 
 # --- SETUP ---
+if __name__ == '__main__' and '--profile-startup' in sys.argv:
+    from startup import profile_startup
+    sys.exit(profile_startup())
+
+# AQUALERT_LAZY_START=1 answers requests as soon as the routes exist and loads the classifier
+# and the Gemini client on a background thread. serve.py always loads eagerly so its forked
+# workers share the model.
+LAZY_START = os.getenv('AQUALERT_LAZY_START') == '1' and not os.getenv('AQUALERT_PREFORK')
+
 app = Flask(__name__)
 CORS(app)  # <-- 2. ENABLE CORS FOR YOUR ENTIRE FLASK APP
 
 # --- LOAD MODELS AND CONFIGURE AI ---
+# Classifier versions live in a local registry; the first start registers the bundled
+# aquasense_classifier.pkl as v1. Concurrent /predict calls share one model call
+# (AQUALERT_BATCH_MAX_SIZE=1 scores each request alone).
+model_registry = ModelRegistry(os.getenv('AQUALERT_MODEL_DIR', 'models'))
+models = ModelManager(model_registry,
+                      batch_max_size=int(os.getenv('AQUALERT_BATCH_MAX_SIZE', '32')),
+                      batch_max_wait_ms=float(os.getenv('AQUALERT_BATCH_MAX_WAIT_MS', '2')),
+                      watch_seconds=float(os.getenv('AQUALERT_MODEL_WATCH_SECONDS', '5')))
 try:
-    lgbm_model = joblib.load('aquasense_classifier.pkl')
-    print("✅ LightGBM classifier loaded successfully.")
+    if model_registry.current_version() is None:
+        versions = model_registry.versions() or [
+            model_registry.register('aquasense_classifier.pkl', metadata={'description': 'Bundled potability classifier'})]
+        model_registry.promote(versions[-1])
+    if LAZY_START:
+        print(f"⏳ LightGBM classifier {models.load_current_async()} loading in the background.")
+    else:
+        # serve.py forks workers after importing this module; they warm the model up themselves.
+        initial_model = models.load_current(warm_up=not os.getenv('AQUALERT_PREFORK'))
+        print(f"✅ LightGBM classifier {initial_model.version} loaded successfully.")
 except Exception as e:
     print(f"❌ Error loading LightGBM model: {e}")
-    lgbm_model = None
 
-try:
-    GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'Your API')
-    if 'YOUR_API_KEY_HERE' in GEMINI_API_KEY:
-        print("⚠️ WARNING: Gemini API key not set. AI advisory features will be disabled.")
-        gemini_model, vision_model = None, None
-    else:
-        genai.configure(api_key=GEMINI_API_KEY)
-        gemini_model = genai.GenerativeModel('gemini-2.0-flash') # Using stable versions
-        vision_model = genai.GenerativeModel('gemini-2.0-flash')
-        print("✅ Gemini text and vision models configured successfully.")
-except Exception as e:
-    print(f"❌ Error configuring Gemini AI: {e}")
+# The Gemini SDK is imported and configured on first use (or by the warm-up, see below).
+GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'Your API')
+VISION_MODEL_NAME = 'gemini-2.0-flash'
+# Both models share one gateway: a bounded number of concurrent calls, a deadline per call,
+# jittered retries and a circuit breaker that answers with a fallback while Gemini is failing.
+LLM_ENDPOINT = os.getenv('AQUALERT_LLM_ENDPOINT') or None  # e.g. benchmarks/llm_stub.py
+llm_gateway = LLMGateway(max_concurrency=int(os.getenv('AQUALERT_LLM_CONCURRENCY', '8')),
+                         timeout=float(os.getenv('AQUALERT_LLM_TIMEOUT', '20')),
+                         attempts=int(os.getenv('AQUALERT_LLM_ATTEMPTS', '3')),
+                         queue_seconds=float(os.getenv('AQUALERT_LLM_QUEUE_SECONDS', '2')),
+                         breaker=CircuitBreaker(failure_threshold=int(os.getenv('AQUALERT_LLM_BREAKER_FAILURES', '5')),
+                                                reset_seconds=float(os.getenv('AQUALERT_LLM_BREAKER_RESET', '30'))))
+if 'YOUR_API_KEY_HERE' in GEMINI_API_KEY:
+    print("⚠️ WARNING: Gemini API key not set. AI advisory features will be disabled.")
     gemini_model, vision_model = None, None
+else:
+    llm_transport = os.getenv('AQUALERT_LLM_TRANSPORT') or None
+    gemini_model = llm_gateway.wrap(LazyGenerativeModel('gemini-2.0-flash', GEMINI_API_KEY, LLM_ENDPOINT, llm_transport)) # Using stable versions
+    vision_model = llm_gateway.wrap(LazyGenerativeModel(VISION_MODEL_NAME, GEMINI_API_KEY, LLM_ENDPOINT, llm_transport),
+                                    timeout=float(os.getenv('AQUALERT_LLM_VISION_TIMEOUT', '30')))
 
 # --- HELPER FUNCTIONS ---
-# (Your helper functions like create_gemini_prompt and haversine remain unchanged)
 def create_gemini_prompt(prediction, confidence, data):
     return f"""Act as a public health expert in Haiti. Analyze this water sample data and provide a clear, simple, and actionable advisory in markdown.
 
@@ -53,20 +97,275 @@ def create_gemini_prompt(prediction, confidence, data):
     ### Important Note:
     """
 
-def haversine(lon1, lat1, lon2, lat2):
-    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
-    dlon, dlat = lon2 - lon1, lat2 - lat1
-    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
-    return 2 * asin(sqrt(a)) * 6371
+def generate_advisory(prediction, confidence, data):
+    """(advice, source): the Gemini advisory ('gemini'), or the offline one ('offline') if Gemini failed for any reason."""
+    prompt = create_gemini_prompt(prediction, confidence, data)
+    try:
+        advice = gemini_model.generate_content(prompt).text
+    except Exception as e:
+        if not isinstance(e, LLMUnavailable):  # not a busy/failing upstream: e.g. a bad key or a blocked prompt
+            print(f"⚠️ Gemini advisory failed, answering with the offline one: {e!r}")
+        return local_advisory(prediction, confidence, data), 'offline'
+    advisory_cache.put(advisory_cache_key(prediction, confidence, data), advice)
+    return advice, 'gemini'
+
+advisory_cache = AdvisoryCache(ttl_seconds=int(os.getenv('AQUALERT_ADVISORY_CACHE_TTL', str(6 * 3600))),
+                               max_bytes=int(float(os.getenv('AQUALERT_ADVISORY_CACHE_MB', '16')) * 1024 * 1024))
+advisory_jobs = AdvisoryJobs(generate_advisory, max_workers=int(os.getenv('AQUALERT_ADVISORY_WORKERS', '4')),
+                             path=os.getenv('AQUALERT_ADVISORY_JOBS', 'advisory_jobs.db'))
+
+# Rule-based advisories answer whenever Gemini can't (no key, failing) and, with
+# AQUALERT_ADVISORY_DRAFTS, straight away as a draft that the Gemini advisory later replaces.
+ADVISORY_LANGUAGES = parse_languages(os.getenv('AQUALERT_ADVISORY_LANGUAGES', 'en,ht'))
+ADVISORY_DRAFTS = os.getenv('AQUALERT_ADVISORY_DRAFTS', '1') == '1'
+
+def local_advisory(prediction, confidence, data):
+    """The offline advisory, in the sample's `lang` ("en", "ht" or "en,ht") or else AQUALERT_ADVISORY_LANGUAGES."""
+    return offline_advisory(prediction, confidence, data, parse_languages(data.get('lang'), ADVISORY_LANGUAGES))
+
+def locate_sample(data):
+    """
+    (location, nearby) for a sample. `nearby` is [(point_id, km)] within ALERT_RADIUS_KM of its
+    lat/lon, nearest first. `location` holds the `point_id` and `region` to record: the point_id
+    only if it names a known water point (None otherwise), and the sample's own region, else
+    that point's, else the nearest water point's; None (summarized as 'Unknown') if none is known.
+    """
+    nearby = []
+    if data.get('lat') and data.get('lon'):
+        nearby = water_point_index.within(float(data['lat']), float(data['lon']), ALERT_RADIUS_KM)
+    by_id = water_state.snapshot().by_id
+    try:
+        point = by_id.get(int(data['point_id'])) if data.get('point_id') is not None else None
+    except (TypeError, ValueError):
+        point = None
+    point_id = point['id'] if point else None
+    if point is None and nearby:
+        point = by_id.get(nearby[0][0])
+    return {'point_id': point_id, 'region': data.get('region') or (point or {}).get('region')}, nearby
+
+def record_results(rows):
+    """Stores scored test results. A failed write is logged, never raised: the caller still gets its verdicts."""
+    try:
+        water_state.record_tests(rows)
+    except sqlite3.Error as e:
+        print(f"⚠️ Could not record {len(rows)} test result(s): {e}")
+
+def raise_proximity_alert(lat, lon, nearby):
+    """Flags the nearest potable point of `nearby` (see locate_sample) as 'Caution' after an unsafe report."""
+    snapshot = water_state.snapshot()
+    for point_id, _ in nearby:
+        point = snapshot.by_id.get(point_id)
+        # Compare-and-set against the version we read: if another request changed this point in
+        # the meantime, the write is refused and we move on to the next candidate.
+        if point and point['status'] == 'Potable' and water_state.set_status_if(
+                point_id, 'Potable', 'Caution', reason=f"Unsafe sample reported at ({lat:.5f}, {lon:.5f})",
+                expected_version=point['version']):
+            return f"PROACTIVE ALERT: A new unsafe source was reported nearby. The status of '{point['name']}' has been changed to 'Caution' on the map. Please re-test before use."
+    return None
+
+def parse_batch_samples(req):
+    """Reads a batch of samples from a JSON list, {'samples': [...]} or an NDJSON body."""
+    if req.mimetype in ('application/x-ndjson', 'application/ndjson'):
+        lines = req.get_data(as_text=True).splitlines()
+        return [json.loads(line) for line in lines if line.strip()]
+    payload = req.get_json()
+    if isinstance(payload, dict):
+        payload = payload.get('samples')
+    if not isinstance(payload, list):
+        raise ValueError("Expected a JSON list of samples, {'samples': [...]} or an NDJSON body.")
+    return payload
+
+# /analyze_image uploads; multipart parts and JSON fields get a little room around the image.
+MAX_IMAGE_BYTES = int(float(os.getenv('AQUALERT_MAX_IMAGE_MB', '10')) * 1024 * 1024)
+UPLOAD_OVERHEAD_BYTES = 64 * 1024
+# Uploads are re-oriented, shrunk and re-encoded in worker processes before the vision model sees them.
+image_normalizer = ImageNormalizer(max_edge=int(os.getenv('AQUALERT_IMAGE_MAX_EDGE', '1024')),
+                                   output=os.getenv('AQUALERT_IMAGE_FORMAT', 'jpeg'),
+                                   quality=int(os.getenv('AQUALERT_IMAGE_QUALITY', '85')),
+                                   workers=int(os.getenv('AQUALERT_IMAGE_WORKERS', '2')))
+# 'auto' answers from the local pre-screen and only asks the vision model about ambiguous photos;
+# 'vision' always asks it; 'prescreen' never does. Requests can override it with `mode`.
+VISION_MODES = ('auto', 'vision', 'prescreen')
+VISION_MODE = os.getenv('AQUALERT_VISION_MODE', 'auto')
+# Analyses of identical (normalized) photos are reused across restarts and workers.
+vision_cache = VisionCache(os.getenv('AQUALERT_VISION_CACHE', 'vision_cache.db'),
+                           ttl_seconds=int(os.getenv('AQUALERT_VISION_CACHE_TTL', str(7 * 24 * 3600))),
+                           max_bytes=int(float(os.getenv('AQUALERT_VISION_CACHE_MB', '64')) * 1024 * 1024))
+VISION_PROMPT = "You are a water safety expert. Analyze this image for visual signs of contamination (turbidity, color, particles, oil). Provide a cautious, preliminary assessment in markdown including ### Visual Assessment, ### Potential Risks, and an ### URGENT RECOMMENDATION."
+# Cached analyses are only reused for the same model and prompt.
+VISION_CACHE_VARIANT = image_digest(f'{VISION_MODEL_NAME}\n{VISION_PROMPT}'.encode('utf-8'))[:16]
+
+def read_image_upload(req):
+    """
+    The uploaded image as (bytes, mime_type), from a multipart/form-data `image` file, a raw
+    image/* body, or JSON {"image": "<base64 data URL>"} for older clients. Raises
+    RequestEntityTooLarge past MAX_IMAGE_BYTES (checked before the body is read when the client
+    sends Content-Length) and ValueError for anything else that isn't an image upload.
+    """
+    if req.mimetype == 'multipart/form-data':
+        req.max_content_length = MAX_IMAGE_BYTES + UPLOAD_OVERHEAD_BYTES
+        upload = req.files.get('image')
+        if upload is None: raise ValueError("No 'image' file in the form data.")
+        image, mime_type = upload.read(), upload.mimetype
+    elif req.mimetype.startswith('image/'):
+        # One byte over the limit: a chunked body is cut off at the limit rather than rejected,
+        # so this is how an oversized one shows up.
+        req.max_content_length = MAX_IMAGE_BYTES + 1
+        image, mime_type = req.stream.read(), req.mimetype
+    else:
+        req.max_content_length = MAX_IMAGE_BYTES * 4 // 3 + UPLOAD_OVERHEAD_BYTES
+        data = req.get_json(silent=True) or {}
+        if 'image' not in data: raise ValueError('No image data provided.')
+        image, mime_type = base64.b64decode(data['image'].split(',')[-1]), 'image/jpeg'
+    if len(image) > MAX_IMAGE_BYTES: raise RequestEntityTooLarge()
+    if not image: raise ValueError('The uploaded image is empty.')
+    if not mime_type.startswith('image/'): raise ValueError(f"Expected an image, got {mime_type}.")
+    return image, mime_type
+
+def score_sample(served, data):
+    """Scores one sample, raises any proximity alert and records the result: (prediction, confidence, alert)."""
+    lgbm_pred, lgbm_proba = served.predict_one(data)
+
+    prediction_text = 'Potable' if lgbm_pred == 1 else 'Not Potable'
+    confidence = {'Not Potable': float(lgbm_proba[0]), 'Potable': float(lgbm_proba[1])}
+
+    location, nearby = locate_sample(data)
+    alert_message = None
+    if prediction_text == 'Not Potable' and nearby:
+        alert_message = raise_proximity_alert(float(data['lat']), float(data['lon']), nearby)
+    record_results([test_result_row(data, prediction_text, confidence, location)])
+    return prediction_text, confidence, alert_message
+
+def sse_event(name, data):
+    """One Server-Sent Event carrying `data` as JSON."""
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+def stream_advisory(prediction, confidence, data):
+    """
+    Yields ('advice', text, source) pieces of the advisory as Gemini generates them, then
+    ('done', None, source) with source gemini, cache or offline. A piece's source is gemini (also
+    for a cached advisory) or offline. Before asking Gemini it yields ('draft', offline
+    advisory, 'offline') when drafts are on. A complete advisory is cached like a background one;
+    if Gemini fails (for any reason) before its first token the offline advisory is sent instead.
+    """
+    key = advisory_cache_key(prediction, confidence, data)
+    cached = advisory_cache.get(key) if gemini_model else None
+    if cached is not None:
+        yield 'advice', cached, 'gemini'
+        yield 'done', None, 'cache'
+        return
+    if not gemini_model or llm_gateway.breaker.is_open():
+        yield 'advice', local_advisory(prediction, confidence, data), 'offline'
+        yield 'done', None, 'offline'
+        return
+    if ADVISORY_DRAFTS:
+        yield 'draft', local_advisory(prediction, confidence, data), 'offline'
+    pieces = []
+    try:
+        for piece in gemini_model.stream_text(create_gemini_prompt(prediction, confidence, data)):
+            pieces.append(piece)
+            yield 'advice', piece, 'gemini'
+    except Exception as e:
+        if pieces:
+            raise
+        if not isinstance(e, LLMUnavailable):
+            print(f"⚠️ Gemini advisory failed, answering with the offline one: {e!r}")
+        yield 'advice', local_advisory(prediction, confidence, data), 'offline'
+        yield 'done', None, 'offline'
+        return
+    advisory_cache.put(key, ''.join(pieces))
+    yield 'done', None, 'gemini'
+
+def test_result_row(data, prediction_text, confidence, location=None):
+    """A request payload plus its verdict and location (see locate_sample), in the shape WaterStore.record_tests() expects."""
+    return dict(data, **(location or {}), recorded_at=time.time(), prediction=prediction_text,
+                potable_confidence=confidence['Potable'])
 
-# --- IN-MEMORY DATABASE (For Demo) ---
-# (Your sample_water_points list remains unchanged)
+# --- DATABASE ---
+# Demo points seeded into an empty database on first start.
 sample_water_points = [
-    {"id": 1, "name": "Community Well - Cité Soleil", "lat": 18.5794, "lon": -72.3375, "status": "Not Potable", "verified": False, "history": {"Sulfate": [380, 385, 392, 405], "Turbidity": [5.1, 5.3, 5.2, 5.8]}},
-    {"id": 2, "name": "Verified NGO Tap - Pétion-Ville", "lat": 18.5135, "lon": -72.2852, "status": "Potable", "verified": True, "history": {"Sulfate": [330, 332, 331, 334], "Turbidity": [3.1, 3.0, 3.2, 3.1]}},
-    {"id": 3, "name": "River Outlet - Mariani", "lat": 18.5020, "lon": -72.3995, "status": "Potable", "verified": False, "history": {"Sulfate": [340, 338, 342, 345], "Turbidity": [3.8, 3.9, 3.7, 4.0]}}
+    {"id": 1, "name": "Community Well - Cité Soleil", "lat": 18.5794, "lon": -72.3375, "status": "Not Potable", "verified": False, "region": "Ouest", "history": {"Sulfate": [380, 385, 392, 405], "Turbidity": [5.1, 5.3, 5.2, 5.8]}},
+    {"id": 2, "name": "Verified NGO Tap - Pétion-Ville", "lat": 18.5135, "lon": -72.2852, "status": "Potable", "verified": True, "region": "Ouest", "history": {"Sulfate": [330, 332, 331, 334], "Turbidity": [3.1, 3.0, 3.2, 3.1]}},
+    {"id": 3, "name": "River Outlet - Mariani", "lat": 18.5020, "lon": -72.3995, "status": "Potable", "verified": False, "region": "Ouest", "history": {"Sulfate": [340, 338, 342, 345], "Turbidity": [3.8, 3.9, 3.7, 4.0]}}
 ]
 
+def simulated_community_results(num_records=200, days=80, seed=42):
+    """Demo community test results spread over the last `days` days, for the dashboard."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    regions = ['Ouest', 'Artibonite', 'Nord', 'Sud-Est', 'Grand-Anse']
+    now = time.time()
+    return [{'recorded_at': now - rng.uniform(0, days * 24 * 3600),
+             'region': str(rng.choice(regions, p=[0.4, 0.2, 0.2, 0.1, 0.1])),
+             'Sulfate': float(rng.uniform(250, 450)),
+             'prediction': 'Potable' if rng.random() < 0.6 else 'Not Potable'}
+            for _ in range(num_records)]
+
+store = WaterStore(os.getenv('AQUALERT_DB', 'aqualert.db'))
+if store.is_empty():
+    store.seed(sample_water_points)
+    store.record_tests(simulated_community_results())
+
+# Spatial index for the proactive alert scan, updated from each published snapshot.
+ALERT_RADIUS_KM = 5
+water_point_index = GridIndex()
+
+def index_changed_points(changed, removed=()):
+    for point in changed:
+        water_point_index.upsert(point['id'], point['lat'], point['lon'])
+    for point_id in removed:
+        water_point_index.remove(point_id)
+
+# Versioned, copy-on-write view of the points that request handlers read from.
+water_state = WaterPointState(store)
+index_changed_points(water_state.snapshot().points)
+water_state.subscribe(index_changed_points)
+
+# Encoded bodies of hot read endpoints, keyed by data version (see cached_json_response).
+response_cache = ResponseCache()
+
+def cached_json_response(key, version, build):
+    """
+    JSON response served from the pre-serialized cache. `build()` returns the object to encode
+    and only runs when `version` has not been cached yet; compression follows Accept-Encoding.
+    """
+    encoding = response_cache.negotiate(request.accept_encodings)
+    body, encoding = response_cache.get(key, version, lambda: app.json.dumps(build()).encode('utf-8'), encoding)
+    response = app.response_class(body, mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+def tabular_response(fmt, rows, schema, filename=None):
+    """Rows as an Arrow IPC stream (sent batch by batch) or a Parquet file, per columnar.negotiate()."""
+    if fmt == columnar.PARQUET:
+        response = app.response_class(columnar.parquet_bytes(rows, schema), mimetype=fmt)
+    else:
+        response = app.response_class(stream_with_context(columnar.arrow_stream(rows, schema)), mimetype=fmt)
+    if filename:
+        extension = 'parquet' if fmt == columnar.PARQUET else 'arrows'
+        response.headers['Content-Disposition'] = f'attachment; filename="{filename}.{extension}"'
+    response.vary.add('Accept')
+    return response
+
+def model_unavailable():
+    """503 + Retry-After while a lazy start is still loading the classifier, 500 if it failed."""
+    if models.loading:
+        response = jsonify({'error': 'Prediction model is still loading, retry shortly.'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    return jsonify({'error': 'Prediction model is not loaded'}), 500
+
+def parse_date_range(args, default_days=30):
+    """(start, end) dates from ?start=&end= (YYYY-MM-DD, inclusive); defaults to the last `default_days` days."""
+    today = datetime.now(timezone.utc).date()
+    start = date.fromisoformat(args['start']) if 'start' in args else today - timedelta(days=default_days)
+    end = date.fromisoformat(args['end']) if 'end' in args else today
+    if end < start:
+        raise ValueError('end must not be before start.')
+    return start, end
+
 
 # --- FLASK ROUTES ---
 # (Your existing routes like '/', '/api/water_points', '/predict', '/analyze_image' remain unchanged)
@@ -76,82 +375,476 @@ def home():
 
 @app.route('/api/water_points')
 def get_water_points():
-    return jsonify(sample_water_points)
+    """
+    All water points, tagged with an ETag of the data version (304 on If-None-Match).
+    `?since=<version>` returns only the points changed or removed after that version, or every
+    point with `full: true` for since=0 or a version the database no longer has (after a reset).
+    """
+    snapshot = water_state.snapshot()
+    etag = f'wp-{snapshot.version}'
+    if request.if_none_match.contains(etag):
+        response = app.response_class(status=304)
+    elif 'since' in request.args:
+        since = request.args.get('since', type=int)
+        if since is None or since < 0: return jsonify({'error': 'since must be a non-negative version number.'}), 400
+        version, changed, removed, full = store.changes_since(since)
+        response = jsonify({'version': version, 'full': full, 'changed': changed, 'removed': removed})
+        etag = f'wp-{version}'
+    else:
+        response = cached_json_response('water_points', snapshot.version, lambda: list(snapshot.points))
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'  # browsers revalidate with If-None-Match
+    return response
+
+@app.route('/api/water_points/<int:point_id>', methods=['DELETE'])
+def delete_water_point(point_id):
+    if not water_state.delete(point_id): return jsonify({'error': f'Unknown water point id {point_id}.'}), 404
+    return jsonify({'deleted': point_id, 'version': water_state.snapshot().version})
+
+@app.route('/api/water_points', methods=['POST'])
+def register_water_point():
+    """Adds a new water point, or updates/moves an existing one when its `id` is given."""
+    try:
+        data = request.get_json()
+        point_id = data.get('id')
+        if point_id is None:
+            if not {'name', 'lat', 'lon'} <= data.keys():
+                return jsonify({'error': 'name, lat and lon are required for a new water point.'}), 400
+            point = {'status': 'Potable', 'verified': False}
+        else:
+            point = water_state.snapshot().by_id.get(point_id)
+            if point is None: return jsonify({'error': f'Unknown water point id {point_id}.'}), 404
+            point = dict(point)
+        for key in ('name', 'status', 'verified', 'region'):
+            if key in data: point[key] = data[key]
+        for key in ('lat', 'lon'):
+            if key in data: point[key] = float(data[key])
+        return jsonify(water_state.upsert(point))
+    except Exception as e:
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 400
 
 @app.route('/predict', methods=['POST'])
 def predict():
-    if not lgbm_model: return jsonify({'error': 'Prediction model is not loaded'}), 500
+    served = models.current()
+    if not served: return model_unavailable()
     try:
         data = request.get_json()
-        features = pd.DataFrame(data, index=[0])
-        lgbm_pred = lgbm_model.predict(features)[0]
-        lgbm_proba = lgbm_model.predict_proba(features)[0]
-        
-        prediction_text = 'Potable' if lgbm_pred == 1 else 'Not Potable'
-        confidence = {'Not Potable': lgbm_proba[0], 'Potable': lgbm_proba[1]}
-        
-        alert_message = None
-        if prediction_text == 'Not Potable' and data.get('lat') and data.get('lon'):
-            lat, lon = float(data['lat']), float(data['lon'])
-            for point in sample_water_points:
-                dist = haversine(lon, lat, point['lon'], point['lat'])
-                if point['status'] == 'Potable' and dist < 5:
-                    point['status'] = 'Caution'
-                    alert_message = f"PROACTIVE ALERT: A new unsafe source was reported nearby. The status of '{point['name']}' has been changed to 'Caution' on the map. Please re-test before use."
-                    break
-
-        gemini_advice = "AI advisory is currently unavailable."
-        if gemini_model:
-            prompt = create_gemini_prompt(prediction_text, confidence, data)
-            gemini_response = gemini_model.generate_content(prompt)
-            gemini_advice = gemini_response.text
+        prediction_text, confidence, alert_message = score_sample(served, data)
+
+        # The verdict never waits on the LLM: without a cached Gemini advisory the offline one
+        # answers now, and the Gemini advisory is produced in the background and fetched from
+        # /advisory/<id> (no job while the circuit is open: it would fail anyway).
+        gemini_advice = advisory_cache.get(advisory_cache_key(prediction_text, confidence, data)) if gemini_model else None
+        advisory_source, advisory_id = 'gemini', None
+        if gemini_advice is None:
+            gemini_advice, advisory_source = local_advisory(prediction_text, confidence, data), 'offline'
+            if gemini_model and not llm_gateway.breaker.is_open():
+                advisory_id = advisory_jobs.submit(prediction_text, confidence, dict(data))
+                if not ADVISORY_DRAFTS:
+                    gemini_advice, advisory_source = None, None
 
         return jsonify({
             'prediction': prediction_text,
             'confidence': {k: round(v * 100, 2) for k, v in confidence.items()},
             'gemini_advice': gemini_advice,
-            'alert_message': alert_message
+            'advisory_source': advisory_source,
+            'advisory_id': advisory_id,
+            'advisory_url': f'/advisory/{advisory_id}' if advisory_id else None,
+            'alert_message': alert_message,
+            'model_version': served.version
+        })
+    except Exception as e:
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 400
+
+@app.route('/predict/stream', methods=['POST'])
+def predict_stream():
+    """
+    /predict as a text/event-stream: a `verdict` event straight after scoring (the /predict
+    fields without the advisory ones), a `draft` event with the offline advisory to show while
+    Gemini works, then `advice` events with the advisory text as Gemini generates it
+    ({"text": ..., "source": "gemini"}, appended in order, replacing the draft; "offline" when
+    the offline advisory answers instead), then `done` with the advisory's source. An advisory cut off part-way ends with an `error` event instead of `done`.
+    """
+    served = models.current()
+    if not served: return model_unavailable()
+    try:
+        data = request.get_json()
+        prediction_text, confidence, alert_message = score_sample(served, data)
+    except Exception as e:
+        return jsonify({'error': f'An error occurred: {str(e)}'}), 400
+
+    def events():
+        started = time.perf_counter()
+        yield sse_event('verdict', {
+            'prediction': prediction_text,
+            'confidence': {k: round(v * 100, 2) for k, v in confidence.items()},
+            'alert_message': alert_message,
+            'model_version': served.version
+        })
+        try:
+            for kind, value, source in stream_advisory(prediction_text, confidence, data):
+                if kind in ('draft', 'advice'):
+                    yield sse_event(kind, {'text': value, 'source': source})
+                else:
+                    yield sse_event('done', {'source': source, 'elapsed_ms': round((time.perf_counter() - started) * 1000, 1)})
+        except Exception as e:
+            yield sse_event('error', {'error': f"The AI advisory was interrupted: {str(e)}"})
+
+    response = app.response_class(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'  # proxies such as nginx would otherwise hold the events back
+    return response
+
+@app.route('/advisory/<job_id>')
+def get_advisory(job_id):
+    """Returns an advisory job. `?wait=<seconds>` long-polls (capped at 30 s) until it finishes."""
+    wait = min(max(request.args.get('wait', 0, type=float), 0), 30)
+    job = advisory_jobs.get(job_id, wait=wait)
+    if job is None: return jsonify({'error': 'Unknown or expired advisory id.'}), 404
+    return jsonify(job), (202 if job['status'] == 'pending' else 200)
+
+@app.route('/api/metrics')
+def get_metrics():
+    """Runtime counters for the caches and background workers."""
+    served = models.current()
+    return jsonify({'advisory_cache': advisory_cache.stats(), 'response_cache': response_cache.stats(),
+                    'model_version': served.version if served else None,
+                    'predict_batcher': served.batcher.stats() if served and served.batcher else None,
+                    'images': image_normalizer.stats(), 'vision_cache': vision_cache.stats(),
+                    'llm': llm_gateway.stats()})
+
+@app.route('/api/models')
+def get_models():
+    """The serving model, the registry's CURRENT pointer and every registered version."""
+    return jsonify(models.status())
+
+@app.route('/api/models/reload', methods=['POST'])
+def reload_model():
+    """
+    Loads a model version in the background and swaps it in once it is warmed up. With
+    {"version": "..."} that version is also promoted to CURRENT once it serves (so other workers
+    follow); otherwise CURRENT is reloaded. Requires X-Admin-Token when AQUALERT_ADMIN_TOKEN is set.
+    """
+    admin_token = os.getenv('AQUALERT_ADMIN_TOKEN')
+    if admin_token and not hmac.compare_digest(request.headers.get('X-Admin-Token', ''), admin_token):
+        return jsonify({'error': 'Invalid or missing X-Admin-Token.'}), 403
+    version = (request.get_json(silent=True) or {}).get('version')
+    if version and version not in model_registry.versions():
+        return jsonify({'error': f"Unknown model version {version}."}), 404
+    loading = models.reload(version, promote=bool(version))
+    if loading is None:
+        return jsonify({'error': 'A model reload is already in progress.'}), 409
+    served = models.current()
+    return jsonify({'loading': loading, 'active': served.version if served else None}), 202
+
+@app.route('/predict/batch', methods=['POST'])
+def predict_batch():
+    """Scores many samples with a single predict_proba call (no AI advisory)."""
+    served = models.current()
+    if not served: return model_unavailable()
+    try:
+        samples = parse_batch_samples(request)
+        if not samples: return jsonify({'error': 'No samples provided.'}), 400
+
+        start = time.perf_counter()
+        labels, probas = served.engine.predict_many(samples)
+
+        results, rows = [], []
+        for sample, label, proba in zip(samples, labels, probas):
+            prediction_text = 'Potable' if label == 1 else 'Not Potable'
+            confidence = {'Not Potable': float(proba[0]), 'Potable': float(proba[1])}
+            location, nearby = locate_sample(sample)
+            alert_message = None
+            if prediction_text == 'Not Potable' and nearby:
+                alert_message = raise_proximity_alert(float(sample['lat']), float(sample['lon']), nearby)
+            results.append({
+                'prediction': prediction_text,
+                'confidence': {k: round(v * 100, 2) for k, v in confidence.items()},
+                'alert_message': alert_message
+            })
+            rows.append(test_result_row(sample, prediction_text, confidence, location))
+        record_results(rows)
+        elapsed = time.perf_counter() - start
+
+        return jsonify({
+            'count': len(results),
+            'model_version': served.version,
+            'results': results,
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'rows_per_second': round(len(results) / elapsed, 1) if elapsed > 0 else None
         })
     except Exception as e:
         return jsonify({'error': f'An error occurred: {str(e)}'}), 400
 
 @app.route('/analyze_image', methods=['POST'])
 def analyze_image():
-    if not vision_model: return jsonify({'error': 'Vision model not available.'}), 500
+    """
+    Preliminary visual assessment of a water sample photo. Send the image as multipart/form-data
+    (field `image`) or as a raw image/* body; the base64 JSON body is kept for older clients.
+
+    A local pre-screen (colour, haze, particles) scores every photo in a few milliseconds. With
+    `mode` auto (the default, see AQUALERT_VISION_MODE) its verdict is returned as is unless the
+    photo is ambiguous, in which case the vision model is asked; `mode=vision` always asks it
+    and `mode=prescreen` never does. Without a Gemini key the pre-screen answers everything, and
+    while Gemini is unreachable (busy, timing out, circuit open) it answers instead when it can.
+    """
     try:
-        data = request.get_json()
-        if 'image' not in data: return jsonify({'error': 'No image data provided.'}), 400
-        image_b64 = data['image'].split(',')[1]
-        image_parts = [{"mime_type": "image/jpeg", "data": base64.b64decode(image_b64)}]
-        
-        prompt = "You are a water safety expert. Analyze this image for visual signs of contamination (turbidity, color, particles, oil). Provide a cautious, preliminary assessment in markdown including ### Visual Assessment, ### Potential Risks, and an ### URGENT RECOMMENDATION."
-        response = vision_model.generate_content([prompt, *image_parts])
-        return jsonify({'analysis': response.text})
+        image, mime_type = read_image_upload(request)
+        mode = request.values.get('mode', VISION_MODE)
+        if mode not in VISION_MODES:
+            raise ValueError(f"mode must be one of {', '.join(VISION_MODES)}.")
+        image, mime_type, image_info = image_normalizer.normalize(image, mime_type)
+    except RequestEntityTooLarge:
+        return jsonify({'error': f'Image is larger than {MAX_IMAGE_BYTES / (1024 * 1024):g} MB.'}), 413
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except ImageWorkerError as e:
+        response = jsonify({'error': f'{str(e)} Please try again.'})
+        response.headers['Retry-After'] = '1'
+        return response, 503
+    screen = image_info.pop('prescreen', None)
+    image_key = image_digest(image)
+    escalate = mode == 'vision' or (mode == 'auto' and (screen is None or screen['verdict'] == 'ambiguous'))
+    if escalate and not vision_model and (mode == 'vision' or screen is None):
+        return jsonify({'error': 'Vision model not available.'}), 500
+    def prescreen_response(fallback=None):
+        from prescreen import report as prescreen_report  # prescreen imports numpy; keep it off startup
+        analysis, recommendations = prescreen_report(screen)
+        return jsonify({'analysis': analysis, 'source': 'prescreen', 'prescreen': screen,
+                        'confidence': screen['confidence'], 'recommendations': recommendations,
+                        'image': dict(image_info, sha256=image_key), 'cached': False, 'fallback': fallback})
+    if not escalate or not vision_model:
+        return prescreen_response()
+    try:
+        analysis = vision_cache.get(image_key, VISION_CACHE_VARIANT)
+        cached = analysis is not None
+        if not cached:
+            image_parts = [{"mime_type": mime_type, "data": image}]
+            analysis = vision_model.generate_content([VISION_PROMPT, *image_parts]).text
+            vision_cache.put(image_key, VISION_CACHE_VARIANT, analysis)
+        return jsonify({'analysis': analysis, 'source': 'vision', 'prescreen': screen,
+                        'image': dict(image_info, sha256=image_key), 'cached': cached})
+    except LLMUnavailable as e:
+        if screen is not None:
+            return prescreen_response(fallback=e.reason)
+        response = jsonify({'error': f"Visual analysis is temporarily unavailable: {str(e)}"})
+        response.headers['Retry-After'] = str(int(llm_gateway.breaker.reset_seconds))
+        return response, 503
     except Exception as e:
         return jsonify({'error': f"Error during visual analysis: {str(e)}"}), 500
 
-# --- THE NEW ENDPOINT FOR THE DASHBOARD ---
+# --- COMMUNITY DASHBOARD ---
+def summarize_buckets(buckets):
+    """Folds per-bucket rollups into overall totals."""
+    count = sum(b['count'] for b in buckets)
+    unsafe = sum(b['unsafe_count'] for b in buckets)
+    sulfate_count = sum(b['sulfate_count'] for b in buckets)
+    with_sulfate = [b for b in buckets if b['sulfate_count']]
+    return {
+        'count': count,
+        'unsafe_count': unsafe,
+        'unsafe_ratio': round(unsafe / count, 4) if count else None,
+        'sulfate_mean': sum(b['sulfate_mean'] * b['sulfate_count'] for b in with_sulfate) / sulfate_count if sulfate_count else None,
+        'sulfate_min': min((b['sulfate_min'] for b in with_sulfate), default=None),
+        'sulfate_max': max((b['sulfate_max'] for b in with_sulfate), default=None),
+    }
+
+SUMMARY_COLUMNS = [('period', 'date'), ('region', 'text'), ('count', 'int'), ('sulfate_count', 'int'),
+                   ('sulfate_mean', 'float'), ('sulfate_min', 'float'), ('sulfate_max', 'float'),
+                   ('unsafe_count', 'int'), ('unsafe_ratio', 'float')]
+
 @app.route('/api/community_summary')
 def get_community_summary():
-    """Provides aggregated data for the Streamlit dashboard."""
+    """
+    Pre-aggregated test results for the dashboard: one row per time bucket and region, so the
+    payload grows with the number of buckets rather than the number of tests.
+
+    Query parameters: start, end (YYYY-MM-DD, inclusive; default the last 30 days),
+    region (optional) and granularity (day | week | month; default day).
+    Send `Accept: application/vnd.apache.arrow.stream` (or Parquet, or ?format=arrow|parquet)
+    for the buckets as a columnar table, with the rest of the summary in its schema metadata.
+    """
     try:
-        # In a real app, this would query a database. Here, we simulate it.
-        regions = ['Ouest', 'Artibonite', 'Nord', 'Sud-Est', 'Grand-Anse']
-        num_records = 200
-        
-        simulated_data = {
-            'timestamp': pd.to_datetime(np.random.choice(pd.date_range('2024-03-01', '2024-05-20'), num_records)),
-            'region': np.random.choice(regions, num_records, p=[0.4, 0.2, 0.2, 0.1, 0.1]),
-            'sulfate': np.random.uniform(250, 450, num_records),
-            'prediction': np.random.choice([0, 1], num_records, p=[0.4, 0.6]) # 0=Unsafe, 1=Safe
+        granularity = request.args.get('granularity', 'day')
+        if granularity not in GRANULARITIES:
+            return jsonify({'error': f"granularity must be one of {', '.join(GRANULARITIES)}."}), 400
+        start, end = parse_date_range(request.args)
+        region = request.args.get('region') or None
+
+        buckets = store.summarize_tests(start.isoformat(), end.isoformat(), region, granularity)
+        for bucket in buckets:
+            bucket['unsafe_ratio'] = round(bucket['unsafe_count'] / bucket['count'], 4)
+        summary = {
+            'start': start.isoformat(), 'end': end.isoformat(), 'region': region, 'granularity': granularity,
+            'regions': store.list_regions(),
+            'totals': summarize_buckets(buckets)
         }
-        df = pd.DataFrame(simulated_data)
-        df['prediction_label'] = df['prediction'].apply(lambda x: 'Safe' if x == 1 else 'Unsafe')
-        
-        # Convert DataFrame to JSON format that's easy to use
-        return df.to_json(orient='records', date_format='iso')
+
+        fmt = columnar.negotiate(request)
+        if fmt != columnar.JSON:
+            # Buckets become the table; everything else travels in the schema metadata.
+            rows = [tuple(bucket[name] for name, _ in SUMMARY_COLUMNS) for bucket in buckets]
+            return tabular_response(fmt, rows, columnar.schema_for(SUMMARY_COLUMNS, metadata=summary))
+        return jsonify(dict(summary, buckets=buckets))
+    except ValueError as e:
+        return jsonify({'error': f"Invalid query parameter: {str(e)}"}), 400
     except Exception as e:
         return jsonify({'error': f"Error generating summary data: {str(e)}"}), 500
 
+@app.route('/api/water_points/<int:point_id>/summary')
+def get_point_summary(point_id):
+    """Hourly rollups of one water point's test results over the last `hours` hours (default 168)."""
+    try:
+        hours = int(request.args.get('hours', 168))
+        if not 1 <= hours <= 24 * 366:
+            return jsonify({'error': 'hours must be between 1 and 8784.'}), 400
+        if water_state.snapshot().by_id.get(point_id) is None:
+            return jsonify({'error': f"Water point {point_id} not found."}), 404
+
+        end_ts = time.time()
+        buckets = store.summarize_point(point_id, end_ts - hours * 3600, end_ts)
+        for bucket in buckets:
+            bucket['hour'] = datetime.fromtimestamp(bucket['hour'], timezone.utc).isoformat()
+            bucket['unsafe_ratio'] = round(bucket['unsafe_count'] / bucket['count'], 4)
+        return jsonify({'point_id': point_id, 'hours': hours, 'totals': summarize_buckets(buckets), 'buckets': buckets})
+    except ValueError as e:
+        return jsonify({'error': f"Invalid query parameter: {str(e)}"}), 400
+    except Exception as e:
+        return jsonify({'error': f"Error generating summary data: {str(e)}"}), 500
+
+EXPORT_COLUMN_KINDS = {'id': 'int', 'point_id': 'int', 'recorded_at': 'timestamp', 'region': 'text', 'prediction': 'text'}
+EXPORT_SCHEMA_COLUMNS = [(name, EXPORT_COLUMN_KINDS.get(name, 'float')) for name in EXPORT_COLUMNS]
+
+@app.route('/api/export/test_results')
+def export_test_results():
+    """
+    Raw test results between start and end (YYYY-MM-DD, inclusive; default the last 30 days),
+    optionally for one region. Streams JSON by default; Arrow stream or Parquet on request, as
+    for /api/community_summary.
+    """
+    try:
+        start, end = parse_date_range(request.args)
+        region = request.args.get('region') or None
+    except ValueError as e:
+        return jsonify({'error': f"Invalid query parameter: {str(e)}"}), 400
+
+    start_ts = datetime(start.year, start.month, start.day, tzinfo=timezone.utc).timestamp()
+    end_ts = datetime(end.year, end.month, end.day, tzinfo=timezone.utc).timestamp() + 24 * 3600
+    rows = store.export_tests(start_ts, end_ts, region)
+    fmt = columnar.negotiate(request)
+    if fmt != columnar.JSON:
+        return tabular_response(fmt, rows, columnar.schema_for(EXPORT_SCHEMA_COLUMNS),
+                                filename=f"aqualert_test_results_{start}_{end}")
+
+    def generate_json():
+        separator = '['
+        while batch := rows.fetchmany(columnar.BATCH_ROWS):
+            records = []
+            for row in batch:
+                record = dict(zip(EXPORT_COLUMNS, row))
+                record['recorded_at'] = datetime.fromtimestamp(record['recorded_at'], timezone.utc).isoformat()
+                records.append(json.dumps(record))
+            yield separator + ','.join(records)
+            separator = ','
+        yield ']' if separator == ',' else '[]'
+
+    response = app.response_class(stream_with_context(generate_json()), mimetype='application/json')
+    response.vary.add('Accept')
+    return response
+
+# --- WARM-UP AND HEALTH CHECKS ---
+# Typical field samples (the Real-Time Test presets) used to exercise the model and advisories.
+WARM_UP_SAMPLES = [
+    {"ph": 7.2, "Hardness": 150.0, "Solids": 200.0, "Chloramines": 2.5, "Sulfate": 180.0, "Conductivity": 350.0, "Organic_carbon": 8.0, "Trihalomethanes": 45.0, "Turbidity": 0.5},
+    {"ph": 7.8, "Hardness": 85.0, "Solids": 120.0, "Chloramines": 0.8, "Sulfate": 20.0, "Conductivity": 150.0, "Organic_carbon": 2.0, "Trihalomethanes": 10.0, "Turbidity": 0.1},
+    {"ph": 6.8, "Hardness": 280.0, "Solids": 450.0, "Chloramines": 8.5, "Sulfate": 380.0, "Conductivity": 650.0, "Organic_carbon": 18.0, "Trihalomethanes": 95.0, "Turbidity": 2.8},
+    {"ph": 8.1, "Hardness": 320.0, "Solids": 380.0, "Chloramines": 3.2, "Sulfate": 290.0, "Conductivity": 580.0, "Organic_carbon": 12.0, "Trihalomethanes": 65.0, "Turbidity": 1.2}
+]
+# Hot GET endpoints whose encoded bodies are pre-built for the current data version.
+# Endpoints served from response_cache. /api/community_summary is not: it reads the rollups on
+# every request (test results don't bump the data version the cache is keyed on), so warming it fills nothing.
+WARM_UP_PATHS = ['/api/water_points']
+
+def warm_up_model():
+    """Single and batched predictions through the serving model, including the micro-batcher."""
+    served = models.wait_loaded()  # a lazy start is still loading it in the background
+    if served is None:
+        raise RuntimeError('No model is serving.')
+    models.warm_up()  # first inference in this process (serve.py workers load the model cold)
+    rounds = int(os.getenv('AQUALERT_WARMUP_PREDICTIONS', '64'))
+    for i in range(rounds):
+        served.predict_one(WARM_UP_SAMPLES[i % len(WARM_UP_SAMPLES)])
+    served.engine.predict_many(WARM_UP_SAMPLES * max(1, rounds // len(WARM_UP_SAMPLES)))
+    return {'version': served.version, 'predictions': rounds}
+
+def warm_up_index():
+    """One proximity query around every water point."""
+    points = water_state.snapshot().points
+    for point in points:
+        water_point_index.within(point['lat'], point['lon'], ALERT_RADIUS_KM)
+    return {'points': len(points)}
+
+def warm_up_responses():
+    """Fills the response cache (identity, gzip and br when installed) for the hot endpoints."""
+    client = app.test_client()
+    for path in WARM_UP_PATHS:
+        for accept_encoding in ('identity', 'gzip', 'br, gzip'):
+            response = client.get(path, headers={'Accept-Encoding': accept_encoding})
+            response.get_data()
+            if response.status_code != 200:
+                raise RuntimeError(f"GET {path} returned {response.status_code}.")
+    return {'paths': len(WARM_UP_PATHS)}
+
+def warm_up_images():
+    """Forks the image workers so the first upload doesn't pay for starting them (before gRPC loads)."""
+    image_normalizer.warm_up()
+    return {'enabled': image_normalizer.enabled, 'workers': image_normalizer.workers}
+
+def warm_up_gemini():
+    """Imports and configures the Gemini SDK (otherwise the first advisory or image pays for it)."""
+    if gemini_model is None:
+        return {'skipped': 'no API key'}
+    gemini_model.warm_up()
+    vision_model.warm_up()
+    print("✅ Gemini text and vision models configured successfully.")
+
+def warm_up_advisories():
+    """Queues advisories for the preset samples; readiness doesn't wait for the LLM to answer."""
+    if gemini_model is None:
+        return {'skipped': 'no API key'}
+    served, queued = models.current(), 0
+    for data in WARM_UP_SAMPLES:
+        label, proba = served.predict_one(data)
+        prediction = 'Potable' if label == 1 else 'Not Potable'
+        confidence = {'Not Potable': float(proba[0]), 'Potable': float(proba[1])}
+        if advisory_cache.get(advisory_cache_key(prediction, confidence, data)) is None:
+            advisory_jobs.submit(prediction, confidence, dict(data))
+            queued += 1
+    return {'queued': queued}
+
+# AQUALERT_WARMUP picks the steps (comma-separated, in this order); "none" skips warm-up.
+WARM_UP_STEPS = {'model': warm_up_model, 'index': warm_up_index, 'responses': warm_up_responses,
+                 'images': warm_up_images, 'gemini': warm_up_gemini, 'advisories': warm_up_advisories}
+warm_up_names = os.getenv('AQUALERT_WARMUP', 'model,index,responses,images,gemini').replace(' ', '')
+warm_up = WarmUp([(name, WARM_UP_STEPS[name]) for name in WARM_UP_STEPS
+                  if name in warm_up_names.split(',')])
+# serve.py runs the warm-up in each worker before it accepts connections.
+if not os.getenv('AQUALERT_PREFORK'):
+    start_background(warm_up.run, 'warm-up')
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: the process is up and answering requests."""
+    return jsonify({'status': 'ok', 'pid': os.getpid()})
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: 200 once the warm-up has finished and a model is serving, 503 before."""
+    served = models.current()
+    ready = warm_up.done.is_set() and served is not None
+    body = {'ready': ready, 'pid': os.getpid(), 'model_version': served.version if served else None,
+            'model_loading': models.loading, 'warm_up': warm_up.status()}
+    return jsonify(body), (200 if ready else 503)
+
 if __name__ == '__main__':
     app.run(port=5000, debug=True)
@@ -0,0 +1,144 @@
+# backend/batching.py - MICRO-BATCHING OF CONCURRENT SINGLE-SAMPLE PREDICTIONS
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+# Queueing delays kept for the percentile metrics.
+DELAY_SAMPLES = 2048
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent predict_one() calls into one vectorized predict_proba. Each caller
+    vectorizes its own row and waits on a Future; a single worker thread takes the first queued
+    row, keeps collecting until `max_batch_size` rows or `max_wait_ms` after that first row,
+    scores the stacked matrix once and hands every caller its own (label, probabilities).
+
+    A lone request therefore waits at most `max_wait_ms` extra. With max_wait_ms=0 nothing waits:
+    each batch is whatever queued up while the previous one was being scored. The worker thread
+    is started on first use (and again in a forked child), never at import time.
+    """
+
+    def __init__(self, engine, max_batch_size=32, max_wait_ms=2.0):
+        self.engine = engine
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000
+        self._start_lock = threading.Lock()
+        # Held while checking _closed and queueing a row, and by close(), so no row can be queued
+        # behind the stop sentinel.
+        self._submit_lock = threading.Lock()
+        self._queue = None
+        self._pid = None
+        self._closed = False
+        self._stats_lock = threading.Lock()
+        self._delays = deque(maxlen=DELAY_SAMPLES)
+        self._size_histogram = {}
+        self.batches = self.requests = self.errors = 0
+        self.largest_batch = 0
+
+    def _ensure_worker(self):
+        if self._pid == os.getpid():
+            return self._queue
+        with self._start_lock:
+            if self._pid != os.getpid():
+                self._queue = queue.SimpleQueue()
+                threading.Thread(target=self._worker, args=(self._queue,), name='predict-batcher', daemon=True).start()
+                self._pid = os.getpid()
+        return self._queue
+
+    def submit(self, data):
+        """Queues one request dict; the Future resolves to (label, probabilities)."""
+        future = Future()
+        row = self.engine.vectorize(data)[0].copy()
+        with self._submit_lock:
+            if not self._closed:
+                self._ensure_worker().put((row, future, time.perf_counter()))
+                return future
+        # A straggler still holding a replaced model: score it directly.
+        future.set_result(self.engine.predict_one(data))
+        return future
+
+    def predict_one(self, data, timeout=None):
+        """Drop-in for InferenceEngine.predict_one that shares the model call with concurrent requests."""
+        return self.submit(data).result(timeout)
+
+    def close(self):
+        """Stops the worker once every request queued so far has been scored."""
+        with self._submit_lock, self._start_lock:
+            self._closed = True
+            if self._pid == os.getpid():
+                self._queue.put(None)
+
+    # --- WORKER ---
+    def _worker(self, jobs):
+        running = True
+        while running:
+            first = jobs.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                try:
+                    # Past the deadline, still take whatever is already queued without waiting.
+                    job = jobs.get(timeout=remaining) if remaining > 0 else jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    running = False
+                    break
+                batch.append(job)
+            self._run(batch)
+
+    def _run(self, batch):
+        started = time.perf_counter()
+        try:
+            probas = self.engine.predict_proba_matrix(np.stack([row for row, _, _ in batch]))
+            labels = self.engine.labels_from_proba(probas)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            failed = True
+        else:
+            for i, (_, future, _) in enumerate(batch):
+                future.set_result((labels[i], probas[i]))
+            failed = False
+        self._record(batch, started, failed)
+
+    def _record(self, batch, started, failed):
+        size = len(batch)
+        bucket = 1 << (size - 1).bit_length()   # 1, 2, 4, 8, ... (upper bound of the bucket)
+        with self._stats_lock:
+            self.batches += 1
+            self.requests += size
+            self.errors += failed
+            self.largest_batch = max(self.largest_batch, size)
+            self._size_histogram[bucket] = self._size_histogram.get(bucket, 0) + 1
+            self._delays.extend(started - enqueued for _, _, enqueued in batch)
+
+    def stats(self):
+        with self._stats_lock:
+            delays = np.array(self._delays) * 1000
+            return {
+                'max_batch_size': self.max_batch_size,
+                'max_wait_ms': self.max_wait * 1000,
+                'batches': self.batches,
+                'requests': self.requests,
+                'errors': self.errors,
+                'mean_batch_size': round(self.requests / self.batches, 2) if self.batches else None,
+                'largest_batch': self.largest_batch,
+                'batch_size_histogram': {f'<={k}': v for k, v in sorted(self._size_histogram.items())},
+                'queue_delay_ms': {
+                    'mean': round(float(delays.mean()), 3),
+                    'p50': round(float(np.percentile(delays, 50)), 3),
+                    'p95': round(float(np.percentile(delays, 95)), 3),
+                    'max': round(float(delays.max()), 3),
+                } if len(delays) else None,
+            }
@@ -0,0 +1,71 @@
+# backend/benchmarks/bench_batching.py - CONCURRENT /predict SCORING, PER-REQUEST vs MICRO-BATCHED
+#
+# Usage (from the backend directory):  python benchmarks/bench_batching.py [--threads 1 8 32] [--seconds 3]
+# Each thread calls predict_one() in a loop, first straight on the InferenceEngine and then through
+# a MicroBatcher, and the script reports throughput, latency percentiles and the batch sizes seen.
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+import joblib
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from batching import MicroBatcher  # noqa: E402
+from inference import InferenceEngine  # noqa: E402
+
+SAMPLE = {"ph": 7.0, "Hardness": 195.0, "Solids": 20000.0, "Chloramines": 7.0, "Sulfate": 330.0, "Conductivity": 420.0,
+          "Organic_carbon": 14.0, "Trihalomethanes": 65.0, "Turbidity": 4.0}
+
+
+def run(predictor, n_threads, seconds):
+    latencies = [[] for _ in range(n_threads)]
+    stop = time.perf_counter() + seconds
+
+    def worker(i):
+        rng = random.Random(i)
+        sample = dict(SAMPLE, Sulfate=rng.uniform(250, 450))
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            predictor.predict_one(sample)
+            latencies[i].append(time.perf_counter() - started)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    all_latencies = np.concatenate([np.array(l) for l in latencies]) * 1000
+    return len(all_latencies) / seconds, np.percentile(all_latencies, 50), np.percentile(all_latencies, 99)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--seconds', type=float, default=3)
+    parser.add_argument('--max-batch-size', type=int, default=32)
+    parser.add_argument('--max-wait-ms', type=float, default=2)
+    args = parser.parse_args()
+
+    engine = InferenceEngine(joblib.load(os.path.join(BACKEND_DIR, 'aquasense_classifier.pkl')))
+    # Same verdicts either way.
+    batcher = MicroBatcher(engine, args.max_batch_size, args.max_wait_ms)
+    assert np.allclose(engine.predict_one(SAMPLE)[1], batcher.predict_one(SAMPLE)[1])
+
+    for n_threads in args.threads:
+        batcher = MicroBatcher(engine, args.max_batch_size, args.max_wait_ms)
+        for name, predictor in (('per-request', engine), ('batched', batcher)):
+            rps, p50, p99 = run(predictor, n_threads, args.seconds)
+            print(f"{n_threads:>3} threads | {name:<11} | {rps:9,.0f} req/s | p50 {p50:7.3f} ms | p99 {p99:7.3f} ms")
+        stats = batcher.stats()
+        print(f"    batches: mean size {stats['mean_batch_size']}, largest {stats['largest_batch']}, "
+              f"queue delay p95 {stats['queue_delay_ms']['p95']} ms")
+
+
+if __name__ == '__main__':
+    main()
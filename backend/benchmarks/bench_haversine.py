@@ -0,0 +1,41 @@
+# backend/benchmarks/bench_haversine.py - SCALAR vs VECTORIZED GREAT-CIRCLE DISTANCES
+#
+# Usage (from the backend directory):  python benchmarks/bench_haversine.py [--sizes 1000 100000 1000000]
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from geo import haversine, haversine_many  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the scalar haversine loop with the NumPy version.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    origin_lon, origin_lat = -72.3375, 18.5794  # Cité Soleil
+    print(f"{'points':>10}{'scalar loop (ms)':>20}{'vectorized (ms)':>18}{'speed-up':>10}")
+    for n in args.sizes:
+        lats = rng.uniform(18.0, 20.1, n)   # roughly Haiti's bounding box
+        lons = rng.uniform(-74.5, -71.6, n)
+
+        start = time.perf_counter()
+        scalar = [haversine(origin_lon, origin_lat, lon, lat) for lon, lat in zip(lons.tolist(), lats.tolist())]
+        scalar_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        vectorized = haversine_many(origin_lon, origin_lat, lons, lats)
+        vector_ms = (time.perf_counter() - start) * 1000
+
+        assert np.allclose(scalar, vectorized), "vectorized distances disagree with the scalar helper"
+        print(f"{n:>10}{scalar_ms:>20.2f}{vector_ms:>18.2f}{scalar_ms / vector_ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,137 @@
+# backend/benchmarks/bench_images.py - UPLOAD NORMALIZATION: BYTES AND TIME SAVED BEFORE THE VISION MODEL
+#
+# Usage (from the backend directory):  python benchmarks/bench_images.py [--max-edge 1024] [--uplink-mbps 2]
+# Builds synthetic phone photos (4-12 MP JPEGs with an EXIF rotation, and a PNG), runs them
+# through normalize_image() and reports the bytes sent to Gemini, the time spent normalizing,
+# the upload time saved on a slow uplink and an estimate of the vision tokens billed. It then
+# checks how much a busy request thread is stalled by concurrent decodes, inline vs in the
+# ImageNormalizer process pool, and how long the local pre-screen takes per photo (the time an
+# 'auto' request saves whenever it doesn't need the vision model). Requires Pillow.
+
+import argparse
+import io
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from imaging import ImageNormalizer, normalize_image, screen_image  # noqa: E402
+
+SIZES = {'4 MP': (2304, 1728), '8 MP': (3264, 2448), '12 MP': (4000, 3000)}
+
+
+def photo(width, height, fmt='JPEG', seed=0):
+    """Lighting gradients, texture at several scales and sensor noise, so sizes resemble real photos."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    pixels = np.stack([120 + 80 * np.sin(x / width * 3), 140 + 60 * np.cos(y / height * 2), 160 + 40 * np.sin((x + y) / width)], -1)
+    for scale, amplitude in ((64, 30), (16, 20), (4, 12)):  # detail that survives downscaling
+        field = rng.normal(0, amplitude, (height // scale + 1, width // scale + 1, 3)).astype(np.float32)
+        layers = [np.asarray(Image.fromarray(field[..., c], 'F').resize((width, height), Image.BICUBIC)) for c in range(3)]
+        pixels += np.stack(layers, -1)
+    pixels = (pixels + rng.normal(0, 4, pixels.shape)).clip(0, 255).astype(np.uint8)
+    out = io.BytesIO()
+    if fmt == 'JPEG':
+        exif = Image.Exif()
+        exif[0x0112] = 6  # phone held upright: stored sideways, rotated on display
+        Image.fromarray(pixels).save(out, 'JPEG', quality=92, exif=exif.tobytes())
+    else:
+        Image.fromarray(pixels).save(out, fmt)
+    return out.getvalue()
+
+
+def vision_tokens(width, height):
+    """Rough Gemini image cost: 258 tokens for a small image, else 258 per 768 px tile."""
+    if width <= 384 and height <= 384:
+        return 258
+    return 258 * math.ceil(width / 768) * math.ceil(height / 768)
+
+
+def stall(work, concurrency, rounds):
+    """(seconds, worst gap ms, p99 gap ms) for a thread that wants to run every 1 ms while `work` runs."""
+    gaps, done = [], threading.Event()
+
+    def ticker():
+        last = time.perf_counter()
+        while not done.is_set():
+            time.sleep(0.001)
+            now = time.perf_counter()
+            gaps.append(now - last)
+            last = now
+
+    tick = threading.Thread(target=ticker)
+    tick.start()
+    workers = [threading.Thread(target=lambda: [work() for _ in range(rounds)]) for _ in range(concurrency)]
+    started = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    elapsed = time.perf_counter() - started
+    done.set()
+    tick.join()
+    return elapsed, max(gaps) * 1000, np.percentile(gaps, 99) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--max-edge', type=int, default=1024)
+    parser.add_argument('--quality', type=int, default=85)
+    parser.add_argument('--uplink-mbps', type=float, default=2.0, help="Server-to-Gemini bandwidth assumed for upload time.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=4)
+    args = parser.parse_args()
+
+    samples = [(name, photo(*size, seed=i)) for i, (name, size) in enumerate(SIZES.items())]
+    samples.append(('4 MP PNG', photo(*SIZES['4 MP'], fmt='PNG', seed=9)))
+
+    print(f"max edge {args.max_edge}px, quality {args.quality}, uplink {args.uplink_mbps} Mbit/s")
+    print(f"{'image':<10} {'output':<5} | {'original':>9} -> {'sent':>8} ({'ratio':>5}) | {'normalize':>9} | "
+          f"{'upload saved':>12} | {'est. tokens':>13}")
+    for name, data in samples:
+        width, height = Image.open(io.BytesIO(data)).size
+        for output in ('jpeg', 'webp'):
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                encoded, _, info = normalize_image(data, args.max_edge, output, args.quality)
+                timings.append(time.perf_counter() - started)
+            saved_s = (len(data) - len(encoded)) * 8 / (args.uplink_mbps * 1e6)
+            print(f"{name:<10} {output:<5} | {len(data) / 1024:7.0f} KB -> {len(encoded) / 1024:5.0f} KB "
+                  f"({len(data) / len(encoded):4.0f}x) | {statistics.median(timings) * 1000:6.0f} ms | "
+                  f"{saved_s:10.1f} s | {vision_tokens(width, height):>5} -> {vision_tokens(*info['size']):<5}")
+
+    # Local pre-screen on the normalized image, as the workers run it.
+    print("\nLocal pre-screen (colour histogram, haze, particles):")
+    for name, data in samples:
+        image = Image.open(io.BytesIO(normalize_image(data, args.max_edge, 'jpeg', args.quality)[0]))
+        image.load()
+        timings = []
+        for _ in range(args.repeat * 10):
+            result = screen_image(image)
+            timings.append(result['ms'])
+        print(f"   {name:<10} {statistics.median(timings):6.2f} ms  verdict {result['verdict']:<10} score {result['score']:5.1f}")
+
+    # Request-thread responsiveness while several uploads are being normalized at once.
+    data = samples[-2][1]  # 12 MP JPEG
+    normalizer = ImageNormalizer(args.max_edge, 'jpeg', args.quality, workers=max(1, min(args.concurrency, os.cpu_count() or 1)))
+    try:
+        normalizer.warm_up()
+        print(f"\n{args.concurrency} concurrent 12 MP uploads x {args.repeat}, while another thread ticks every 1 ms:")
+        for label, work in (('inline', lambda: normalize_image(data, args.max_edge, 'jpeg', args.quality)),
+                            ('process pool', lambda: normalizer.normalize(data, 'image/jpeg'))):
+            elapsed, worst, p99 = stall(work, args.concurrency, args.repeat)
+            print(f"   {label:<13} {elapsed:6.2f} s total | ticker gap p99 {p99:6.1f} ms, worst {worst:6.1f} ms")
+    finally:
+        normalizer.close()  # stop the workers now, not in the interpreter's exit hooks
+
+
+if __name__ == '__main__':
+    main()
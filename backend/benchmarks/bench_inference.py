@@ -0,0 +1,59 @@
+# backend/benchmarks/bench_inference.py - /predict INFERENCE LATENCY, BEFORE vs AFTER
+#
+# Usage (from the backend directory):  python benchmarks/bench_inference.py [--iterations 2000]
+
+import argparse
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+from inference import InferenceEngine  # noqa: E402
+
+SAMPLE = {"ph": 7.0, "Hardness": 195.0, "Solids": 20000.0, "Chloramines": 7.0, "Sulfate": 330.0, "Conductivity": 420.0,
+          "Organic_carbon": 14.0, "Trihalomethanes": 65.0, "Turbidity": 4.0, "lat": 18.51, "lon": -72.29}
+
+
+def legacy_predict(model, data):
+    # The original /predict path: DataFrame from the JSON dict, then predict AND predict_proba.
+    features = pd.DataFrame(data, index=[0])
+    return model.predict(features)[0], model.predict_proba(features)[0]
+
+
+def measure(fn, iterations):
+    for _ in range(50):
+        fn()
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn()
+        timings[i] = time.perf_counter() - start
+    return timings * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare legacy and single-pass /predict inference latency.')
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    model = joblib.load(os.path.join(BACKEND_DIR, 'aquasense_classifier.pkl'))
+    engine = InferenceEngine(model)
+
+    legacy_label, legacy_proba = legacy_predict(model, SAMPLE)
+    label, proba = engine.predict_one(SAMPLE)
+    assert legacy_label == label and np.allclose(legacy_proba, proba, atol=1e-6), "engine disagrees with the pipeline"
+
+    print(f"{'path':<28}{'p50 (µs)':>12}{'p99 (µs)':>12}{'mean (µs)':>12}")
+    for name, fn in [('before: DataFrame x2 calls', lambda: legacy_predict(model, SAMPLE)),
+                     ('after: InferenceEngine', lambda: engine.predict_one(SAMPLE))]:
+        t = measure(fn, args.iterations)
+        print(f"{name:<28}{np.percentile(t, 50):>12.1f}{np.percentile(t, 99):>12.1f}{t.mean():>12.1f}")
+
+
+if __name__ == '__main__':
+    main()
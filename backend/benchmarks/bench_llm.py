@@ -0,0 +1,95 @@
+# backend/benchmarks/bench_llm.py - THE LLM GATEWAY UNDER A SLOW, FAILING OR DEAD UPSTREAM
+#
+# Usage (from the backend directory):  python benchmarks/bench_llm.py [--callers 32] [--calls 4] [--latency-ms 800]
+# Starts benchmarks/llm_stub.py in-process and points the Gemini SDK at it (REST transport), then
+# runs a burst of concurrent advisory calls per scenario - healthy, 30% errors, 20% hangs and a
+# full outage - once straight at the model and once through an LLMGateway. Reports how long
+# callers were held, how many got an answer, a fallback or an error, how many calls reached
+# the stub at once and how many TCP connections it saw. Requires google-generativeai.
+
+import argparse
+import os
+import statistics
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from llm_gateway import CircuitBreaker, LLMGateway, LLMUnavailable  # noqa: E402
+from llm_stub import start_stub  # noqa: E402
+from startup import LazyGenerativeModel  # noqa: E402
+
+PROMPT = "Act as a public health expert in Haiti. Analyze this water sample data: pH 6.8, Turbidity 2.8 NTU."
+SCENARIOS = [('healthy', {}), ('30% errors', {'error_rate': 0.3}), ('20% hangs', {'hang_rate': 0.2}),
+             ('outage', {'error_rate': 1.0})]
+
+
+def run(generate, callers, calls):
+    """Per-call (seconds, outcome) for `callers` threads making `calls` calls of generate(PROMPT) each."""
+    results, lock = [], threading.Lock()
+
+    def caller():
+        for _ in range(calls):
+            started = time.perf_counter()
+            try:
+                generate(PROMPT).text
+                outcome = 'ok'
+            except LLMUnavailable:
+                outcome = 'fallback'
+            except Exception:
+                outcome = 'error'
+            with lock:
+                results.append((time.perf_counter() - started, outcome))
+
+    threads = [threading.Thread(target=caller) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--callers', type=int, default=32, help="Concurrent callers (request threads).")
+    parser.add_argument('--calls', type=int, default=4, help="Calls per caller.")
+    parser.add_argument('--latency-ms', type=float, default=800)
+    parser.add_argument('--timeout', type=float, default=5.0, help="Per-call deadline, seconds.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Gateway slots.")
+    args = parser.parse_args()
+
+    server, url = start_stub(latency_ms=args.latency_ms, jitter_ms=args.latency_ms / 4)
+    stub = server.stub
+    raw = LazyGenerativeModel('gemini-2.0-flash', 'stub', endpoint=url)
+    raw.warm_up()
+    print(f"🧪 Stub on {url}: {args.latency_ms:g} ms latency, {args.callers} callers x {args.calls} calls, "
+          f"{args.timeout:g} s deadline, gateway with {args.concurrency} slots\n")
+    print(f"   {'scenario':<12} {'client':<8} {'wall s':>7} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'ok':>5} {'fallbk':>6} {'error':>5} {'upstream':>8} {'peak':>5} {'conns':>5}")
+    for name, settings in SCENARIOS:
+        for label in ('direct', 'gateway'):
+            gateway = LLMGateway(max_concurrency=args.concurrency, timeout=args.timeout, queue_seconds=2.0,
+                                 breaker=CircuitBreaker(failure_threshold=5, reset_seconds=30))
+            if label == 'direct':  # the SDK's own timeout, no limit on concurrent calls
+                generate = lambda prompt: raw.generate_content(prompt, request_options={'timeout': args.timeout})  # noqa: E731
+            else:
+                generate = gateway.wrap(raw).generate_content
+            stub.configure(**dict({'error_rate': 0.0, 'hang_rate': 0.0}, **settings))
+            stub.reset()
+            started = time.perf_counter()
+            results = run(generate, args.callers, args.calls)
+            wall = time.perf_counter() - started
+            times = sorted(seconds * 1000 for seconds, _ in results)
+            outcomes = [outcome for _, outcome in results]
+            stats = stub.stats()
+            print(f"   {name:<12} {label:<8} {wall:7.2f} {statistics.median(times):8.0f} "
+                  f"{times[int(len(times) * 0.99) - 1]:8.0f} {times[-1]:8.0f} {outcomes.count('ok'):5d} "
+                  f"{outcomes.count('fallback'):6d} {outcomes.count('error'):5d} {stats['requests']:8d} "
+                  f"{stats['max_in_flight']:5d} {stats['connections']:5d}")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
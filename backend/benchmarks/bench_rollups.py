@@ -0,0 +1,67 @@
+# backend/benchmarks/bench_rollups.py - DASHBOARD SUMMARY FROM ROLLUPS VS. SCANNING test_results
+#
+# Usage (from the backend directory):  python benchmarks/bench_rollups.py [--tests 100000 1000000]
+# Loads N test results spread over a year, then times a 30-day and a 365-day community summary
+# read from the rollup table against the same aggregation over the raw rows.
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from store import WaterStore  # noqa: E402
+
+REGIONS = ['Ouest', 'Artibonite', 'Nord', 'Sud-Est', 'Grand-Anse']
+SQL_RAW_SUMMARY = """
+    SELECT date(recorded_at, 'unixepoch') AS period, COALESCE(region, 'Unknown') AS region, COUNT(*),
+           COUNT(Sulfate), AVG(Sulfate), MIN(Sulfate), MAX(Sulfate), SUM(prediction = 'Not Potable')
+    FROM test_results WHERE recorded_at >= ? AND recorded_at < ?
+    GROUP BY 1, 2 ORDER BY 1, 2
+"""
+
+
+def load(store, n_tests, now, batch=10000):
+    rng = random.Random(0)
+    started = time.perf_counter()
+    for offset in range(0, n_tests, batch):
+        store.record_tests([{'recorded_at': now - rng.uniform(0, 365 * 86400), 'region': rng.choice(REGIONS),
+                             'Sulfate': rng.uniform(250, 450), 'prediction': rng.choice(['Potable', 'Not Potable'])}
+                            for _ in range(min(batch, n_tests - offset))])
+    return time.perf_counter() - started
+
+
+def best_of(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tests', type=int, nargs='+', default=[100000, 1000000])
+    args = parser.parse_args()
+
+    for n_tests in args.tests:
+        with tempfile.TemporaryDirectory() as tmp:
+            store = WaterStore(os.path.join(tmp, 'bench.db'))
+            now = time.time()
+            load_s = load(store, n_tests, now)
+            print(f"{n_tests:>9,} tests loaded in {load_s:.1f}s ({n_tests / load_s:,.0f} rows/s incl. rollups)")
+            for days in (30, 365):
+                start_ts = now - days * 86400
+                start_day = time.strftime('%Y-%m-%d', time.gmtime(start_ts))
+                end_day = time.strftime('%Y-%m-%d', time.gmtime(now))
+                rollup_ms = best_of(lambda: store.summarize_tests(start_day, end_day))
+                raw_ms = best_of(lambda: store.read().execute(SQL_RAW_SUMMARY, (start_ts, now + 1)).fetchall())
+                print(f"   {days:>3}-day summary: rollups {rollup_ms:8.2f} ms | raw scan {raw_ms:8.2f} ms "
+                      f"| {raw_ms / rollup_ms:6.1f}x")
+
+
+if __name__ == '__main__':
+    main()
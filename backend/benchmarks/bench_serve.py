@@ -0,0 +1,110 @@
+# backend/benchmarks/bench_serve.py - /predict THROUGHPUT OF serve.py AS WORKERS ARE ADDED
+#
+# Usage (from the backend directory):  python benchmarks/bench_serve.py [--workers 1 2 4] [--seconds 5]
+# Starts serve.py on a scratch database for each worker count, drives POST /predict from
+# several client processes over keep-alive connections, and reports requests/s and latency.
+# Gemini is disabled for the run so only the model and storage paths are measured. The load
+# generator shares the machine, so leave it some cores when reading the scaling numbers.
+
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = {"ph": 7.0, "Hardness": 195.0, "Solids": 20000.0, "Chloramines": 7.0, "Sulfate": 330.0, "Conductivity": 420.0,
+          "Organic_carbon": 14.0, "Trihalomethanes": 65.0, "Turbidity": 4.0}
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=5)
+            conn.request('GET', '/readyz')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"serve.py did not come up on port {port}")
+
+
+def client(port, connections, seconds, results):
+    """One load-generator process: `connections` keep-alive connections driven round-robin."""
+    body = json.dumps(SAMPLE)
+    headers = {'Content-Type': 'application/json'}
+    conns = [http.client.HTTPConnection('127.0.0.1', port, timeout=30) for _ in range(connections)]
+    latencies, errors = [], 0
+    stop = time.perf_counter() + seconds
+    while time.perf_counter() < stop:
+        for conn in conns:
+            started = time.perf_counter()
+            try:
+                conn.request('POST', '/predict', body, headers)
+                response = conn.getresponse()
+                response.read()
+                if response.status != 200:
+                    errors += 1
+            except (OSError, http.client.HTTPException):
+                errors += 1
+                conn.close()
+                continue
+            latencies.append(time.perf_counter() - started)
+    results.put((latencies, errors))
+
+
+def load(port, clients, connections, seconds):
+    results = multiprocessing.Queue()
+    procs = [multiprocessing.Process(target=client, args=(port, connections, seconds, results)) for _ in range(clients)]
+    for p in procs:
+        p.start()
+    collected = [results.get() for _ in procs]
+    for p in procs:
+        p.join()
+    latencies = np.concatenate([np.array(l) for l, _ in collected]) * 1000
+    return len(latencies) / seconds, np.percentile(latencies, 50), np.percentile(latencies, 99), sum(e for _, e in collected)
+
+
+def main():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, nargs='+', default=sorted({1, max(1, cpus // 2), cpus}))
+    parser.add_argument('--clients', type=int, default=max(1, cpus // 2), help="Load-generator processes.")
+    parser.add_argument('--connections', type=int, default=4, help="Keep-alive connections per client.")
+    parser.add_argument('--seconds', type=float, default=5)
+    args = parser.parse_args()
+
+    print(f"{cpus} CPUs, {args.clients} client processes x {args.connections} connections")
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            port = free_port()
+            env = dict(os.environ, AQUALERT_DB=os.path.join(tmp, 'bench.db'), GEMINI_API_KEY='YOUR_API_KEY_HERE')
+            server = subprocess.Popen([sys.executable, 'serve.py', '--workers', str(workers), '--port', str(port)],
+                                      cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                wait_for_port(port)
+                load(port, args.clients, args.connections, 1)   # warm up every worker
+                rps, p50, p99, errors = load(port, args.clients, args.connections, args.seconds)
+                print(f"{workers:>3} workers | {rps:8,.0f} req/s | p50 {p50:7.2f} ms | p99 {p99:7.2f} ms | errors {errors}")
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait(timeout=30)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# backend/benchmarks/bench_store.py - WaterStore READ/WRITE THROUGHPUT UNDER CONCURRENCY
+#
+# Usage (from the backend directory):  python benchmarks/bench_store.py [--threads 1 4 8] [--seconds 3]
+# Each thread mixes map reads (list_points) with single test-result writes; a separate pass
+# measures batched writes (record_tests with executemany), and a last one times list_points as
+# the test history grows (it should stay flat: only each point's latest readings are read).
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from store import WaterStore  # noqa: E402
+
+SAMPLE = {"ph": 7.0, "Hardness": 195.0, "Solids": 20000.0, "Chloramines": 7.0, "Sulfate": 330.0, "Conductivity": 420.0,
+          "Organic_carbon": 14.0, "Trihalomethanes": 65.0, "Turbidity": 4.0, "prediction": "Not Potable", "potable_confidence": 0.3}
+
+
+def seeded_store(path, n_points):
+    store = WaterStore(path)
+    rng = random.Random(0)
+    store.seed([{"id": i, "name": f"Point {i}", "lat": rng.uniform(18.0, 20.1), "lon": rng.uniform(-74.5, -71.6),
+                 "status": "Potable", "verified": False, "region": "Ouest",
+                 "history": {"Sulfate": [330, 331, 332, 333], "Turbidity": [3.0, 3.1, 3.2, 3.3]}}
+                for i in range(1, n_points + 1)])
+    return store
+
+
+def run_mixed(store, n_threads, seconds, read_ratio, n_points):
+    counts = {'reads': 0, 'writes': 0}
+    lock = threading.Lock()
+    stop = time.perf_counter() + seconds
+
+    def worker(seed):
+        rng = random.Random(seed)
+        reads = writes = 0
+        while time.perf_counter() < stop:
+            if rng.random() < read_ratio:
+                store.list_points()
+                reads += 1
+            else:
+                store.record_test(dict(SAMPLE, point_id=rng.randint(1, n_points), recorded_at=time.time()))
+                writes += 1
+        with lock:
+            counts['reads'] += reads
+            counts['writes'] += writes
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n_threads)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return counts['reads'] / seconds, counts['writes'] / seconds
+
+
+def time_reads_by_history(store, n_points, totals, repeats=10):
+    """[(test results stored, ms per list_points())], growing the history to each of `totals` in turn."""
+    out = []
+    for total in totals:
+        stored = store.read().execute("SELECT COUNT(*) FROM test_results").fetchone()[0]
+        now = time.time()
+        rows = [dict(SAMPLE, point_id=(i % n_points) + 1, recorded_at=now + i * 1e-3) for i in range(total - stored)]
+        for i in range(0, len(rows), 1000):
+            store.record_tests(rows[i:i + 1000])
+        start = time.perf_counter()
+        for _ in range(repeats):
+            store.list_points()
+        out.append((max(total, stored), (time.perf_counter() - start) / repeats * 1000))
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure WaterStore throughput with concurrent readers and writers.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--seconds', type=float, default=3.0)
+    parser.add_argument('--points', type=int, default=200)
+    parser.add_argument('--read-ratio', type=float, default=0.8)
+    parser.add_argument('--history', type=int, nargs='+', default=[1_000, 10_000, 100_000],
+                        help="Test-result counts at which to time list_points().")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = seeded_store(os.path.join(tmp, 'bench.db'), args.points)
+        print(f"{'threads':>8}{'reads/s':>12}{'writes/s':>12}")
+        for n in args.threads:
+            reads, writes = run_mixed(store, n, args.seconds, args.read_ratio, args.points)
+            print(f"{n:>8}{reads:>12.0f}{writes:>12.0f}")
+
+        rows = [dict(SAMPLE, point_id=(i % args.points) + 1, recorded_at=time.time()) for i in range(10_000)]
+        start = time.perf_counter()
+        for i in range(0, len(rows), 500):
+            store.record_tests(rows[i:i + 500])
+        print(f"batched writes (500/transaction): {len(rows) / (time.perf_counter() - start):.0f} rows/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = seeded_store(os.path.join(tmp, 'history.db'), args.points)
+        print(f"\n{'tests':>8}{'list_points ms':>16}")
+        for total, ms in time_reads_by_history(store, args.points, args.history):
+            print(f"{total:>8}{ms:>16.2f}")
+
+
+if __name__ == '__main__':
+    main()
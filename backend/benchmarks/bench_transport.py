@@ -0,0 +1,86 @@
+# backend/benchmarks/bench_transport.py - JSON VS. ARROW / PARQUET FOR TABULAR RESPONSES
+#
+# Usage (from the backend directory):  python benchmarks/bench_transport.py [--rows 10000 1000000]
+# Encodes N test-result rows the way the export endpoint does, then decodes them into a DataFrame
+# the way the dashboard does: pd.read_json(StringIO(...)) + pd.to_datetime for JSON, and
+# Table.to_pandas(split_blocks=True, self_destruct=True) for the Arrow stream.
+# Requires pyarrow. Uses a 7-column slice of the export so 1M JSON rows fit in memory.
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timezone
+from io import StringIO
+
+import pandas as pd
+import pyarrow as pa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import columnar  # noqa: E402
+
+COLUMNS = [('id', 'int'), ('recorded_at', 'timestamp'), ('region', 'text'), ('prediction', 'text'),
+           ('ph', 'float'), ('Sulfate', 'float'), ('Turbidity', 'float')]
+REGIONS = ['Ouest', 'Artibonite', 'Nord', 'Sud-Est', 'Grand-Anse']
+
+
+def make_rows(n):
+    rng = random.Random(0)
+    now = time.time()
+    return [(i, now - rng.uniform(0, 365 * 86400), rng.choice(REGIONS), rng.choice(['Potable', 'Not Potable']),
+             rng.uniform(6, 9), rng.uniform(250, 450), rng.uniform(1, 7)) for i in range(n)]
+
+
+def encode_json(rows):
+    names = [name for name, _ in COLUMNS]
+    records = []
+    for row in rows:
+        record = dict(zip(names, row))
+        record['recorded_at'] = datetime.fromtimestamp(record['recorded_at'], timezone.utc).isoformat()
+        records.append(json.dumps(record))
+    return ('[' + ','.join(records) + ']').encode()
+
+
+def decode_json(body):
+    df = pd.read_json(StringIO(body.decode()))
+    df['recorded_at'] = pd.to_datetime(df['recorded_at'], utc=True, format='ISO8601')
+    return df
+
+
+def decode_arrow(body):
+    return pa.ipc.open_stream(body).read_all().to_pandas(split_blocks=True, self_destruct=True)
+
+
+def measure(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 1000000])
+    args = parser.parse_args()
+    schema = columnar.schema_for(COLUMNS)
+
+    for n in args.rows:
+        rows = make_rows(n)
+        print(f"{n:>9,} rows")
+        body, enc_s = measure(encode_json, rows)
+        df, dec_s = measure(decode_json, body)
+        print(f"   json     {len(body) / 2 ** 20:8.1f} MiB | encode {enc_s * 1000:8.1f} ms | decode {dec_s * 1000:8.1f} ms")
+        del body, df
+
+        body, enc_s = measure(lambda r: b''.join(columnar.arrow_stream(r, schema)), rows)
+        df, dec_s = measure(decode_arrow, body)
+        print(f"   arrow    {len(body) / 2 ** 20:8.1f} MiB | encode {enc_s * 1000:8.1f} ms | decode {dec_s * 1000:8.1f} ms")
+        del body, df
+
+        body, enc_s = measure(columnar.parquet_bytes, rows, schema)
+        print(f"   parquet  {len(body) / 2 ** 20:8.1f} MiB | encode {enc_s * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+# backend/benchmarks/llm_stub.py - LOCAL STAND-IN FOR THE GEMINI API, WITH CONFIGURABLE LATENCY AND ERRORS
+#
+# Usage (from the backend directory):
+#   python benchmarks/llm_stub.py [--port 8089] [--latency-ms 800] [--jitter-ms 200] [--error-rate 0.1]
+#                                 [--error-status 503] [--hang-rate 0] [--chunk-ms 40]
+# then run the server against it, with any API key:
+#   AQUALERT_LLM_ENDPOINT=http://127.0.0.1:8089 GEMINI_API_KEY=stub python app.py
+#
+# Answers generateContent calls (the REST API the Gemini SDK uses) after the configured delay,
+# fails a share of them with the configured status, and can hang some of them to exercise
+# deadlines. streamGenerateContent sends the same answer in chunks, `chunk-ms` apart, as a JSON
+# array (or as Server-Sent Events with ?alt=sse). GET /stats reports requests, errors and how many TCP connections were opened (so
+# connection reuse can be checked); POST /config with JSON, e.g. {"error_rate": 1.0}, changes the
+# behaviour while it runs.
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+GENERATE_PATH = re.compile(r'^/v1beta/models/(?P<model>[^/:]+):(?P<method>generateContent|streamGenerateContent)')
+ERROR_STATUS_NAMES = {429: 'RESOURCE_EXHAUSTED', 500: 'INTERNAL', 503: 'UNAVAILABLE', 504: 'DEADLINE_EXCEEDED'}
+
+
+class StubLLM:
+    """Behaviour and counters shared by every connection of one stub server."""
+
+    def __init__(self, latency_ms=800, jitter_ms=200, error_rate=0.0, error_status=503, hang_rate=0.0, chunk_ms=40):
+        self.latency_ms = latency_ms
+        self.chunk_ms = chunk_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.hang_rate = hang_rate
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.errors = self.hangs = self.connections = self.in_flight = self.max_in_flight = 0
+
+    def configure(self, **settings):
+        for name, value in settings.items():
+            if name not in ('latency_ms', 'jitter_ms', 'error_rate', 'error_status', 'hang_rate', 'chunk_ms'):
+                raise ValueError(f"Unknown stub setting {name}.")
+            setattr(self, name, value)
+
+    def count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+    def stats(self):
+        with self._lock:
+            return {'requests': self.requests, 'errors': self.errors, 'hangs': self.hangs,
+                    'connections': self.connections, 'in_flight': self.in_flight,
+                    'max_in_flight': self.max_in_flight, 'latency_ms': self.latency_ms,
+                    'error_rate': self.error_rate, 'hang_rate': self.hang_rate, 'chunk_ms': self.chunk_ms}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive, so clients can reuse connections
+
+    def setup(self):
+        super().setup()
+        self.server.stub.count(connections=1)  # one handler instance per TCP connection
+
+    def log_message(self, *args):
+        pass
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    @staticmethod
+    def _response(text, prompt_chars, finish_reason='STOP'):
+        response = {'candidates': [{'content': {'parts': [{'text': text}], 'role': 'model'}, 'index': 0}],
+                    'usageMetadata': {'promptTokenCount': prompt_chars // 4, 'candidatesTokenCount': len(text) // 4,
+                                      'totalTokenCount': (prompt_chars + len(text)) // 4}}
+        if finish_reason:
+            response['candidates'][0]['finishReason'] = finish_reason
+        return response
+
+    def _send_stream(self, answer, prompt_chars, sse=False):
+        """Sends `answer` a few words at a time, chunked-encoded, as SSE events or one JSON array."""
+        words = answer.split(' ')
+        pieces = [' '.join(words[i:i + 4]) + (' ' if i + 4 < len(words) else '') for i in range(0, len(words), 4)]
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream' if sse else 'application/json')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        for i, piece in enumerate(pieces):
+            last = i == len(pieces) - 1
+            body = json.dumps(self._response(piece, prompt_chars, 'STOP' if last else None))
+            data = f"data: {body}\r\n\r\n" if sse else ('[' if i == 0 else ',\r\n') + body + (']' if last else '')
+            data = data.encode('utf-8')
+            self.wfile.write(b'%x\r\n%s\r\n' % (len(data), data))
+            self.wfile.flush()
+            if not last:
+                time.sleep(self.server.stub.chunk_ms / 1000)
+        self.wfile.write(b'0\r\n\r\n')
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        return json.loads(self.rfile.read(length) or b'{}')
+
+    def do_GET(self):
+        if self.path == '/stats':
+            return self._send_json(200, self.server.stub.stats())
+        self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+
+    def do_POST(self):
+        stub = self.server.stub
+        if self.path == '/config':
+            try:
+                stub.configure(**self._read_json())
+            except (ValueError, TypeError) as e:
+                return self._send_json(400, {'error': str(e)})
+            return self._send_json(200, stub.stats())
+        match = GENERATE_PATH.match(self.path)
+        if not match:
+            return self._send_json(404, {'error': {'code': 404, 'message': 'Not found', 'status': 'NOT_FOUND'}})
+        request = self._read_json()
+        stub.count(requests=1, in_flight=1)
+        try:
+            if random.random() < stub.hang_rate:
+                stub.count(hangs=1)
+                time.sleep(3600)  # the client's deadline has to end this
+            time.sleep(max(0.0, random.gauss(stub.latency_ms, stub.jitter_ms / 2)) / 1000)
+            if random.random() < stub.error_rate:
+                stub.count(errors=1)
+                status = stub.error_status
+                return self._send_json(status, {'error': {'code': status, 'message': 'Stub failure',
+                                                          'status': ERROR_STATUS_NAMES.get(status, 'UNKNOWN')}})
+            parts = request.get('contents', [{}])[-1].get('parts', [])
+            text_chars = sum(len(p.get('text', '')) for p in parts)
+            images = sum(1 for p in parts if 'inlineData' in p or 'inline_data' in p)
+            answer = (f"### Simple Summary:\nStub answer from {match.group('model')} for a {text_chars}-character "
+                      f"prompt with {images} image(s).\n\n### Recommended Actions (How to Control & Prevent):\n"
+                      "- Boil or chlorinate before drinking.\n\n### Important Note:\nThis answer comes from the local stub.")
+            if match.group('method') == 'streamGenerateContent':
+                return self._send_stream(answer, text_chars, sse='alt=sse' in self.path)
+            self._send_json(200, self._response(answer, text_chars))
+        finally:
+            stub.count(in_flight=-1)
+
+
+def start_stub(port=0, **settings):
+    """Starts a stub server on a background thread. Returns (server, base_url); server.stub is its StubLLM."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.daemon_threads = True
+    server.stub = StubLLM(**settings)
+    threading.Thread(target=server.serve_forever, name='llm-stub', daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=800)
+    parser.add_argument('--jitter-ms', type=float, default=200)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Share of calls that fail, 0-1.")
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--hang-rate', type=float, default=0.0, help="Share of calls that never answer, 0-1.")
+    parser.add_argument('--chunk-ms', type=float, default=40, help="Pause between the chunks of a streamed answer.")
+    args = parser.parse_args()
+    server, url = start_stub(args.port, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                             error_rate=args.error_rate, error_status=args.error_status, hang_rate=args.hang_rate,
+                             chunk_ms=args.chunk_ms)
+    print(f"🧪 Stub Gemini API on {url} (latency {args.latency_ms:g}±{args.jitter_ms:g} ms, "
+          f"errors {args.error_rate:.0%} HTTP {args.error_status}, hangs {args.hang_rate:.0%}). Ctrl+C to stop.")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
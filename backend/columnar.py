@@ -0,0 +1,98 @@
+# backend/columnar.py - ARROW / PARQUET ENCODING FOR TABULAR RESPONSES
+
+import importlib.util
+import io
+import json
+
+# pyarrow is optional (pip install pyarrow) and takes ~0.2 s to import, so it is only loaded by
+# the first request that asks for a columnar format (see _load_pyarrow()).
+pa = pc = pq = None
+COLUMN_TYPES = {}
+AVAILABLE = importlib.util.find_spec('pyarrow') is not None
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+PARQUET = 'application/vnd.apache.parquet'
+JSON = 'application/json'
+# ?format= overrides for clients (and browser links) that can't set an Accept header.
+FORMATS = {'json': JSON, 'arrow': ARROW_STREAM, 'parquet': PARQUET}
+# SQLite rows are converted to Arrow this many at a time, so memory stays flat on big exports.
+BATCH_ROWS = 65536
+
+def _load_pyarrow():
+    """Imports pyarrow on first use and fills in COLUMN_TYPES. False if it isn't installed."""
+    global pa, pc, pq, AVAILABLE
+    if pa is None and AVAILABLE:
+        try:
+            import pyarrow
+            import pyarrow.compute
+            import pyarrow.parquet
+        except ImportError:
+            AVAILABLE = False
+            return False
+        # Arrow types for the column kinds tabular endpoints return. 'timestamp' columns hold unix seconds.
+        COLUMN_TYPES.update({'int': pyarrow.int64(), 'float': pyarrow.float64(), 'text': pyarrow.string(),
+                             'date': pyarrow.timestamp('s'), 'timestamp': pyarrow.timestamp('ms', tz='UTC')})
+        pc, pq, pa = pyarrow.compute, pyarrow.parquet, pyarrow
+    return AVAILABLE
+
+
+def negotiate(request):
+    """Picks JSON, Arrow stream or Parquet from ?format= or the Accept header. JSON without pyarrow."""
+    fmt = FORMATS.get(request.args.get('format', '').lower()) or \
+        request.accept_mimetypes.best_match([JSON, ARROW_STREAM, PARQUET], default=JSON)
+    return fmt if fmt == JSON or _load_pyarrow() else JSON
+
+
+def schema_for(columns, metadata=None):
+    """An Arrow schema from [(name, kind)] pairs; `metadata` is stored as JSON under b'aqualert'."""
+    _load_pyarrow()
+    fields = [pa.field(name, COLUMN_TYPES[kind]) for name, kind in columns]
+    return pa.schema(fields, metadata={b'aqualert': json.dumps(metadata).encode()} if metadata else None)
+
+
+def _to_array(values, arrow_type):
+    if arrow_type == COLUMN_TYPES['date']:
+        import numpy as np  # pyarrow needs numpy anyway, so it is loaded by then
+        return pa.array(np.array(values, dtype='datetime64[s]'), type=arrow_type)
+    if arrow_type == COLUMN_TYPES['timestamp']:
+        millis = pc.multiply(pa.array(values, type=pa.float64()), 1000)
+        return millis.cast(pa.int64(), safe=False).cast(arrow_type)
+    return pa.array(values, type=arrow_type)
+
+
+def record_batches(rows, schema, batch_rows=BATCH_ROWS):
+    """Turns an iterable of row tuples (e.g. a sqlite3 cursor) into Arrow record batches."""
+    rows = iter(rows)
+    while True:
+        chunk = [row for _, row in zip(range(batch_rows), rows)]
+        if not chunk:
+            return
+        columns = list(zip(*chunk))
+        yield pa.RecordBatch.from_arrays([_to_array(col, field.type) for col, field in zip(columns, schema)],
+                                         schema=schema)
+
+
+def arrow_stream(rows, schema):
+    """Yields an Arrow IPC stream chunk by chunk, one record batch at a time."""
+    sink = io.BytesIO()
+    with pa.ipc.new_stream(sink, schema) as writer:
+        for batch in record_batches(rows, schema):
+            writer.write_batch(batch)
+            yield _drain(sink)
+    yield _drain(sink)
+
+
+def parquet_bytes(rows, schema):
+    """A complete Parquet file (Parquet needs its footer, so it can't be streamed like Arrow)."""
+    sink = io.BytesIO()
+    with pq.ParquetWriter(sink, schema, compression='zstd') as writer:
+        for batch in record_batches(rows, schema):
+            writer.write_batch(batch)
+    return sink.getvalue()
+
+
+def _drain(sink):
+    data = sink.getvalue()
+    sink.seek(0)
+    sink.truncate()
+    return data
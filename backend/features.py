@@ -0,0 +1,5 @@
+# backend/features.py - THE WATER-QUALITY PARAMETERS, SHARED BY THE STORE AND THE INFERENCE ENGINE
+
+# Column order used when the model does not record its own feature names. Kept out of inference.py
+# so the store can use it without importing numpy at startup.
+DEFAULT_FEATURES = ['ph', 'Hardness', 'Solids', 'Chloramines', 'Sulfate', 'Conductivity', 'Organic_carbon', 'Trihalomethanes', 'Turbidity']
@@ -0,0 +1,99 @@
+# backend/geo.py - GREAT-CIRCLE DISTANCES AND SPATIAL INDEX FOR WATER POINTS
+
+import threading
+from math import radians, cos, sin, asin, sqrt
+
+EARTH_RADIUS_KM = 6371
+KM_PER_DEGREE_LAT = 111.195
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    """Scalar great-circle distance (km). Hot paths use haversine_many/distance_matrix instead."""
+    lon1, lat1, lon2, lat2 = map(radians, [lon1, lat1, lon2, lat2])
+    dlon, dlat = lon2 - lon1, lat2 - lat1
+    a = sin(dlat/2)**2 + cos(lat1) * cos(lat2) * sin(dlon/2)**2
+    return 2 * asin(sqrt(a)) * EARTH_RADIUS_KM
+
+
+def haversine_many(lon, lat, lons, lats):
+    """One-to-many great-circle distances (km) from (lon, lat) to coordinate arrays."""
+    import numpy as np  # only once the index is queried, not when app.py is imported
+    lon, lat = np.radians(lon), np.radians(lat)
+    lons, lats = np.radians(np.asarray(lons, dtype=np.float64)), np.radians(np.asarray(lats, dtype=np.float64))
+    a = np.sin((lats - lat) / 2)**2 + np.cos(lat) * np.cos(lats) * np.sin((lons - lon) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def distance_matrix(lons1, lats1, lons2, lats2):
+    """Many-to-many great-circle distances (km) as a (len(lons1), len(lons2)) matrix."""
+    import numpy as np
+    lons1, lats1 = np.radians(np.asarray(lons1, dtype=np.float64))[:, None], np.radians(np.asarray(lats1, dtype=np.float64))[:, None]
+    lons2, lats2 = np.radians(np.asarray(lons2, dtype=np.float64))[None, :], np.radians(np.asarray(lats2, dtype=np.float64))[None, :]
+    a = np.sin((lats2 - lats1) / 2)**2 + np.cos(lats1) * np.cos(lats2) * np.sin((lons2 - lons1) / 2)**2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid (geohash-style buckets) over water points.
+
+    A radius query only visits the cells overlapping the query's bounding box, so the cost is
+    proportional to the points nearby rather than to the size of the registry. Points can be
+    added, moved and removed one at a time.
+    """
+
+    def __init__(self, cell_degrees=0.05):
+        self.cell = cell_degrees
+        self._cells = {}      # (row, col) -> {point_id: (lat, lon)}
+        self._where = {}      # point_id -> (row, col)
+        self._lock = threading.Lock()
+
+    def _key(self, lat, lon):
+        return int(lat // self.cell), int(lon // self.cell)
+
+    def __len__(self):
+        return len(self._where)
+
+    def upsert(self, point_id, lat, lon):
+        """Adds a point, or moves it if it is already indexed."""
+        key = self._key(lat, lon)
+        with self._lock:
+            old = self._where.get(point_id)
+            if old is not None and old != key:
+                self._discard(point_id, old)
+            self._cells.setdefault(key, {})[point_id] = (lat, lon)
+            self._where[point_id] = key
+
+    def remove(self, point_id):
+        with self._lock:
+            key = self._where.pop(point_id, None)
+            if key is not None:
+                self._discard(point_id, key)
+
+    def _discard(self, point_id, key):
+        bucket = self._cells.get(key)
+        if bucket is not None:
+            bucket.pop(point_id, None)
+            if not bucket:
+                del self._cells[key]
+
+    def within(self, lat, lon, radius_km):
+        """Returns [(point_id, distance_km)] within `radius_km` of (lat, lon), nearest first."""
+        dlat = radius_km / KM_PER_DEGREE_LAT
+        dlon = radius_km / (KM_PER_DEGREE_LAT * max(cos(radians(lat)), 1e-6))
+        row0, col0 = self._key(lat - dlat, lon - dlon)
+        row1, col1 = self._key(lat + dlat, lon + dlon)
+
+        ids, lats, lons = [], [], []
+        with self._lock:
+            for row in range(row0, row1 + 1):
+                for col in range(col0, col1 + 1):
+                    for point_id, (plat, plon) in self._cells.get((row, col), {}).items():
+                        ids.append(point_id)
+                        lats.append(plat)
+                        lons.append(plon)
+        if not ids:
+            return []
+        dists = haversine_many(lon, lat, lons, lats)
+        order = dists.argsort(kind='stable')
+        return [(ids[i], float(dists[i])) for i in order if dists[i] < radius_km]
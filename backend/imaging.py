@@ -0,0 +1,194 @@
+# backend/imaging.py - IMAGE NORMALIZATION BEFORE THE VISION MODEL
+
+import io
+import multiprocessing
+import os
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+try:
+    from PIL import Image, ImageOps  # optional: pip install Pillow
+except ImportError:
+    Image = ImageOps = None
+
+# Magic numbers of the formats phones and browsers produce, for when Pillow isn't installed
+# or can't decode the file.
+SIGNATURES = [
+    (b'\xff\xd8\xff', 'image/jpeg'),
+    (b'\x89PNG\r\n\x1a\n', 'image/png'),
+    (b'GIF87a', 'image/gif'),
+    (b'GIF89a', 'image/gif'),
+    (b'BM', 'image/bmp'),
+    (b'II*\x00', 'image/tiff'),
+    (b'MM\x00*', 'image/tiff'),
+]
+HEIF_BRANDS = {b'heic': 'image/heic', b'heix': 'image/heic', b'mif1': 'image/heif', b'msf1': 'image/heif'}
+# What the Gemini vision model accepts as-is.
+VISION_MIME_TYPES = {'image/jpeg', 'image/png', 'image/webp', 'image/heic', 'image/heif'}
+# Formats Pillow can't decode without a plugin; they go to the model untouched.
+PASSTHROUGH_MIME_TYPES = {'image/heic', 'image/heif'}
+OUTPUT_FORMATS = {'jpeg': ('JPEG', 'image/jpeg'), 'webp': ('WEBP', 'image/webp')}
+
+
+def sniff_mime(data):
+    """The image type from the file's first bytes, or None if it isn't a format we know."""
+    if data[:4] == b'RIFF' and data[8:12] == b'WEBP':
+        return 'image/webp'
+    if data[4:8] == b'ftyp' and data[8:12] in HEIF_BRANDS:
+        return HEIF_BRANDS[data[8:12]]
+    for signature, mime_type in SIGNATURES:
+        if data.startswith(signature):
+            return mime_type
+    return None
+
+
+def normalize_image(data, max_edge=1024, output='jpeg', quality=85, prescreen=False):
+    """
+    Decodes an upload, applies its EXIF orientation, shrinks it to fit `max_edge` and re-encodes
+    it as JPEG or WebP. Returns (bytes, mime_type, info). The original is kept when it is
+    already upright, small enough and in a format the model takes, and re-encoding wouldn't
+    shrink it. With `prescreen`, info['prescreen'] holds the local visual screen of the decoded
+    image (see prescreen.py), or None if it couldn't be screened. Runs in a worker process (see
+    ImageNormalizer), so it must stay picklable.
+    """
+    sniffed = sniff_mime(data)
+    pil_format, mime_type = OUTPUT_FORMATS[output]
+    try:
+        image = Image.open(io.BytesIO(data))
+        info = {'format': image.format, 'original_size': list(image.size), 'original_bytes': len(data)}
+        # JPEGs can be decoded straight at 1/2, 1/4 or 1/8 scale, which is much faster than
+        # decoding all 12 MP and resizing afterwards.
+        image.draft('RGB', (max_edge, max_edge))
+        upright = image.getexif().get(0x0112, 1) == 1
+        fits = max(image.size) <= max_edge
+        image = ImageOps.exif_transpose(image)
+        if not fits:
+            image.thumbnail((max_edge, max_edge), Image.LANCZOS, reducing_gap=3.0)
+        if image.mode not in ('RGB', 'L') and not (pil_format == 'WEBP' and image.mode == 'RGBA'):
+            rgba = image.convert('RGBA')  # flatten transparency onto white
+            image = Image.new('RGB', rgba.size, (255, 255, 255))
+            image.paste(rgba, mask=rgba.getchannel('A'))
+        out = io.BytesIO()
+        image.save(out, pil_format, quality=quality)
+    except (OSError, ValueError, Image.DecompressionBombError):
+        if sniffed in PASSTHROUGH_MIME_TYPES:
+            info = {'format': sniffed, 'original_bytes': len(data), 'sent_bytes': len(data)}
+            return data, sniffed, dict(info, prescreen=None) if prescreen else info
+        raise ValueError('The upload is not an image we can read (unknown format or corrupt file).')
+
+    encoded = out.getvalue()
+    if upright and fits and sniffed in VISION_MIME_TYPES and len(encoded) >= len(data):
+        encoded, mime_type = data, sniffed
+    info.update(size=list(image.size), sent_bytes=len(encoded))
+    if prescreen:
+        info['prescreen'] = screen_image(image)
+    return encoded, mime_type, info
+
+
+def screen_image(image):
+    """prescreen.screen() of a decoded PIL image, shrunk to SCREEN_EDGE, plus the time it took."""
+    import numpy as np  # only the worker processes need numpy (and prescreen)
+    from prescreen import SCREEN_EDGE, screen
+    started = time.perf_counter()
+    small = image.convert('RGB')
+    small.thumbnail((SCREEN_EDGE, SCREEN_EDGE), Image.BILINEAR)
+    try:
+        result = screen(np.asarray(small))
+    except ValueError:
+        return None
+    result['ms'] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+class ImageWorkerError(RuntimeError):
+    """The image pool couldn't process an upload in time, or a worker died while decoding it."""
+
+
+class ImageNormalizer:
+    """
+    Runs normalize_image() in a small process pool so decoding and resizing a 12 MP photo
+    neither blocks a request thread's GIL nor competes with the model for it. The pool is
+    started on first use in each process (serve.py workers each get their own). Without
+    Pillow, or with max_edge=0, images are passed through with their sniffed MIME type and
+    aren't pre-screened.
+    """
+
+    def __init__(self, max_edge=1024, output='jpeg', quality=85, workers=2, timeout=30, prescreen=True):
+        if output not in OUTPUT_FORMATS:
+            raise ValueError(f"Image output format must be one of {', '.join(OUTPUT_FORMATS)}.")
+        self.max_edge = max_edge
+        self.output = output
+        self.quality = quality
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.prescreen = prescreen
+        self.enabled = Image is not None and max_edge > 0
+        self._pool = None
+        self._pool_pid = None
+        self._lock = threading.Lock()
+        self.processed = self.bytes_in = self.bytes_out = 0
+        self.verdicts = Counter()
+
+    def _executor(self):
+        if self._pool_pid != os.getpid():
+            with self._lock:
+                if self._pool_pid != os.getpid():
+                    # Workers only run Pillow and NumPy, so forking them from the serving process is cheap
+                    # and doesn't re-import app.py the way spawn would.
+                    self._pool = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('fork'))
+                    self._pool_pid = os.getpid()
+        return self._pool
+
+    def normalize(self, data, declared_mime=None):
+        """
+        (bytes, mime_type, info) ready for the vision model, with the pre-screen result in
+        info['prescreen'] when enabled (None if the image wasn't screened). ValueError if it
+        isn't an image, ImageWorkerError if the pool timed out or crashed on it.
+        """
+        if not self.enabled:
+            mime_type = sniff_mime(data) or declared_mime
+            if mime_type not in VISION_MIME_TYPES:
+                raise ValueError(f"Unsupported image type {mime_type or 'unknown'}; install Pillow to convert it.")
+            info = {'format': mime_type, 'original_bytes': len(data), 'sent_bytes': len(data)}
+            return data, mime_type, dict(info, prescreen=None) if self.prescreen else info
+        try:
+            future = self._executor().submit(normalize_image, data, self.max_edge, self.output, self.quality,
+                                             self.prescreen)
+            encoded, mime_type, info = future.result(timeout=self.timeout)
+        except BrokenProcessPool:
+            self._pool_pid = None  # a worker died (e.g. out of memory); start a fresh pool next time
+            raise ImageWorkerError('The image worker crashed while decoding this upload.')
+        except TimeoutError:
+            future.cancel()
+            raise ImageWorkerError(f'Decoding this upload took longer than {self.timeout:g} s.')
+        with self._lock:
+            self.processed += 1
+            self.bytes_in += len(data)
+            self.bytes_out += len(encoded)
+            if info.get('prescreen'):
+                self.verdicts[info['prescreen']['verdict']] += 1
+        return encoded, mime_type, info
+
+    def warm_up(self):
+        """Starts the worker processes and has them decode (and pre-screen) a small image once."""
+        if self.enabled:
+            sample = io.BytesIO()
+            Image.new('RGB', (64, 48), (90, 140, 200)).save(sample, 'PNG')
+            for _ in range(self.workers):
+                self.normalize(sample.getvalue(), 'image/png')
+
+    def close(self):
+        """Shuts the worker processes down, waiting for them, so none is left to fail at interpreter exit."""
+        with self._lock:
+            pool, owned = self._pool, self._pool_pid == os.getpid()
+            self._pool = self._pool_pid = None
+        if pool is not None and owned:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self):
+        return {'enabled': self.enabled, 'max_edge': self.max_edge, 'output': self.output,
+                'processed': self.processed, 'bytes_in': self.bytes_in, 'bytes_out': self.bytes_out,
+                'prescreen': dict(self.verdicts) if self.prescreen else None}
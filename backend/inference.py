@@ -0,0 +1,120 @@
+# backend/inference.py - SINGLE-PASS INFERENCE AROUND THE LIGHTGBM PIPELINE
+
+import threading
+import numpy as np
+
+from features import DEFAULT_FEATURES
+
+
+def resolve_feature_names(model):
+    """Returns the feature order the model was trained with."""
+    for attr in ('feature_names_in_', 'feature_name_'):
+        names = getattr(model, attr, None)
+        if names is not None:
+            return [str(n) for n in names]
+    return list(DEFAULT_FEATURES)
+
+
+def _compile_pipeline(model, feature_names):
+    """
+    Flattens the saved sklearn Pipeline (ColumnTransformer -> imputer/scaler -> LGBMClassifier)
+    into plain numpy arrays plus the LightGBM booster, so a request never touches pandas.
+    Returns None when the pipeline has a shape we don't recognise; the engine then falls back to
+    calling the full model on a DataFrame.
+    """
+    steps = getattr(model, 'steps', None)
+    if not steps or len(steps) != 2:
+        return None
+    preprocessor, classifier = steps[0][1], steps[1][1]
+    booster = getattr(classifier, 'booster_', None)
+    transformers = getattr(preprocessor, 'transformers_', None)
+    if booster is None or transformers is None or len(classifier.classes_) != 2:
+        return None
+
+    # Exactly one numeric branch covering every feature, in order, and nothing passed through.
+    branches = [t for t in transformers if t[0] != 'remainder' or t[1] != 'drop']
+    if len(branches) != 1 or list(branches[0][2]) != feature_names:
+        return None
+
+    fill = np.zeros(len(feature_names))
+    mean = np.zeros(len(feature_names))
+    scale = np.ones(len(feature_names))
+    for _, step in getattr(branches[0][1], 'steps', []):
+        name = type(step).__name__
+        if name == 'SimpleImputer':
+            fill = np.asarray(step.statistics_, dtype=np.float64)
+        elif name == 'StandardScaler':
+            mean = np.asarray(step.mean_ if step.with_mean else np.zeros(len(feature_names)), dtype=np.float64)
+            scale = np.asarray(step.scale_ if step.with_std else np.ones(len(feature_names)), dtype=np.float64)
+        else:
+            return None
+    return {'booster': booster, 'fill': fill, 'mean': mean, 'scale': scale}
+
+
+class InferenceEngine:
+    """
+    Wraps the potability classifier for the hot path. Feature order is resolved once at load
+    time, each request fills a preallocated float32 row, and a single probability call is made;
+    the label is derived from the probabilities instead of walking the trees a second time.
+    """
+
+    def __init__(self, model, num_threads=None):
+        self.model = model
+        # LightGBM threads per prediction call; None/0 keeps LightGBM's default (all cores).
+        self.num_threads = num_threads
+        self.feature_names = resolve_feature_names(model)
+        self.classes = np.asarray(model.classes_)
+        self._compiled = _compile_pipeline(model, self.feature_names)
+        self._local = threading.local()
+
+    @property
+    def n_features(self):
+        return len(self.feature_names)
+
+    def _row_buffer(self):
+        # One buffer per thread: the dev server and the micro-batcher may score concurrently.
+        row = getattr(self._local, 'row', None)
+        if row is None:
+            row = self._local.row = np.empty((1, self.n_features), dtype=np.float32)
+        return row
+
+    def vectorize(self, data):
+        """Fills the thread's preallocated row from a request dict. Missing/None values become NaN."""
+        row = self._row_buffer()
+        for i, name in enumerate(self.feature_names):
+            value = data.get(name)
+            row[0, i] = np.nan if value is None else value
+        return row
+
+    def vectorize_many(self, samples):
+        """Builds an (n_samples, n_features) float32 matrix from a list of request dicts."""
+        matrix = np.empty((len(samples), self.n_features), dtype=np.float32)
+        for r, data in enumerate(samples):
+            for i, name in enumerate(self.feature_names):
+                value = data.get(name)
+                matrix[r, i] = np.nan if value is None else value
+        return matrix
+
+    def predict_proba_matrix(self, matrix):
+        """Class probabilities for a float matrix whose columns follow `feature_names`."""
+        if self._compiled is None:
+            import pandas as pd
+            return self.model.predict_proba(pd.DataFrame(matrix, columns=self.feature_names))
+        c = self._compiled
+        X = np.where(np.isnan(matrix), c['fill'], matrix)
+        X = (X - c['mean']) / c['scale']
+        positive = c['booster'].predict(X, num_threads=self.num_threads or 0)
+        return np.column_stack((1.0 - positive, positive))
+
+    def labels_from_proba(self, probas):
+        return self.classes[probas.argmax(axis=1)]
+
+    def predict_one(self, data):
+        """Returns (label, probabilities) for one request dict with a single tree walk."""
+        proba = self.predict_proba_matrix(self.vectorize(data))
+        return self.classes[proba[0].argmax()], proba[0]
+
+    def predict_many(self, samples):
+        """Returns (labels, probabilities) for a list of request dicts with a single tree walk."""
+        probas = self.predict_proba_matrix(self.vectorize_many(samples))
+        return self.labels_from_proba(probas), probas
@@ -0,0 +1,268 @@
+# backend/llm_gateway.py - BOUNDED, DEADLINED AND CIRCUIT-BROKEN ACCESS TO THE GEMINI MODELS
+
+import random
+import threading
+import time
+
+# HTTP statuses (and their gRPC equivalents, which google.api_core maps to the same codes) worth
+# another attempt: the request was fine, the upstream was busy or broken.
+RETRYABLE_STATUS = {408, 429, 500, 502, 503, 504}
+# Transport errors without a status code: timeouts and dropped connections, from requests,
+# urllib3, grpc or the standard library.
+RETRYABLE_ERROR_NAMES = {'Timeout', 'ReadTimeout', 'ConnectTimeout', 'ConnectionError', 'ProtocolError',
+                         'RemoteDisconnected', 'DeadlineExceeded', 'ServiceUnavailable', 'RetryError'}
+
+
+class LLMUnavailable(Exception):
+    """The LLM was not (successfully) asked: circuit open, every slot busy, deadline spent or retries exhausted."""
+
+    def __init__(self, message, reason):
+        super().__init__(message)
+        self.reason = reason
+
+
+def is_retryable(error):
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    code = getattr(error, 'code', None)
+    if isinstance(code, int) and code in RETRYABLE_STATUS:
+        return True
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive upstream failures, so callers fail fast instead
+    of queueing behind a dead API. After `reset_seconds` one probe call is let through
+    (half-open): it closes the circuit if it succeeds and re-opens it if it fails.
+    """
+
+    def __init__(self, failure_threshold=5, reset_seconds=30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_seconds = reset_seconds
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at = None
+        self._probing = False
+        self.opened = 0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state(time.monotonic())
+
+    def _state(self, now):
+        if self._opened_at is None:
+            return 'closed'
+        return 'half_open' if now - self._opened_at >= self.reset_seconds else 'open'
+
+    def is_open(self):
+        """True while calls would be refused; unlike allow(), never takes the half-open probe."""
+        with self._lock:
+            state = self._state(time.monotonic())
+            return state == 'open' or (state == 'half_open' and self._probing)
+
+    def allow(self):
+        with self._lock:
+            state = self._state(time.monotonic())
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self._probing:
+                self._probing = True
+                return True
+            return False
+
+    def release(self):
+        """Gives back a half-open probe that never reached the upstream."""
+        with self._lock:
+            self._probing = False
+
+    def record_success(self):
+        with self._lock:
+            self._failures, self._opened_at, self._probing = 0, None, False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._probing or (self._opened_at is None and self._failures >= self.failure_threshold):
+                self._opened_at = time.monotonic()
+                self.opened += 1
+            self._probing = False
+
+    def stats(self):
+        with self._lock:
+            now = time.monotonic()
+            state = self._state(now)
+            return {'state': state, 'consecutive_failures': self._failures, 'times_opened': self.opened,
+                    'retry_in_seconds': round(max(0.0, self.reset_seconds - (now - self._opened_at)), 1)
+                    if state == 'open' else None}
+
+
+class LLMGateway:
+    """
+    The one way out to the LLM for every model of a process (see wrap()). All calls share:
+      - a semaphore of `max_concurrency` slots; a call waits at most `queue_seconds` for one,
+        so a slow upstream costs callers a bounded wait rather than every request thread;
+      - a per-call deadline passed down as the SDK's request timeout, covering all attempts;
+      - up to `attempts` tries on retryable errors, with full-jitter exponential backoff;
+      - a CircuitBreaker that turns a failing upstream into an immediate LLMUnavailable.
+    Callers catch LLMUnavailable and answer with their fallback. Errors that are the request's
+    fault (bad input, blocked content) are raised as they are and don't count against the circuit.
+
+    Connections are reused: every wrapped model goes through the process's single SDK client
+    (one gRPC channel, or one HTTP keep-alive pool with the REST transport), and the default
+    concurrency stays below the 10 connections that pool keeps per host.
+    """
+
+    def __init__(self, max_concurrency=8, timeout=20.0, attempts=3, backoff_seconds=0.5,
+                 max_backoff_seconds=4.0, queue_seconds=2.0, breaker=None):
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self.attempts = max(1, int(attempts))
+        self.backoff = backoff_seconds
+        self.max_backoff = max_backoff_seconds
+        self.queue_seconds = queue_seconds
+        self.breaker = breaker or CircuitBreaker()
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = self.calls = self.successes = self.failures = self.retries = 0
+        self.rejected = {'circuit_open': 0, 'busy': 0, 'deadline': 0, 'exhausted': 0, 'interrupted': 0}
+        self._latency_total = 0.0
+
+    def wrap(self, model, timeout=None):
+        """A drop-in for `model` whose generate_content() goes through this gateway."""
+        return GatewayModel(self, model, timeout)
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    def _reject(self, reason, message, cause=None):
+        with self._lock:
+            self.rejected[reason] += 1
+        raise LLMUnavailable(message, reason) from cause
+
+    def _admit(self, deadline, error):
+        """Takes a slot for one attempt, or raises LLMUnavailable (circuit open, no slot in time, deadline spent)."""
+        if not self.breaker.allow():
+            self._reject('circuit_open', "The AI service is failing; not calling it for now.", error)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0 or not self._slots.acquire(timeout=min(self.queue_seconds, remaining)):
+            self.breaker.release()
+            if remaining <= 0:
+                self._reject('deadline', "The AI service did not answer in time.", error)
+            self._reject('busy', "Too many AI requests in flight; try again shortly.", error)
+        self._count(in_flight=1)
+
+    def _leave(self):
+        self._count(in_flight=-1)
+        self._slots.release()
+
+    def _after_failure(self, error, attempt, deadline):
+        """Raises unless `error` is transient and attempts and time remain; then sleeps the backoff."""
+        if not is_retryable(error):
+            self.breaker.release()
+            raise error
+        self.breaker.record_failure()
+        self._count(failures=1)
+        if attempt + 1 >= self.attempts:
+            self._reject('exhausted', f"The AI service failed {self.attempts} times: {error}", error)
+        pause = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        if time.monotonic() + pause >= deadline:
+            self._reject('deadline', "The AI service did not answer in time.", error)
+        self._count(retries=1)
+        time.sleep(pause)
+
+    def call(self, model, contents, timeout=None, **kwargs):
+        """model.generate_content(contents, **kwargs) within the gateway's limits; returns the SDK response."""
+        self._count(calls=1)
+        deadline = time.monotonic() + (timeout or self.timeout)
+        error = None
+        for attempt in range(self.attempts):
+            self._admit(deadline, error)
+            started = time.monotonic()
+            try:
+                response = model.generate_content(contents, request_options={'timeout': deadline - started}, **kwargs)
+            except Exception as e:
+                error = e
+            else:
+                self.breaker.record_success()
+                self._count(successes=1, _latency_total=time.monotonic() - started)
+                return response
+            finally:
+                self._leave()
+            self._after_failure(error, attempt, deadline)
+
+    def stream(self, model, contents, timeout=None, **kwargs):
+        """
+        Generator over the text chunks of model.generate_content(contents, stream=True), as they
+        arrive. The slot is held until the stream ends or the generator is closed. An attempt
+        that fails before its first chunk is retried like call(); one that fails part-way raises
+        LLMUnavailable('interrupted'), as the caller has already used what it received.
+        """
+        self._count(calls=1)
+        deadline = time.monotonic() + (timeout or self.timeout)
+        error = None
+        for attempt in range(self.attempts):
+            self._admit(deadline, error)
+            started, streamed = time.monotonic(), False
+            try:
+                for chunk in model.generate_content(contents, stream=True,
+                                                    request_options={'timeout': deadline - started}, **kwargs):
+                    if chunk.parts:  # the last chunk may only carry the finish reason
+                        streamed = True
+                        yield chunk.text
+            except GeneratorExit:  # the caller stopped reading, e.g. its client disconnected
+                self.breaker.release()
+                raise
+            except Exception as e:
+                error = e
+            else:
+                self.breaker.record_success()
+                self._count(successes=1, _latency_total=time.monotonic() - started)
+                return
+            finally:
+                self._leave()
+            if streamed:
+                if not is_retryable(error):
+                    self.breaker.release()
+                    raise error
+                self.breaker.record_failure()
+                self._count(failures=1)
+                self._reject('interrupted', f"The AI service stopped answering: {error}", error)
+            self._after_failure(error, attempt, deadline)
+
+    def stats(self):
+        with self._lock:
+            stats = {'max_concurrency': self.max_concurrency, 'in_flight': self.in_flight, 'calls': self.calls,
+                     'successes': self.successes, 'failures': self.failures, 'retries': self.retries,
+                     'rejected': dict(self.rejected), 'timeout_seconds': self.timeout,
+                     'mean_latency_ms': round(self._latency_total / self.successes * 1000, 1) if self.successes else None}
+        stats['circuit'] = self.breaker.stats()
+        return stats
+
+
+class GatewayModel:
+    """
+    A model routed through an LLMGateway, with the same generate_content() and warm_up() as the
+    model, plus stream_text() for the answer's text chunks as they are generated.
+    """
+
+    def __init__(self, gateway, model, timeout=None):
+        self.gateway = gateway
+        self.model = model
+        self.timeout = timeout
+
+    @property
+    def model_name(self):
+        return self.model.model_name
+
+    def warm_up(self):
+        self.model.warm_up()
+
+    def generate_content(self, contents, **kwargs):
+        return self.gateway.call(self.model, contents, timeout=self.timeout, **kwargs)
+
+    def stream_text(self, contents, **kwargs):
+        return self.gateway.stream(self.model, contents, timeout=self.timeout, **kwargs)
@@ -0,0 +1,92 @@
+# backend/manage.py - MAINTENANCE COMMANDS FOR THE AQUALERT DATABASE AND MODEL REGISTRY
+#
+# Usage (from the backend directory):
+#   python manage.py check-rollups                 # compare the rollup tables with test_results
+#   python manage.py rebuild-rollups               # recompute the rollup tables from test_results
+#   python manage.py list-models                   # registered classifier versions
+#   python manage.py register-model PATH [--promote] [--version v7] [--description "..."]
+#   python manage.py promote-model VERSION         # running servers switch within a few seconds
+# The database is AQUALERT_DB (default aqualert.db) unless --db is given; the registry is
+# AQUALERT_MODEL_DIR (default models) unless --model-dir is given.
+
+import argparse
+import os
+import sys
+import time
+
+from model_registry import ModelRegistry
+from store import WaterStore
+
+
+def check_rollups(args):
+    mismatches = WaterStore(args.db).check_rollups()
+    for table, key, stored, expected in mismatches[:20]:
+        print(f"   {table} {key}: stored={stored} expected={expected}")
+    if mismatches:
+        print(f"❌ {len(mismatches)} rollup rows out of date. Run `python manage.py rebuild-rollups`.")
+        return 1
+    print("✅ Rollups match test_results.")
+    return 0
+
+
+def rebuild_rollups(args):
+    started = time.perf_counter()
+    WaterStore(args.db).rebuild_rollups()
+    print(f"✅ Rollups rebuilt in {time.perf_counter() - started:.2f}s.")
+    return check_rollups(args)
+
+
+def list_models(args):
+    registry = ModelRegistry(args.model_dir)
+    current = registry.current_version()
+    for version in registry.versions():
+        meta = registry.metadata(version)
+        registered = time.strftime('%Y-%m-%d %H:%M', time.localtime(meta['registered_at']))
+        print(f"{'*' if version == current else ' '} {version:<8} {registered}  {meta['sha256'][:12]}  "
+              f"{meta.get('description', '')}")
+    return 0
+
+
+def register_model(args):
+    registry = ModelRegistry(args.model_dir)
+    metadata = {'description': args.description} if args.description else None
+    version = registry.register(args.path, version=args.version, metadata=metadata)
+    print(f"✅ Registered {args.path} as {version}.")
+    if args.promote:
+        return promote_model(argparse.Namespace(model_dir=args.model_dir, version=version))
+    return 0
+
+
+def promote_model(args):
+    ModelRegistry(args.model_dir).promote(args.version)
+    print(f"✅ {args.version} is now CURRENT; running servers reload it on their next check.")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AquaLERT maintenance.")
+    parser.add_argument('--db', default=os.getenv('AQUALERT_DB', 'aqualert.db'))
+    parser.add_argument('--model-dir', default=os.getenv('AQUALERT_MODEL_DIR', 'models'))
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('check-rollups').set_defaults(run=check_rollups)
+    commands.add_parser('rebuild-rollups').set_defaults(run=rebuild_rollups)
+    commands.add_parser('list-models').set_defaults(run=list_models)
+    register = commands.add_parser('register-model')
+    register.add_argument('path')
+    register.add_argument('--version')
+    register.add_argument('--description')
+    register.add_argument('--promote', action='store_true')
+    register.set_defaults(run=register_model)
+    promote = commands.add_parser('promote-model')
+    promote.add_argument('version')
+    promote.set_defaults(run=promote_model)
+    args = parser.parse_args()
+    try:
+        return args.run(args)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
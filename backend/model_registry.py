@@ -0,0 +1,270 @@
+# backend/model_registry.py - VERSIONED MODEL ARTIFACTS AND ATOMIC HOT RELOAD
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+ARTIFACT = 'model.pkl'
+METADATA = 'metadata.json'
+CURRENT = 'CURRENT'
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """
+    A directory of immutable model versions:
+
+        <root>/<version>/model.pkl       the pickled sklearn pipeline
+        <root>/<version>/metadata.json   version, sha256, registered_at, source and any extras
+        <root>/CURRENT                   the version the servers should run
+
+    Versions are published by renaming a finished directory into place and CURRENT is replaced
+    with os.replace, so readers never see a partly written artifact or pointer.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def versions(self):
+        """Registered versions, oldest first."""
+        found = [self.metadata(name) for name in os.listdir(self.root)
+                 if os.path.isfile(os.path.join(self.root, name, METADATA))]
+        return [m['version'] for m in sorted(found, key=lambda m: m['registered_at'])]
+
+    def metadata(self, version):
+        with open(os.path.join(self.root, version, METADATA)) as f:
+            return json.load(f)
+
+    def artifact_path(self, version):
+        return os.path.join(self.root, version, ARTIFACT)
+
+    def _next_version(self):
+        numbers = [int(v[1:]) for v in self.versions() if v.startswith('v') and v[1:].isdigit()]
+        return f"v{max(numbers, default=0) + 1}"
+
+    def register(self, artifact_path, version=None, metadata=None):
+        """Copies a pickled model into the registry as a new version and returns that version."""
+        version = version or self._next_version()
+        if os.path.exists(os.path.join(self.root, version)):
+            raise ValueError(f"Model version {version} already exists.")
+        staging = tempfile.mkdtemp(prefix='.staging-', dir=self.root)
+        try:
+            shutil.copyfile(artifact_path, os.path.join(staging, ARTIFACT))
+            info = dict(metadata or {}, version=version, source=os.path.abspath(artifact_path),
+                        sha256=file_sha256(os.path.join(staging, ARTIFACT)), registered_at=time.time())
+            with open(os.path.join(staging, METADATA), 'w') as f:
+                json.dump(info, f, indent=2)
+            os.rename(staging, os.path.join(self.root, version))
+        except BaseException:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return version
+
+    def current_version(self):
+        try:
+            with open(os.path.join(self.root, CURRENT)) as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def current_mtime(self):
+        try:
+            return os.stat(os.path.join(self.root, CURRENT)).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def promote(self, version):
+        """Points CURRENT at `version`."""
+        if version not in self.versions():
+            raise ValueError(f"Unknown model version {version}.")
+        fd, tmp = tempfile.mkstemp(prefix='.current-', dir=self.root)
+        with os.fdopen(fd, 'w') as f:
+            f.write(version + '\n')
+        os.replace(tmp, os.path.join(self.root, CURRENT))
+
+    def load(self, version):
+        """Unpickles a version after checking the artifact still matches its recorded sha256."""
+        path = self.artifact_path(version)
+        expected = self.metadata(version)['sha256']
+        if file_sha256(path) != expected:
+            raise ValueError(f"Model {version} does not match its recorded sha256.")
+        import joblib  # pulls in sklearn/lightgbm/pandas, so only when a model is actually loaded
+        return joblib.load(path)
+
+
+class LoadedModel:
+    """One ready-to-serve model version. Never modified after it is published."""
+
+    __slots__ = ('version', 'metadata', 'engine', 'batcher', 'loaded_at')
+
+    def __init__(self, version, metadata, engine, batcher):
+        self.version = version
+        self.metadata = metadata
+        self.engine = engine
+        self.batcher = batcher
+        self.loaded_at = time.time()
+
+    def predict_one(self, data):
+        return (self.batcher or self.engine).predict_one(data)
+
+
+class ModelManager:
+    """
+    Serves the registry's CURRENT model and hot-swaps it. A reload unpickles, validates and warms
+    the new version on a background thread, then publishes it with a single reference
+    assignment; requests call current() once and keep using that LoadedModel, so none of them
+    ever sees a half-loaded model. A failed load leaves the serving model in place.
+
+    With `watch_seconds`, each process polls CURRENT and reloads when it changes, which is how
+    every pre-fork worker follows a promotion made by any one of them (or by manage.py).
+    """
+
+    def __init__(self, registry, batch_max_size=32, batch_max_wait_ms=2.0, num_threads=None, watch_seconds=5.0):
+        self.registry = registry
+        self.batch_max_size = batch_max_size
+        self.batch_max_wait_ms = batch_max_wait_ms
+        self.num_threads = num_threads
+        self.watch_seconds = watch_seconds
+        self._current = None
+        self._reload_lock = threading.Lock()
+        self._reload_thread = None
+        self._watcher_lock = threading.Lock()
+        self._watcher_pid = None
+        self._seen_mtime = None
+        self.loading = None
+        self.last_error = None
+
+    def current(self):
+        if self.watch_seconds and self._watcher_pid != os.getpid():
+            self._start_watcher()
+        return self._current
+
+    def set_num_threads(self, num_threads):
+        """LightGBM threads for the serving model and every model loaded after it."""
+        self.num_threads = num_threads
+        if self._current is not None:
+            self._current.engine.num_threads = num_threads
+
+    # --- LOADING ---
+    def _build(self, version, warm_up=True):
+        from batching import MicroBatcher  # these import numpy: only once a model is actually loaded
+        from inference import InferenceEngine
+        model = self.registry.load(version)
+        engine = InferenceEngine(model, num_threads=self.num_threads)
+        if warm_up:
+            self._warm_up(engine)
+        batcher = MicroBatcher(engine, self.batch_max_size, self.batch_max_wait_ms) if self.batch_max_size > 1 else None
+        return LoadedModel(version, self.registry.metadata(version), engine, batcher)
+
+    @staticmethod
+    def _warm_up(engine, rows=64):
+        """Scores a batch of synthetic rows so the first real request doesn't pay for lazy init."""
+        import numpy as np
+        probas = engine.predict_proba_matrix(np.full((rows, engine.n_features), np.nan, dtype=np.float32))
+        if probas.shape != (rows, 2) or not np.all(np.isfinite(probas)):
+            raise ValueError("Model warm-up produced invalid probabilities.")
+        engine.predict_one({})
+
+    def load_current(self, warm_up=True):
+        """
+        Loads CURRENT synchronously (used at startup). Returns the LoadedModel or None. A process
+        that will fork workers must pass warm_up=False: LightGBM's OpenMP pool does not survive
+        fork(), so the first prediction has to happen in the worker (see warm_up()).
+        """
+        self._seen_mtime = self.registry.current_mtime()
+        version = self.registry.current_version()
+        if version is not None:
+            self._swap(self._build(version, warm_up))
+        return self._current
+
+    def load_current_async(self):
+        """
+        Loads CURRENT on a background thread (lazy start): the server answers other requests
+        meanwhile and `loading` stays set until the model is serving. Returns the version.
+        """
+        self._seen_mtime = self.registry.current_mtime()
+        return self.reload()
+
+    def warm_up(self):
+        """Warms the serving model in this process."""
+        if self._current is not None:
+            self._warm_up(self._current.engine)
+
+    def _swap(self, loaded):
+        previous, self._current = self._current, loaded
+        if previous is not None and previous.batcher is not None:
+            previous.batcher.close()
+
+    def reload(self, version=None, promote=False):
+        """
+        Loads `version` (default: CURRENT) in the background. With `promote`, CURRENT is pointed
+        at it once it is serving, so a version that fails to load is never promoted. Returns the
+        version being loaded, or None if another reload is already running.
+        """
+        if not self._reload_lock.acquire(blocking=False):
+            return None
+        version = version or self.registry.current_version()
+        self.loading = version
+        self._reload_thread = threading.Thread(target=self._reload, args=(version, promote), name='model-reload', daemon=True)
+        self._reload_thread.start()
+        return version
+
+    def wait_loaded(self, timeout=None):
+        """Blocks until a background load in progress has finished. Returns the serving LoadedModel or None."""
+        thread = self._reload_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self._current
+
+    def _reload(self, version, promote):
+        try:
+            if self._current is None or self._current.version != version:
+                self._swap(self._build(version))
+                print(f"✅ Model {version} loaded and serving.")
+            if promote:
+                self.registry.promote(version)
+            self.last_error = None
+        except Exception as e:
+            self.last_error = f"{version}: {e}"
+            print(f"❌ Error loading model {version}: {e}")
+        finally:
+            self.loading = None
+            self._reload_lock.release()
+
+    # --- WATCHING ---
+    def _start_watcher(self):
+        with self._watcher_lock:
+            if self._watcher_pid != os.getpid():
+                self._watcher_pid = os.getpid()
+                threading.Thread(target=self._watch, name='model-watcher', daemon=True).start()
+
+    def _watch(self):
+        pid = os.getpid()
+        while self._watcher_pid == pid:
+            time.sleep(self.watch_seconds)
+            mtime = self.registry.current_mtime()
+            if mtime != self._seen_mtime and self.reload() is not None:
+                self._seen_mtime = mtime
+
+    def status(self):
+        current = self._current
+        return {
+            'active': {'version': current.version, 'loaded_at': current.loaded_at, 'metadata': current.metadata}
+            if current else None,
+            'current_pointer': self.registry.current_version(),
+            'versions': self.registry.versions(),
+            'loading': self.loading,
+            'last_error': self.last_error,
+        }
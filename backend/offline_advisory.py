@@ -0,0 +1,161 @@
+# backend/offline_advisory.py - RULE-BASED ADVISORIES (ENGLISH / HAITIAN CREOLE) WITHOUT THE LLM
+
+import math
+
+# Safe ranges of the PARAMETERS table on the Real-Time Test page (frontend/pages/2_Real-Time_Test.py).
+SAFE_RANGES = {
+    'ph': (6.5, 8.5, ''),
+    'Hardness': (60.0, 120.0, 'mg/L'),
+    'Solids': (0.0, 500.0, 'ppm'),
+    'Chloramines': (0.5, 4.0, 'ppm'),
+    'Sulfate': (0.0, 250.0, 'mg/L'),
+    'Conductivity': (50.0, 800.0, 'μS/cm'),
+    'Organic_carbon': (0.0, 4.0, 'ppm'),
+    'Trihalomethanes': (0.0, 80.0, 'μg/L'),
+    'Turbidity': (0.0, 1.0, 'NTU'),
+}
+LANGUAGES = ('en', 'ht')
+# Out-of-range readings that boiling or chlorine don't fix: the water stays unfit to drink after treatment.
+CHEMICAL = {('Solids', 'high'), ('Sulfate', 'high'), ('Conductivity', 'high'), ('Trihalomethanes', 'high')}
+
+TEXT = {
+    'en': {
+        'headings': ("### Simple Summary:", "### Recommended Actions (How to Control & Prevent):",
+                     "### Permitted Uses (What purpose we can use the water):", "### Important Note:"),
+        'names': {'ph': 'pH', 'Hardness': 'Hardness', 'Solids': 'Total dissolved solids', 'Chloramines': 'Chloramines',
+                  'Sulfate': 'Sulfate', 'Conductivity': 'Conductivity', 'Organic_carbon': 'Organic carbon',
+                  'Trihalomethanes': 'Trihalomethanes', 'Turbidity': 'Turbidity'},
+        'high': 'high', 'low': 'low',
+        'potable': "The sample looks **safe to drink** according to the AquaLERT model (confidence {confidence}).",
+        'not_potable': "The sample is **not safe to drink** as collected, according to the AquaLERT model (confidence {confidence}).",
+        'in_range': "All measured values are within the safe ranges.",
+        'out_of_range': "Outside the safe range: {readings}.",
+        'reading': "{name} {level} ({value} {unit}, safe {low}-{high})",
+        'actions': {
+            ('ph', 'low'): "Acidic water can dissolve metals from pipes and pots: store it in plastic or glass, not metal.",
+            ('ph', 'high'): "Chlorine works less well in alkaline water: use the full dose and wait 60 minutes before drinking.",
+            ('Hardness', 'high'): "Hard water is not harmful but leaves scale; a cloth filter removes what settles after boiling.",
+            ('Hardness', 'low'): "Very soft water can corrode pipes; let the tap run a few seconds before collecting it.",
+            ('Solids', 'high'): "Dissolved solids are not removed by boiling or chlorine: use another source for drinking if you can.",
+            ('Chloramines', 'high'): "Too much disinfectant: leave the water uncovered for a few hours or use an activated-carbon filter.",
+            ('Chloramines', 'low'): "There is little disinfectant left: chlorinate the water (Aquatabs or bleach) before drinking.",
+            ('Sulfate', 'high'): "High sulfate can cause diarrhoea, especially in babies: do not use it for infant formula.",
+            ('Conductivity', 'high'): "High salt content: do not use this water for infants or people with kidney problems.",
+            ('Conductivity', 'low'): "Very few minerals, like rain water: it is fine to drink but can corrode pipes and metal containers.",
+            ('Organic_carbon', 'high'): "Organic matter is high: filter the water before chlorinating it so the chlorine works.",
+            ('Trihalomethanes', 'high'): "Chlorination by-products are high: an activated-carbon filter reduces them; avoid long-term drinking.",
+            ('Turbidity', 'high'): "The water is cloudy: let it settle, pour it through a clean cloth, then boil or use a double dose of chlorine.",
+        },
+        # Readings with no action of their own, e.g. a negative value from a faulty sensor.
+        'check': "{name} is outside its safe range: check the sensor, take a new sample and test it again.",
+        'treat': "Boil the water for at least one minute, or treat it with chlorine (Aquatabs, bleach) and wait 30 minutes before drinking.",
+        'report': "Report the source on the AquaLERT map and to local health authorities, and use a verified source if you can.",
+        'store': "Keep the water in a clean, covered container and re-test if its colour, smell or taste changes.",
+        'uses_all': "Drinking and cooking, washing, bathing and irrigation.",
+        'uses_treated': "After boiling or chlorination: drinking and cooking.",
+        'uses_untreated': "Untreated: washing clothes, cleaning and irrigation only.",
+        'uses_chemical': "Not for drinking, cooking or infant formula, even after boiling: washing, cleaning and irrigation only.",
+        'note': ("This advisory was generated automatically from the sensor values, not by the AI advisor. "
+                 "Sensor tests are a screening tool: when in doubt, treat the water before drinking it."),
+    },
+    'ht': {
+        'headings': ("### Rezime:", "### Aksyon pou fè (Kijan pou kontwole ak prevni):",
+                     "### Itilizasyon ki pèmèt (Pou kisa nou ka sèvi ak dlo a):", "### Nòt enpòtan:"),
+        'names': {'ph': 'pH', 'Hardness': 'Dite', 'Solids': 'Solid ki fonn', 'Chloramines': 'Kloramin',
+                  'Sulfate': 'Silfat', 'Conductivity': 'Kondiktivite', 'Organic_carbon': 'Kabòn òganik',
+                  'Trihalomethanes': 'Triyalometan', 'Turbidity': 'Tibidite'},
+        'high': 'twò wo', 'low': 'twò ba',
+        'potable': "Dapre modèl AquaLERT la, dlo sa a **bon pou bwè** (konfyans {confidence}).",
+        'not_potable': "Dapre modèl AquaLERT la, dlo sa a **pa bon pou bwè** jan li ye a (konfyans {confidence}).",
+        'in_range': "Tout valè yo nan limit ki san danje yo.",
+        'out_of_range': "Pa nan limit ki san danje: {readings}.",
+        'reading': "{name} {level} ({value} {unit}, limit {low}-{high})",
+        'actions': {
+            ('ph', 'low'): "Dlo asid ka fonn metal nan tiyo ak chodyè: kenbe l nan plastik oswa vè, pa nan metal.",
+            ('ph', 'high'): "Klò pa travay byen nan dlo sa a: mete tout dòz la epi tann 60 minit anvan ou bwè.",
+            ('Hardness', 'high'): "Dlo di pa danjere men li kite kal: pase l nan yon twal pwòp apre ou fin bouyi l.",
+            ('Hardness', 'low'): "Dlo ki twò mou ka manje tiyo: kite tiyo a koule kèk segonn anvan ou pran dlo a.",
+            ('Solids', 'high'): "Bouyi oswa klò pa retire solid ki fonn yo: sèvi ak yon lòt sous pou bwè si ou kapab.",
+            ('Chloramines', 'high'): "Twòp dezenfektan: kite dlo a dekouvri kèk èdtan oswa sèvi ak yon filt kabòn aktif.",
+            ('Chloramines', 'low'): "Pa gen ase dezenfektan: mete klò (Aquatabs oswa kloròks) anvan ou bwè.",
+            ('Sulfate', 'high'): "Twòp silfat ka bay dyare, sitou pou tibebe: pa sèvi ak li pou fè lèt tibebe.",
+            ('Conductivity', 'high'): "Gen twòp sèl: pa bay tibebe oswa moun ki gen pwoblèm ren dlo sa a.",
+            ('Conductivity', 'low'): "Pa gen anpil mineral, tankou dlo lapli: ou ka bwè l men li ka manje tiyo ak veso metal.",
+            ('Organic_carbon', 'high'): "Gen anpil matyè òganik: filtre dlo a anvan ou mete klò pou klò a ka travay.",
+            ('Trihalomethanes', 'high'): "Gen twòp pwodui klò: yon filt kabòn aktif ka diminye yo; pa bwè l pou lontan.",
+            ('Turbidity', 'high'): "Dlo a twoub: kite l poze, pase l nan yon twal pwòp, epi bouyi l oswa mete de fwa dòz klò a.",
+        },
+        'check': "{name} pa nan limit ki san danje a: tcheke sans lan, pran yon lòt echantiyon epi refè tès la.",
+        'treat': "Bouyi dlo a omwen yon minit, oswa mete klò (Aquatabs, kloròks) epi tann 30 minit anvan ou bwè l.",
+        'report': "Siyale sous la sou kat AquaLERT la ak bay otorite sante lokal yo, epi sèvi ak yon sous ki verifye si ou kapab.",
+        'store': "Kenbe dlo a nan yon veso pwòp ki kouvri, epi refè tès la si koulè, odè oswa gou l chanje.",
+        'uses_all': "Bwè ak fè manje, lave, benyen ak wouze.",
+        'uses_treated': "Apre ou bouyi l oswa mete klò: bwè ak fè manje.",
+        'uses_untreated': "San tretman: lave rad, netwaye ak wouze sèlman.",
+        'uses_chemical': "Pa pou bwè, fè manje oswa lèt tibebe, menm apre ou bouyi l: lave, netwaye ak wouze sèlman.",
+        'note': ("Konsèy sa a soti otomatikman nan valè sans yo, se pa konseye IA a ki ekri l. "
+                 "Tès sans yo se yon premye tcheke: si ou gen dout, trete dlo a anvan ou bwè l."),
+    },
+}
+
+
+def _number(value):
+    try:
+        value = float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if math.isnan(value) else value
+
+
+def findings(data):
+    """[(parameter, 'low' | 'high', value)] for every reading outside its safe range, in SAFE_RANGES order."""
+    out = []
+    for name, (low, high, _) in SAFE_RANGES.items():
+        value = _number(data.get(name))
+        if value is not None and (value < low or value > high):
+            out.append((name, 'low' if value < low else 'high', value))
+    return out
+
+
+def _render(text, prediction, confidence, found):
+    summary = text['potable' if prediction == 'Potable' else 'not_potable'].format(confidence=f"{confidence:.0%}")
+    if found:
+        readings = '; '.join(text['reading'].format(name=text['names'][name], level=text[level], value=f"{value:g}",
+                                                    unit=SAFE_RANGES[name][2], low=f"{SAFE_RANGES[name][0]:g}",
+                                                    high=f"{SAFE_RANGES[name][1]:g}").replace(' ,', ',')
+                             for name, level, value in found)
+        summary += ' ' + text['out_of_range'].format(readings=readings)
+    else:
+        summary += ' ' + text['in_range']
+
+    chemical = any((name, level) in CHEMICAL for name, level, _ in found)
+    actions = [text['actions'].get((name, level)) or text['check'].format(name=text['names'][name])
+               for name, level, _ in found]
+    if prediction == 'Potable':
+        actions.append(text['store'])
+        uses = [text['uses_chemical']] if chemical else [text['uses_all']]
+    else:
+        actions = [text['treat'], *actions, text['report']]
+        uses = [text['uses_chemical']] if chemical else [text['uses_treated'], text['uses_untreated']]
+
+    summary_heading, actions_heading, uses_heading, note_heading = text['headings']
+    return "\n".join([summary_heading, summary, "", actions_heading, *(f"- {a}" for a in actions), "",
+                      uses_heading, *(f"- {u}" for u in uses), "", note_heading, text['note']])
+
+
+def offline_advisory(prediction, confidence, data, languages=LANGUAGES):
+    """
+    A markdown advisory in the sections of create_gemini_prompt, built from the verdict and the
+    readings outside the Real-Time Test safe ranges, in each of `languages` ('en', 'ht') in turn.
+    Pure string formatting (well under a millisecond), so it can always answer: when there is no
+    Gemini key, when the LLM fails, and as the instant draft a Gemini advisory later replaces.
+    """
+    found = findings(data)
+    return "\n\n---\n\n".join(_render(TEXT[lang], prediction, confidence[prediction], found)
+                              for lang in languages if lang in TEXT)
+
+
+def parse_languages(value, default=LANGUAGES):
+    """('en', 'ht') from 'en,ht'; unknown codes are dropped and an empty result means `default`."""
+    languages = tuple(lang for lang in str(value or '').replace(' ', '').lower().split(',') if lang in TEXT)
+    return languages or default
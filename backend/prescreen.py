@@ -0,0 +1,150 @@
+# backend/prescreen.py - LOCAL VISUAL PRE-SCREEN OF WATER SAMPLE PHOTOS
+
+import numpy as np
+
+SCREEN_EDGE = 256      # long edge, in pixels, of the image the screen looks at
+CELL = 8               # block size for colour, edge detail and the dark channel
+# Scores below CLEAR_BELOW or above SUSPICIOUS_ABOVE are answered locally; anything in between
+# is ambiguous and worth a vision model call.
+CLEAR_BELOW = 25
+SUSPICIOUS_ABOVE = 60
+HUE_BINS = 12          # 30 degrees each
+
+
+def _cells(channel):
+    """(rows, cols, CELL * CELL) view of a 2-D array whose sides are multiples of CELL."""
+    h, w = channel.shape
+    return channel.reshape(h // CELL, CELL, w // CELL, CELL).swapaxes(1, 2).reshape(h // CELL, w // CELL, -1)
+
+
+def count_blobs(mask):
+    """
+    Approximate number of connected specks in a boolean mask: pixels are pooled 2x2, then every
+    pooled cell with no set neighbour above or to its left is counted as the start of a blob.
+    Exact for compact specks, which is what particles look like at this scale.
+    """
+    h, w = mask.shape[0] // 2 * 2, mask.shape[1] // 2 * 2
+    pooled = mask[:h, :w].reshape(h // 2, 2, w // 2, 2).any(axis=(1, 3))
+    p = np.pad(pooled, ((1, 0), (1, 1)))
+    starts = pooled & ~p[:-1, 1:-1] & ~p[1:, :-2] & ~p[:-1, :-2] & ~p[:-1, 2:]
+    return int(starts.sum())
+
+
+def screen(pixels):
+    """
+    Scores an RGB uint8 array (about SCREEN_EDGE on the long edge) for visible signs of
+    contamination: discoloration from a hue histogram, cloudiness from haze and washed-out
+    edges, and particle-like specks. Returns the features, a 0-100 score, a verdict ('clear',
+    'suspicious' or 'ambiguous') and a confidence, capped at 0.9 since a photo can't show what
+    matters most. Photos too dark, blown out or flat to judge are always ambiguous.
+    """
+    h, w = pixels.shape[:2]
+    # The sample is usually in the middle of the frame; the borders are table, hands and background.
+    crop = pixels[h // 5:h - h // 5, w // 5:w - w // 5]
+    ch, cw = crop.shape[0] // CELL * CELL, crop.shape[1] // CELL * CELL
+    if ch < 2 * CELL or cw < 2 * CELL:
+        raise ValueError('The image is too small to pre-screen.')
+    rgb = crop[:ch, :cw].astype(np.float32) / 255
+    luma = rgb @ np.array([0.299, 0.587, 0.114], np.float32)
+    low = rgb.min(-1)
+
+    # Colour: hue of the visibly coloured cells (cell averages, so sensor noise isn't colour).
+    r, g, b = (_cells(rgb[..., c]).mean(-1) for c in range(3))
+    high = np.maximum(np.maximum(r, g), b)
+    delta = np.maximum(high - np.minimum(np.minimum(r, g), b), 1e-6)
+    hue = np.select([high == r, high == g], [((g - b) / delta) % 6, (b - r) / delta + 2], (r - g) / delta + 4) * 60
+    coloured = (delta / np.maximum(high, 1e-6) > 0.15) & (high > 0.15)
+    bins = (hue[coloured] // (360 / HUE_BINS)).astype(np.int64) % HUE_BINS
+    histogram = np.bincount(bins, minlength=HUE_BINS) / high.size
+    brown = float((coloured & (hue >= 15) & (hue < 65)).mean())    # silt, rust, tannins
+    green = float((coloured & (hue >= 65) & (hue < 170)).mean())   # algae
+    discoloration = min(1.0, (brown + 1.5 * green) / 0.5)
+
+    # Cloudiness: a turbid sample is bright in every channel (dark channel prior) and washes out
+    # fine detail such as the container's edges.
+    haze = float(_cells(low).min(-1).mean())
+    contrast = float(luma.std())
+    detail = float(np.percentile(_cells(luma).std(-1), 95))  # the sharpest edges, not sensor noise
+    turbidity = float(np.clip((haze - 0.3) / 0.5, 0, 1) * np.clip(1 - detail / 0.06, 0, 1))
+
+    # Particles: small spots darker or brighter than all eight pixels 3 px away; an edge or a line
+    # always has a neighbour that continues it, so the container's outline doesn't count.
+    p = np.pad(luma, 3, mode='edge')
+    ring = np.stack([p[3 + dy:p.shape[0] - 3 + dy, 3 + dx:p.shape[1] - 3 + dx]
+                     for dy in (-3, 0, 3) for dx in (-3, 0, 3) if dy or dx])
+    threshold = max(0.08, 4 * float(np.median(np.abs(np.diff(luma, axis=1)))))  # above sensor noise
+    specks = (luma < ring.min(0) - threshold) | (luma > ring.max(0) + threshold)
+    blobs = count_blobs(specks) if specks.mean() < 0.2 else 0  # dense specks are texture, not particles
+    per_10k = blobs * 10000 / luma.size
+    particles = min(1.0, per_10k / 20)
+
+    parts = np.array([discoloration, turbidity, particles]) * 100
+    score = round(float(0.7 * parts.max() + 0.3 * parts.mean()), 1)
+    brightness = float(luma.mean())
+    flags = []
+    if brightness < 0.15:
+        flags.append('too dark')
+    if (low > 0.98).mean() > 0.5:
+        flags.append('overexposed')
+    if detail < 0.005 and blobs == 0:
+        flags.append('no detail')
+
+    if flags or CLEAR_BELOW <= score <= SUSPICIOUS_ABOVE:
+        verdict = 'ambiguous'
+        band = SUSPICIOUS_ABOVE - CLEAR_BELOW
+        confidence = 0.0 if flags else 0.5 - min(score - CLEAR_BELOW, SUSPICIOUS_ABOVE - score) / band
+    elif score < CLEAR_BELOW:
+        verdict, confidence = 'clear', 0.5 + 0.4 * (CLEAR_BELOW - score) / CLEAR_BELOW
+    else:
+        verdict, confidence = 'suspicious', 0.5 + 0.4 * (score - SUSPICIOUS_ABOVE) / (100 - SUSPICIOUS_ABOVE)
+    return {
+        'verdict': verdict, 'score': score, 'confidence': round(confidence, 2), 'flags': flags,
+        'features': {
+            'brightness': round(brightness, 3), 'haze': round(haze, 3), 'contrast': round(contrast, 3),
+            'detail': round(detail, 3), 'turbidity': round(turbidity, 3), 'brown': round(brown, 3),
+            'green': round(green, 3), 'discoloration': round(discoloration, 3), 'particles': blobs,
+            'particles_per_10k': round(per_10k, 1),
+            'hue_histogram': [round(float(x), 3) for x in histogram],
+        },
+    }
+
+
+def report(result):
+    """(markdown, recommendations) describing a screen() result, in the vision prompt's layout."""
+    f = result['features']
+    signs = []
+    if f['discoloration'] >= 0.3:
+        tint = 'green (possible algae)' if 1.5 * f['green'] > f['brown'] else 'brown or yellow (possible silt, rust or tannins)'
+        signs.append(f"Noticeable {tint} tint.")
+    if f['turbidity'] >= 0.3:
+        signs.append(f"The water looks cloudy (haze {f['haze']:.2f}, edge detail {f['detail']:.3f}).")
+    if f['particles_per_10k'] >= 6:
+        signs.append(f"About {f['particles']} particle-like specks are visible.")
+
+    if result['verdict'] == 'clear':
+        assessment = "No visible turbidity, discoloration or particles were detected."
+        recommendations = ["Looking clear does not make water safe: bacteria, chemicals and metals are invisible.",
+                           "Run a sensor test (Real-Time Test) before drinking."]
+        urgent = "Treat the water as untested until a sensor test confirms it is potable."
+    elif result['verdict'] == 'suspicious':
+        assessment = "The photo shows visible signs of contamination."
+        recommendations = ["Do not drink this water untreated.", "Boil or filter it, and run a sensor test to confirm.",
+                           "Report the source on the community map if the problem persists."]
+        urgent = "Do not drink this water until it has been treated and tested."
+    else:
+        reason = f" ({', '.join(result['flags'])})" if result['flags'] else ""
+        assessment = f"The photo could not be judged with confidence{reason}."
+        recommendations = ["Retake the photo in daylight, against a plain white background.",
+                           "Run a sensor test (Real-Time Test) for a reliable result."]
+        urgent = "Do not rely on this photo; test the water before drinking."
+    markdown = "\n".join([
+        "### Visual Assessment",
+        f"{assessment} Automated pre-screen score: **{result['score']:.0f}/100** (higher is worse).",
+        "",
+        "### Potential Risks",
+        *([f"- {s}" for s in signs] or ["- None visible. Most harmful contaminants cannot be seen."]),
+        "",
+        "### URGENT RECOMMENDATION",
+        urgent,
+    ])
+    return markdown, recommendations
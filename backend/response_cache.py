@@ -0,0 +1,83 @@
+# backend/response_cache.py - PRE-SERIALIZED (AND PRE-COMPRESSED) RESPONSE BODIES
+
+import gzip
+import threading
+
+try:
+    import brotli  # optional: pip install brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed; the headers would cost more than we'd save.
+MIN_COMPRESS_BYTES = 1024
+
+
+def _encode(body, encoding):
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    if encoding == 'gzip':
+        return gzip.compress(body, compresslevel=6, mtime=0)
+    return body
+
+
+class ResponseCache:
+    """
+    Keeps the encoded bytes of hot read endpoints per data version. A request for a version
+    that is already cached is a dictionary lookup plus a memory copy; nothing is re-serialized
+    or re-compressed until the version changes.
+    """
+
+    def __init__(self):
+        self._entries = {}   # key -> (version, {requested encoding: (bytes, actual encoding)})
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def negotiate(accept_encodings):
+        """Picks the best encoding we support from a werkzeug Accept-Encoding header."""
+        if brotli is not None and accept_encodings['br']:
+            return 'br'
+        if accept_encodings['gzip']:
+            return 'gzip'
+        return 'identity'
+
+    def get(self, key, version, build, encoding='identity'):
+        """
+        Returns (body, encoding) for `key` at `version`, calling `build()` for the raw bytes only
+        on a miss. The returned encoding is 'identity' for bodies too small to be worth compressing.
+        """
+        with self._lock:
+            cached_version, bodies = self._entries.get(key, (None, {}))
+            if cached_version == version and encoding in bodies:
+                self.hits += 1
+                return bodies[encoding]
+            self.misses += 1
+
+        # Build outside the lock; encodings already produced for this version are kept.
+        bodies = dict(bodies) if cached_version == version else {'identity': (build(), 'identity')}
+        raw = bodies['identity'][0]
+        if encoding not in bodies:
+            bodies[encoding] = (_encode(raw, encoding), encoding) if len(raw) >= MIN_COMPRESS_BYTES else (raw, 'identity')
+
+        with self._lock:
+            # Don't let a slow builder for an older version overwrite a newer entry.
+            current = self._entries.get(key)
+            if current is None or current[0] <= version:
+                self._entries[key] = (version, bodies)
+        return bodies[encoding]
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {'entries': len(self._entries),
+                    'bytes': sum(len(body) for _, bodies in self._entries.values() for body, _ in bodies.values()),
+                    'hits': self.hits, 'misses': self.misses,
+                    'hit_ratio': round(self.hits / lookups, 4) if lookups else None,
+                    'brotli': brotli is not None}
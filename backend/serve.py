@@ -0,0 +1,139 @@
+# backend/serve.py - PRE-FORK MULTI-WORKER SERVER (PRODUCTION ENTRY POINT)
+#
+# Usage (from the backend directory):  python serve.py [--workers 4] [--threads 8] [--port 5000]
+# The parent imports app.py once - model, store, snapshots - then forks the workers, so every
+# worker shares those pages copy-on-write instead of loading its own copy. All workers accept
+# connections on one listening socket. `python app.py` remains the single-process dev server.
+
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+
+def parse_args():
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description="Pre-fork AquaLERT server.")
+    parser.add_argument('--host', default=os.getenv('AQUALERT_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('AQUALERT_PORT', '5000')))
+    parser.add_argument('--workers', type=int, default=int(os.getenv('AQUALERT_WORKERS', str(cpus))))
+    parser.add_argument('--threads', type=int, default=int(os.getenv('AQUALERT_THREADS', '8')),
+                        help="Concurrent requests (threads) per worker.")
+    parser.add_argument('--model-threads', type=int, default=int(os.getenv('AQUALERT_MODEL_THREADS', '0')),
+                        help="LightGBM threads per worker; 0 splits the CPU cores between workers.")
+    parser.add_argument('--access-log', action='store_true', help="Log every request (off: warnings and errors only).")
+    args = parser.parse_args()
+    args.workers = max(1, args.workers)
+    args.model_threads = args.model_threads or max(1, cpus // args.workers)
+    return args
+
+
+def run_worker(app_module, sock, args):
+    """Serves requests in a forked child until it is told to stop."""
+    from werkzeug.serving import make_server
+
+    gc.enable()
+    if not args.access_log:
+        logging.getLogger('werkzeug').setLevel(logging.WARNING)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    app_module.models.set_num_threads(args.model_threads)
+    # A worker only starts accepting once it is warm, so no request ever lands on a cold one.
+    app_module.warm_up.run()
+    server = make_server(args.host, args.port, app_module.app, threaded=True, fd=sock.fileno())
+
+    # Werkzeug starts a thread per connection without limit. Cap it: a full worker stops
+    # accepting, which leaves new connections in the shared backlog for the other workers.
+    slots = threading.BoundedSemaphore(max(1, args.threads))
+    spawn_thread, handle_in_thread = server.process_request, server.process_request_thread
+
+    def process_request(request, client_address):
+        slots.acquire()
+        spawn_thread(request, client_address)
+
+    def process_request_thread(request, client_address):
+        try:
+            handle_in_thread(request, client_address)
+        finally:
+            slots.release()
+
+    server.process_request, server.process_request_thread = process_request, process_request_thread
+    server.serve_forever()
+
+
+def main():
+    if not hasattr(os, 'fork'):
+        sys.exit("❌ serve.py needs os.fork(); on Windows run `python app.py` instead.")
+    args = parse_args()
+
+    # Every worker gets the same OpenMP budget; this must be set before LightGBM is imported.
+    os.environ.setdefault('OMP_NUM_THREADS', str(args.model_threads))
+    # Tells app.py not to run the model before the fork (see ModelManager.load_current).
+    os.environ['AQUALERT_PREFORK'] = '1'
+    # Keep the collector from touching (and so copying) the shared pages while loading.
+    gc.disable()
+    import app as app_module
+
+    # Nothing that can't cross a fork stays open in the parent: SQLite handles are reopened per
+    # process, and thread pools/batchers only start on first use inside a worker.
+    app_module.store.close()
+    app_module.vision_cache.close()
+    app_module.advisory_jobs.close()
+    gc.freeze()
+
+    sock = socket.create_server((args.host, args.port), backlog=2048)
+    sock.set_inheritable(True)
+    print(f"🚀 AquaLERT serving on http://{args.host}:{args.port} with {args.workers} workers "
+          f"x {args.threads} threads (LightGBM threads per worker: {args.model_threads})")
+
+    workers = {}
+    stopping = False
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(app_module, sock, args)
+            finally:
+                os._exit(0)
+        workers[pid] = time.monotonic()
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for _ in range(args.workers):
+        spawn()
+
+    while workers:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        except InterruptedError:
+            continue
+        started = workers.pop(pid, None)
+        if started is None or stopping:
+            continue
+        print(f"⚠️ Worker {pid} exited with status {status}; restarting.")
+        # Don't spin if workers die right after starting (e.g. the port is unusable).
+        if time.monotonic() - started < 1:
+            time.sleep(1)
+        spawn()
+    print("👋 All workers stopped.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+# backend/startup.py - COLD START: DEFERRED CLIENTS, WARM-UP AND THE --profile-startup REPORT
+#
+# Usage (from the backend directory):  python app.py --profile-startup [--top 15]
+# Imports app.py in a fresh interpreter under `python -X importtime`, then prints the import
+# time per package and how long it took until the first request was answered and the model
+# was ready. Run it with AQUALERT_LAZY_START=1 to see the deferred-start numbers.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# --- DEFERRED CLIENTS ---
+class LazyGenerativeModel:
+    """
+    Stands in for google.generativeai.GenerativeModel. The SDK (close to a second of imports)
+    is only imported and configured on the first generate_content() call or warm_up(), so
+    startup never waits for it and a pre-fork parent never opens its gRPC machinery.
+    `endpoint` points the SDK elsewhere, e.g. at benchmarks/llm_stub.py (over REST unless
+    `transport` says otherwise).
+    """
+
+    def __init__(self, model_name, api_key, endpoint=None, transport=None):
+        self.model_name = model_name
+        self.api_key = api_key
+        self.endpoint = endpoint
+        self.transport = transport or ('rest' if endpoint else None)
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _client(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    import google.generativeai as genai
+                    genai.configure(api_key=self.api_key, transport=self.transport,
+                                    client_options={'api_endpoint': self.endpoint} if self.endpoint else None)
+                    self._model = genai.GenerativeModel(self.model_name)
+        return self._model
+
+    def warm_up(self):
+        self._client()
+
+    def generate_content(self, *args, **kwargs):
+        return self._client().generate_content(*args, **kwargs)
+
+
+def start_background(target, name):
+    """Runs `target` on a daemon thread (used for the warm-up of a lazy start)."""
+    thread = threading.Thread(target=target, name=name, daemon=True)
+    thread.start()
+    return thread
+
+
+# --- WARM-UP ---
+class WarmUp:
+    """
+    Runs a process's warm-up steps once, in order, and records how each went for /readyz. A
+    failing step is logged and the rest still run; what counts as ready is up to the caller.
+    """
+
+    def __init__(self, steps):
+        self.steps = steps            # [(name, callable)]; a callable may return a detail dict
+        self.results = {}
+        self.done = threading.Event()
+        self.started_at = self.finished_at = None
+
+    def run(self):
+        self.started_at = time.time()
+        for name, step in self.steps:
+            started = time.perf_counter()
+            try:
+                detail = step()
+                self.results[name] = dict(detail or {}, ok=True)
+            except Exception as e:
+                self.results[name] = {'ok': False, 'error': str(e)}
+                print(f"❌ Warm-up step '{name}' failed: {e}")
+            self.results[name]['ms'] = round((time.perf_counter() - started) * 1000, 1)
+        self.finished_at = time.time()
+        print(f"✅ Warm-up finished in {self.finished_at - self.started_at:.2f}s "
+              f"({', '.join(name for name, _ in self.steps) or 'no steps'}).")
+        self.done.set()
+
+    def status(self):
+        return {'done': self.done.is_set(), 'started_at': self.started_at, 'finished_at': self.finished_at,
+                'steps': self.results}
+
+
+# --- PROFILING ---
+# Runs in the child interpreter: times `import app`, the first request, the model becoming
+# ready and the warm-up finishing. The marker splits the import log into imports made before the first response and after.
+MARKER = '--- first response ---'
+PROFILE_SCRIPT = f"""
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app.test_client().get('/api/water_points')
+first_response = time.perf_counter()
+sys.stderr.write({MARKER!r} + '\\n')
+served = app.models.wait_loaded()
+model_ready = time.perf_counter()
+app.warm_up.done.wait(300)
+print('PROFILE', json.dumps({{'import_app': imported - started, 'first_response': first_response - started,
+                             'model_ready': model_ready - started, 'warmed_up': time.perf_counter() - started,
+                             'model_version': getattr(served, 'version', None)}}), flush=True)
+"""
+
+
+def parse_importtime(lines):
+    """
+    {top-level package: (seconds, phase)} from `-X importtime` output, where seconds is the
+    longest cumulative time of any of its modules (so it includes the package's own imports) and
+    phase says whether it was imported before the first response or in the background after it.
+    Cumulative times are wall-clock and stay meaningful when a background thread imports
+    concurrently; the per-module self times `-X importtime` also reports do not.
+    """
+    packages, phase = {}, 'startup'
+    for line in lines:
+        if line.strip() == MARKER:
+            phase = 'background'
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative_us, name = line[len('import time:'):].split('|')
+        package, seconds = name.strip().split('.')[0], int(cumulative_us) / 1e6
+        if seconds > packages.get(package, (0, None))[0]:
+            packages[package] = (seconds, packages.get(package, (0, phase))[1])
+    return packages
+
+
+def profile_startup(argv=None):
+    parser = argparse.ArgumentParser(prog='app.py --profile-startup')
+    parser.add_argument('--profile-startup', action='store_true')
+    parser.add_argument('--top', type=int, default=15, help="Packages to list.")
+    args = parser.parse_args(argv)
+
+    env = dict(os.environ, PYTHONWARNINGS='ignore')
+    child = subprocess.run([sys.executable, '-X', 'importtime', '-c', PROFILE_SCRIPT],
+                           cwd=BACKEND_DIR, env=env, capture_output=True, text=True)
+    if child.returncode != 0:
+        print(child.stderr[-2000:])
+        print(f"❌ Importing app.py failed (exit {child.returncode}).")
+        return 1
+    timings = json.loads(next(line for line in child.stdout.splitlines() if line.startswith('PROFILE '))[8:])
+    packages = parse_importtime(child.stderr.splitlines())
+
+    mode = 'lazy' if os.getenv('AQUALERT_LAZY_START') == '1' else 'eager'
+    print(f"⏱️ Startup profile ({mode} start, AQUALERT_LAZY_START={'1' if mode == 'lazy' else '0'})")
+    print(f"   import app           {timings['import_app'] * 1000:8.0f} ms")
+    print(f"   first response       {timings['first_response'] * 1000:8.0f} ms")
+    print(f"   model ready          {timings['model_ready'] * 1000:8.0f} ms  ({timings['model_version']})")
+    print(f"   warmed up (/readyz)  {timings['warmed_up'] * 1000:8.0f} ms")
+    print("\n   Slowest imports (cumulative, a package includes what it imports):")
+    for name, (seconds, phase) in sorted(packages.items(), key=lambda item: item[1][0], reverse=True)[:args.top]:
+        print(f"   {name:<28} {seconds * 1000:8.1f} ms  {phase}")
+    return 0
@@ -0,0 +1,112 @@
+# backend/state.py - VERSIONED, COPY-ON-WRITE SNAPSHOTS OF WATER-POINT STATE
+
+import threading
+import time
+from types import MappingProxyType
+
+
+class FrozenDict(dict):
+    """A dict that refuses mutation. Still a dict, so it serializes with jsonify as-is."""
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Snapshot points are immutable; write through WaterPointState instead.")
+
+    __setitem__ = __delitem__ = clear = pop = popitem = setdefault = update = _immutable
+
+    def __copy__(self):
+        return dict(self)
+
+
+def freeze_point(point):
+    history = FrozenDict({k: tuple(v) for k, v in point.get('history', {}).items()})
+    return FrozenDict(point, history=history)
+
+
+class Snapshot:
+    """An immutable view of every water point at one data version."""
+
+    __slots__ = ('version', 'by_id', 'points')
+
+    def __init__(self, version, by_id):
+        self.version = version
+        self.by_id = MappingProxyType(by_id)
+        self.points = tuple(by_id.values())
+
+
+class WaterPointState:
+    """
+    Readers call snapshot() and get an immutable Snapshot without taking a lock; it stays valid
+    (and unchanged) for as long as they hold it. Writers go through the store's compare-and-set
+    writes, then publish a new Snapshot that shares every unchanged point with the previous one
+    and swaps in with a single reference assignment.
+
+    Other worker processes writing to the same database are picked up by comparing the store's
+    data version at most every `refresh_interval` seconds.
+    """
+
+    def __init__(self, store, refresh_interval=0.5):
+        self._store = store
+        self._refresh_interval = refresh_interval
+        self._publish_lock = threading.Lock()
+        self._listeners = []
+        self._snapshot = Snapshot(0, {})
+        self._checked_at = 0.0
+        self.refresh()
+
+    def subscribe(self, listener):
+        """
+        Calls `listener(changed_points, removed_ids)` after each published snapshot. Listeners run
+        under the publish lock, so they see updates in version order; they must be quick and must
+        not write through this state.
+        """
+        self._listeners.append(listener)
+
+    def snapshot(self):
+        now = time.monotonic()
+        if now - self._checked_at >= self._refresh_interval:
+            self._checked_at = now
+            if self._store.data_version() != self._snapshot.version:
+                return self.refresh()
+        return self._snapshot
+
+    def refresh(self):
+        """Loads points changed since the current snapshot and publishes the next one."""
+        with self._publish_lock:
+            current = self._snapshot
+            version, changed, removed, full = self._store.changes_since(current.version)
+            if version == current.version and not full:
+                return current
+            if full:  # the store was reset or restored: start over, and drop the points it no longer has
+                removed = sorted(current.by_id.keys() - {point['id'] for point in changed})
+            by_id = {} if full else dict(current.by_id)
+            for point in changed:
+                by_id[point['id']] = freeze_point(point)
+            for point_id in removed:
+                by_id.pop(point_id, None)
+            published = self._snapshot = Snapshot(version, dict(sorted(by_id.items())))
+            for listener in self._listeners:
+                listener(changed, removed)
+        return published
+
+    # --- WRITES ---
+    def set_status_if(self, point_id, expected, new_status, reason=None, expected_version=None):
+        """Compare-and-set on a point's status (and optionally its row version). True if it applied."""
+        applied = self._store.set_status_if(point_id, expected, new_status, reason, expected_version)
+        if applied:
+            self.refresh()
+        return applied
+
+    def upsert(self, point):
+        point_id = self._store.upsert_point(point)
+        return self.refresh().by_id[point_id]
+
+    def delete(self, point_id):
+        deleted = self._store.delete_point(point_id)
+        if deleted:
+            self.refresh()
+        return deleted
+
+    def record_tests(self, results):
+        self._store.record_tests(results)
+        if any(r.get('point_id') is not None for r in results):
+            self.refresh()
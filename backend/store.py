@@ -0,0 +1,505 @@
+# backend/store.py - PERSISTENT SQLITE (WAL) STORE FOR WATER POINTS AND TEST RESULTS
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from features import DEFAULT_FEATURES as FEATURE_COLUMNS
+
+# Materialized rollups of test_results, kept current by record_tests() in the same transaction
+# as the insert. These statements rebuild them from scratch (migration 4 and `manage.py`).
+ROLLUP_METRICS = ('count', 'sulfate_count', 'sulfate_sum', 'sulfate_min', 'sulfate_max', 'unsafe_count')
+_ROLLUP_AGGREGATES = """COUNT(*), COUNT(Sulfate), TOTAL(Sulfate), MIN(Sulfate), MAX(Sulfate),
+           SUM(prediction = 'Not Potable')"""
+SQL_REBUILD_REGION_DAY = f"""
+    INSERT INTO rollup_region_day (day, region, {', '.join(ROLLUP_METRICS)})
+    SELECT date(recorded_at, 'unixepoch'), COALESCE(region, 'Unknown'), {_ROLLUP_AGGREGATES}
+    FROM test_results GROUP BY 1, 2
+"""
+SQL_REBUILD_POINT_HOUR = f"""
+    INSERT INTO rollup_point_hour (point_id, hour, {', '.join(ROLLUP_METRICS)})
+    SELECT point_id, CAST(recorded_at / 3600 AS INTEGER) * 3600, {_ROLLUP_AGGREGATES}
+    FROM test_results WHERE point_id IS NOT NULL GROUP BY 1, 2
+"""
+
+# Schema migrations, applied in order. PRAGMA user_version records how many have run.
+MIGRATIONS = [
+    """
+    CREATE TABLE points (
+        id INTEGER PRIMARY KEY,
+        name TEXT NOT NULL,
+        lat REAL NOT NULL,
+        lon REAL NOT NULL,
+        status TEXT NOT NULL,
+        verified INTEGER NOT NULL DEFAULT 0,
+        region TEXT,
+        updated_at REAL NOT NULL
+    );
+    CREATE INDEX idx_points_status ON points(status);
+
+    CREATE TABLE test_results (
+        id INTEGER PRIMARY KEY,
+        point_id INTEGER REFERENCES points(id),
+        recorded_at REAL NOT NULL,
+        region TEXT,
+        lat REAL,
+        lon REAL,
+        prediction TEXT NOT NULL,
+        potable_confidence REAL,
+        """ + ",\n        ".join(f"{col} REAL" for col in FEATURE_COLUMNS) + """
+    );
+    CREATE INDEX idx_results_point_time ON test_results(point_id, recorded_at);
+    CREATE INDEX idx_results_time ON test_results(recorded_at);
+
+    CREATE TABLE status_changes (
+        id INTEGER PRIMARY KEY,
+        point_id INTEGER NOT NULL REFERENCES points(id),
+        old_status TEXT,
+        new_status TEXT NOT NULL,
+        reason TEXT,
+        changed_at REAL NOT NULL
+    );
+    CREATE INDEX idx_status_changes_point ON status_changes(point_id, changed_at);
+    """,
+    # Monotonic data version: every write that changes what /api/water_points returns bumps it
+    # and stamps the affected rows, so readers can tell what changed since a given version.
+    """
+    CREATE TABLE meta (key TEXT PRIMARY KEY, value INTEGER NOT NULL);
+    INSERT INTO meta (key, value) VALUES ('data_version', 1);
+    ALTER TABLE points ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+    CREATE INDEX idx_points_version ON points(version);
+    """,
+    # Deleted points are kept as tombstones so delta readers learn about the removal.
+    """
+    ALTER TABLE points ADD COLUMN deleted INTEGER NOT NULL DEFAULT 0;
+    """,
+    # Rollups per region x UTC day (dashboard) and per point x hour (point trends).
+    """
+    CREATE TABLE rollup_region_day (
+        day TEXT NOT NULL,
+        region TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        sulfate_count INTEGER NOT NULL,
+        sulfate_sum REAL NOT NULL,
+        sulfate_min REAL,
+        sulfate_max REAL,
+        unsafe_count INTEGER NOT NULL,
+        PRIMARY KEY (day, region)
+    ) WITHOUT ROWID;
+    CREATE TABLE rollup_point_hour (
+        point_id INTEGER NOT NULL,
+        hour INTEGER NOT NULL,
+        count INTEGER NOT NULL,
+        sulfate_count INTEGER NOT NULL,
+        sulfate_sum REAL NOT NULL,
+        sulfate_min REAL,
+        sulfate_max REAL,
+        unsafe_count INTEGER NOT NULL,
+        PRIMARY KEY (point_id, hour)
+    ) WITHOUT ROWID;
+    """ + SQL_REBUILD_REGION_DAY + ";" + SQL_REBUILD_POINT_HOUR,
+]
+
+# How many recent readings each point exposes as `history` on the map.
+HISTORY_LENGTH = 4
+
+POINT_COLUMNS = ('id', 'name', 'lat', 'lon', 'status', 'verified', 'region', 'version')
+RESULT_COLUMNS = ('point_id', 'recorded_at', 'region', 'lat', 'lon', 'prediction', 'potable_confidence', *FEATURE_COLUMNS)
+
+# Statements are kept as module constants so sqlite3's per-connection statement cache reuses
+# the prepared form on every call.
+SQL_SELECT_POINTS = f"SELECT {', '.join(POINT_COLUMNS)} FROM points WHERE deleted = 0 ORDER BY id"
+SQL_SELECT_POINT = f"SELECT {', '.join(POINT_COLUMNS)} FROM points WHERE id = ? AND deleted = 0"
+SQL_SELECT_POINTS_SINCE = f"SELECT {', '.join(POINT_COLUMNS)}, deleted FROM points WHERE version > ? ORDER BY id"
+SQL_DELETE_POINT = """
+    UPDATE points SET deleted = 1, updated_at = ?, version = (SELECT value + 1 FROM meta WHERE key = 'data_version')
+    WHERE id = ? AND deleted = 0
+"""
+SQL_DATA_VERSION = "SELECT value FROM meta WHERE key = 'data_version'"
+SQL_BUMP_VERSION = "UPDATE meta SET value = value + 1 WHERE key = 'data_version'"
+SQL_STAMP_POINT = "UPDATE points SET version = ? WHERE id = ?"
+# Driven from points: for each one, a LIMIT probe of idx_results_point_time finds the time of its
+# HISTORY_LENGTH-th latest reading, then a range scan of the same index returns the readings from
+# then on. Each point costs a few index seeks however long its history is. Readings that tie on
+# recorded_at can return a few extra rows; list_points() keeps the latest HISTORY_LENGTH.
+SQL_SELECT_HISTORY = f"""
+    SELECT p.id AS point_id, t.Sulfate, t.Turbidity FROM points p
+    JOIN test_results t ON t.point_id = p.id AND t.recorded_at >= (
+        SELECT MIN(recorded_at) FROM (
+            SELECT recorded_at FROM test_results WHERE point_id = p.id ORDER BY recorded_at DESC LIMIT {HISTORY_LENGTH}
+        )
+    )
+    WHERE p.deleted = 0
+    ORDER BY p.id, t.recorded_at
+"""
+SQL_SELECT_POINT_HISTORY = f"""
+    SELECT Sulfate, Turbidity FROM (
+        SELECT Sulfate, Turbidity, recorded_at FROM test_results
+        WHERE point_id = ? ORDER BY recorded_at DESC LIMIT {HISTORY_LENGTH}
+    ) ORDER BY recorded_at
+"""
+SQL_UPSERT_POINT = """
+    INSERT INTO points (id, name, lat, lon, status, verified, region, updated_at, version)
+    VALUES (:id, :name, :lat, :lon, :status, :verified, :region, :updated_at, :version)
+    ON CONFLICT(id) DO UPDATE SET name = excluded.name, lat = excluded.lat, lon = excluded.lon,
+        status = excluded.status, verified = excluded.verified, region = excluded.region,
+        updated_at = excluded.updated_at, version = excluded.version, deleted = 0
+"""
+# Compare-and-set: applies only if the status (and, when given, the row version) still match.
+SQL_SET_STATUS_IF = """
+    UPDATE points SET status = ?, updated_at = ?, version = (SELECT value + 1 FROM meta WHERE key = 'data_version')
+    WHERE id = ? AND deleted = 0 AND status = ? AND (? IS NULL OR version = ?)
+"""
+SQL_INSERT_STATUS_CHANGE = "INSERT INTO status_changes (point_id, old_status, new_status, reason, changed_at) VALUES (?, ?, ?, ?, ?)"
+SQL_INSERT_RESULT = f"INSERT INTO test_results ({', '.join(RESULT_COLUMNS)}) VALUES ({', '.join('?' * len(RESULT_COLUMNS))})"
+# Adds a batch's partial aggregates onto a rollup row. MIN/MAX ignore a missing side.
+_ROLLUP_MERGE = """count = count + excluded.count, sulfate_count = sulfate_count + excluded.sulfate_count,
+        sulfate_sum = sulfate_sum + excluded.sulfate_sum,
+        sulfate_min = COALESCE(MIN(sulfate_min, excluded.sulfate_min), sulfate_min, excluded.sulfate_min),
+        sulfate_max = COALESCE(MAX(sulfate_max, excluded.sulfate_max), sulfate_max, excluded.sulfate_max),
+        unsafe_count = unsafe_count + excluded.unsafe_count"""
+SQL_MERGE_REGION_DAY = f"""
+    INSERT INTO rollup_region_day (day, region, {', '.join(ROLLUP_METRICS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(day, region) DO UPDATE SET {_ROLLUP_MERGE}
+"""
+SQL_MERGE_POINT_HOUR = f"""
+    INSERT INTO rollup_point_hour (point_id, hour, {', '.join(ROLLUP_METRICS)}) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+    ON CONFLICT(point_id, hour) DO UPDATE SET {_ROLLUP_MERGE}
+"""
+# Time buckets for the community summary, as SQLite date expressions over the rollups' UTC day.
+# Weeks start on Monday.
+GRANULARITIES = {
+    'day': "{day}",
+    'week': "date({day}, '-6 days', 'weekday 1')",
+    'month': "strftime('%Y-%m-01', {day})",
+}
+_ROLLUP_SUMMARY = """SUM(count) AS count, SUM(sulfate_count) AS sulfate_count,
+           SUM(sulfate_sum) / NULLIF(SUM(sulfate_count), 0) AS sulfate_mean,
+           MIN(sulfate_min) AS sulfate_min, MAX(sulfate_max) AS sulfate_max, SUM(unsafe_count) AS unsafe_count"""
+SQL_SUMMARIZE_TESTS = """
+    SELECT {bucket} AS period, region, """ + _ROLLUP_SUMMARY + """
+    FROM rollup_region_day
+    WHERE day >= ? AND day <= ? AND (? IS NULL OR region = ?)
+    GROUP BY period, region ORDER BY period, region
+"""
+SQL_SUMMARIZE_POINT = """
+    SELECT hour, """ + _ROLLUP_SUMMARY + """
+    FROM rollup_point_hour WHERE point_id = ? AND hour >= ? AND hour < ?
+    GROUP BY hour ORDER BY hour
+"""
+SQL_SELECT_REGIONS = "SELECT DISTINCT region FROM rollup_region_day ORDER BY region"
+EXPORT_COLUMNS = ('id', *RESULT_COLUMNS)
+SQL_EXPORT_TESTS = f"""
+    SELECT {', '.join(EXPORT_COLUMNS)} FROM test_results
+    WHERE recorded_at >= ? AND recorded_at < ? AND (? IS NULL OR COALESCE(region, 'Unknown') = ?)
+    ORDER BY recorded_at
+"""
+
+
+class WaterStore:
+    """
+    Single-file SQLite store in WAL mode, so readers never block the writer and several worker
+    processes can share one database. Each thread (and each forked process) gets its own
+    connection; writes run in short BEGIN IMMEDIATE transactions and batches use executemany.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        with self.write() as conn:
+            self._migrate(conn)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, cached_statements=256)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA foreign_keys=ON")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def close(self):
+        """Closes this thread's connection, e.g. in a parent process before it forks workers."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def write(self):
+        """A write transaction; takes the database write lock up front to avoid upgrade deadlocks."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def read(self):
+        return self._conn()
+
+    @contextmanager
+    def read_snapshot(self):
+        """A read transaction: every query inside sees the same committed state."""
+        conn = self._conn()
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        finally:
+            conn.execute("COMMIT")
+
+    def data_version(self, conn=None):
+        return (conn or self.read()).execute(SQL_DATA_VERSION).fetchone()[0]
+
+    @staticmethod
+    def _next_version(conn):
+        conn.execute(SQL_BUMP_VERSION)
+        return conn.execute(SQL_DATA_VERSION).fetchone()[0]
+
+    def _migrate(self, conn):
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for i, script in enumerate(MIGRATIONS[version:], start=version + 1):
+            for statement in script.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {i}")
+
+    # --- POINTS ---
+    def is_empty(self):
+        return self.read().execute("SELECT 1 FROM points LIMIT 1").fetchone() is None
+
+    def list_points(self):
+        """All points in the shape the map expects, each with its recent Sulfate/Turbidity history."""
+        conn = self.read()
+        points = [self._point_dict(row) for row in conn.execute(SQL_SELECT_POINTS)]
+        by_id = {p['id']: p for p in points}
+        for row in conn.execute(SQL_SELECT_HISTORY):
+            history = by_id[row['point_id']]['history']
+            history['Sulfate'].append(row['Sulfate'])
+            history['Turbidity'].append(row['Turbidity'])
+        for point in points:
+            for readings in point['history'].values():
+                del readings[:-HISTORY_LENGTH]
+        return points
+
+    def get_point(self, point_id, with_history=True):
+        conn = self.read()
+        row = conn.execute(SQL_SELECT_POINT, (point_id,)).fetchone()
+        if row is None:
+            return None
+        point = self._point_dict(row)
+        if with_history:
+            self._load_history(conn, point)
+        return point
+
+    @staticmethod
+    def _load_history(conn, point):
+        for reading in conn.execute(SQL_SELECT_POINT_HISTORY, (point['id'],)):
+            point['history']['Sulfate'].append(reading['Sulfate'])
+            point['history']['Turbidity'].append(reading['Turbidity'])
+
+    def changes_since(self, version):
+        """
+        Returns (current_version, changed_points, removed_ids, full) for everything that changed
+        after `version`, from one consistent read. With `full`, changed_points is every point and
+        replaces what the caller has: for version 0 ("everything"), and for a version newer than
+        the store's, which the caller can only have seen before the database was reset or restored.
+        """
+        with self.read_snapshot() as conn:
+            current = self.data_version(conn)
+            if current == version:
+                return current, [], [], False
+            if version == 0 or version > current:
+                return current, self.list_points(), [], True
+            changed, removed = [], []
+            for row in conn.execute(SQL_SELECT_POINTS_SINCE, (version,)).fetchall():
+                if row['deleted']:
+                    removed.append(row['id'])
+                    continue
+                point = self._point_dict(row)
+                del point['deleted']
+                self._load_history(conn, point)
+                changed.append(point)
+            return current, changed, removed, False
+
+    @staticmethod
+    def _point_dict(row):
+        point = dict(row)
+        point['verified'] = bool(point['verified'])
+        point['history'] = {'Sulfate': [], 'Turbidity': []}
+        return point
+
+    def upsert_point(self, point):
+        """Inserts or replaces a point; a missing id is allocated by SQLite. Returns the id."""
+        row = {'id': point.get('id'), 'name': point['name'], 'lat': point['lat'], 'lon': point['lon'],
+               'status': point.get('status', 'Potable'), 'verified': int(bool(point.get('verified'))),
+               'region': point.get('region'), 'updated_at': time.time()}
+        with self.write() as conn:
+            row['version'] = self._next_version(conn)
+            cursor = conn.execute(SQL_UPSERT_POINT, row)
+            return row['id'] if row['id'] is not None else cursor.lastrowid
+
+    def delete_point(self, point_id):
+        """Tombstones a point. True if it existed."""
+        with self.write() as conn:
+            if conn.execute(SQL_DELETE_POINT, (time.time(), point_id)).rowcount == 0:
+                return False
+            self._next_version(conn)
+            return True
+
+    def set_status_if(self, point_id, expected, new_status, reason=None, expected_version=None):
+        """
+        Compare-and-set on a point's status, logging the change. With `expected_version` the write
+        also fails if the row changed at all since the caller read it. True if it applied.
+        """
+        now = time.time()
+        with self.write() as conn:
+            params = (new_status, now, point_id, expected, expected_version, expected_version)
+            if conn.execute(SQL_SET_STATUS_IF, params).rowcount == 0:
+                return False
+            self._next_version(conn)
+            conn.execute(SQL_INSERT_STATUS_CHANGE, (point_id, expected, new_status, reason, now))
+            return True
+
+    # --- TEST RESULTS ---
+    @staticmethod
+    def _result_row(result):
+        return tuple(result.get(col) for col in RESULT_COLUMNS)
+
+    @staticmethod
+    def _insert_results(conn, results):
+        """Inserts test results and folds them into the rollups, one merge per touched bucket."""
+        conn.executemany(SQL_INSERT_RESULT, [WaterStore._result_row(r) for r in results])
+        by_region_day, by_point_hour = {}, {}
+        for r in results:
+            recorded_at = r['recorded_at']
+            day = datetime.fromtimestamp(recorded_at, timezone.utc).date().isoformat()
+            _accumulate(by_region_day, (day, r.get('region') or 'Unknown'), r)
+            if r.get('point_id') is not None:
+                _accumulate(by_point_hour, (r['point_id'], int(recorded_at // 3600) * 3600), r)
+        conn.executemany(SQL_MERGE_REGION_DAY, [(*key, *metrics) for key, metrics in by_region_day.items()])
+        conn.executemany(SQL_MERGE_POINT_HOUR, [(*key, *metrics) for key, metrics in by_point_hour.items()])
+
+    def record_tests(self, results):
+        """Stores a batch of test results and updates the rollups in one transaction (executemany)."""
+        if not results:
+            return
+        point_ids = {r['point_id'] for r in results if r.get('point_id') is not None}
+        with self.write() as conn:
+            self._insert_results(conn, results)
+            if point_ids:
+                # New readings change those points' `history`, so they count as point changes.
+                version = self._next_version(conn)
+                conn.executemany(SQL_STAMP_POINT, [(version, point_id) for point_id in point_ids])
+
+    def record_test(self, result):
+        self.record_tests([result])
+
+    def summarize_tests(self, start_day, end_day, region=None, granularity='day'):
+        """
+        Test results from UTC day `start_day` through `end_day` (ISO dates, inclusive) per time
+        bucket and region: count, Sulfate count/mean/min/max and number of unsafe verdicts. Reads
+        the region x day rollup, so the cost depends on the number of days, not of tests.
+        """
+        sql = SQL_SUMMARIZE_TESTS.format(bucket=GRANULARITIES[granularity].format(day='day'))
+        rows = self.read().execute(sql, (start_day, end_day, region, region)).fetchall()
+        return [dict(row) for row in rows]
+
+    def summarize_point(self, point_id, start_ts, end_ts):
+        """Hourly rollups of one point's test results in [start_ts, end_ts)."""
+        rows = self.read().execute(SQL_SUMMARIZE_POINT, (point_id, start_ts, end_ts)).fetchall()
+        return [dict(row) for row in rows]
+
+    def list_regions(self):
+        return [row['region'] for row in self.read().execute(SQL_SELECT_REGIONS)]
+
+    def export_tests(self, start_ts, end_ts, region=None):
+        """
+        Raw test results in [start_ts, end_ts) as a cursor of plain tuples in EXPORT_COLUMNS order,
+        so callers can stream them without holding the whole range in memory.
+        """
+        cursor = self.read().cursor()
+        cursor.row_factory = None
+        return cursor.execute(SQL_EXPORT_TESTS, (start_ts, end_ts, region, region))
+
+    # --- ROLLUP MAINTENANCE ---
+    def rebuild_rollups(self):
+        """Recomputes both rollup tables from test_results in one transaction."""
+        with self.write() as conn:
+            conn.execute("DELETE FROM rollup_region_day")
+            conn.execute("DELETE FROM rollup_point_hour")
+            conn.execute(SQL_REBUILD_REGION_DAY)
+            conn.execute(SQL_REBUILD_POINT_HOUR)
+
+    def check_rollups(self):
+        """
+        Compares the rollups with a full recomputation from test_results. Returns a list of
+        (table, key, stored, expected) mismatches; empty means consistent. Scans all history.
+        """
+        mismatches = []
+        with self.read_snapshot() as conn:
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_region_day AS SELECT * FROM main.rollup_region_day WHERE 0")
+            conn.execute("CREATE TEMP TABLE IF NOT EXISTS rollup_point_hour AS SELECT * FROM main.rollup_point_hour WHERE 0")
+            try:
+                for table, rebuild, key_columns in (('rollup_region_day', SQL_REBUILD_REGION_DAY, ('day', 'region')),
+                                                    ('rollup_point_hour', SQL_REBUILD_POINT_HOUR, ('point_id', 'hour'))):
+                    # Unqualified names resolve to the temp tables, so the rebuild lands there.
+                    conn.execute(rebuild)
+                    stored, expected = ({tuple(row)[:2]: tuple(row)[2:] for row in conn.execute(
+                                            f"SELECT {', '.join(key_columns)}, {', '.join(ROLLUP_METRICS)} FROM {schema}.{table}")}
+                                        for schema in ('main', 'temp'))
+                    for key in sorted(stored.keys() | expected.keys(), key=repr):
+                        if not _same_metrics(stored.get(key), expected.get(key)):
+                            mismatches.append((table, key, stored.get(key), expected.get(key)))
+            finally:
+                conn.execute("DROP TABLE temp.rollup_region_day")
+                conn.execute("DROP TABLE temp.rollup_point_hour")
+        return mismatches
+
+    def seed(self, points):
+        """Loads demo points (and their `history` as weekly test results) into an empty store."""
+        now = time.time()
+        week = 7 * 24 * 3600
+        results = []
+        with self.write() as conn:
+            version = self._next_version(conn)
+            for point in points:
+                conn.execute(SQL_UPSERT_POINT, {'id': point['id'], 'name': point['name'], 'lat': point['lat'],
+                                                'lon': point['lon'], 'status': point['status'],
+                                                'verified': int(point['verified']), 'region': point.get('region'),
+                                                'updated_at': now, 'version': version})
+                history = point.get('history', {})
+                readings = list(zip(history.get('Sulfate', []), history.get('Turbidity', [])))
+                results.extend({'point_id': point['id'], 'recorded_at': now - (len(readings) - i) * week,
+                                'region': point.get('region'), 'lat': point['lat'], 'lon': point['lon'],
+                                'prediction': point['status'], 'Sulfate': sulfate, 'Turbidity': turbidity}
+                               for i, (sulfate, turbidity) in enumerate(readings))
+            self._insert_results(conn, results)
+
+
+def _accumulate(buckets, key, result):
+    """Adds one test result to the partial aggregates of `key` (in ROLLUP_METRICS order)."""
+    count, sulfate_count, sulfate_sum, sulfate_min, sulfate_max, unsafe_count = buckets.get(key, (0, 0, 0.0, None, None, 0))
+    sulfate = result.get('Sulfate')
+    if sulfate is not None:
+        sulfate_count += 1
+        sulfate_sum += sulfate
+        sulfate_min = sulfate if sulfate_min is None else min(sulfate_min, sulfate)
+        sulfate_max = sulfate if sulfate_max is None else max(sulfate_max, sulfate)
+    unsafe_count += result.get('prediction') == 'Not Potable'
+    buckets[key] = (count + 1, sulfate_count, sulfate_sum, sulfate_min, sulfate_max, unsafe_count)
+
+
+def _same_metrics(stored, expected):
+    # Sums may differ in the last bits depending on the order values were added in.
+    if stored is None or expected is None:
+        return stored is expected
+    return all(a == b or (isinstance(a, float) and math.isclose(a, b, rel_tol=1e-9)) for a, b in zip(stored, expected))
@@ -0,0 +1,6 @@
+# backend/tests/conftest.py - LETS THE TESTS IMPORT THE BACKEND MODULES (run: python -m pytest backend/tests)
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,26 @@
+# backend/tests/test_offline_advisory.py - EVERY OUT-OF-RANGE READING GETS AN ADVISORY, IN EVERY LANGUAGE
+
+import pytest
+
+from offline_advisory import LANGUAGES, SAFE_RANGES, TEXT, findings, offline_advisory
+
+CONFIDENCE = {'Potable': 0.4, 'Not Potable': 0.6}
+# One reading below and one above every safe range, i.e. every (parameter, level) findings() can report.
+READINGS = [(name, 'low', low - 1) for name, (low, _, _) in SAFE_RANGES.items()] + \
+           [(name, 'high', high + 1) for name, (_, high, _) in SAFE_RANGES.items()]
+
+
+@pytest.mark.parametrize('name, level, value', READINGS)
+@pytest.mark.parametrize('prediction', ['Potable', 'Not Potable'])
+def test_every_reading_outside_its_range_has_an_action(name, level, value, prediction):
+    assert findings({name: value}) == [(name, level, value)]
+    for lang in LANGUAGES:
+        advice = offline_advisory(prediction, CONFIDENCE, {name: value}, languages=(lang,))
+        expected = TEXT[lang]['actions'].get((name, level)) or TEXT[lang]['check'].format(name=TEXT[lang]['names'][name])
+        assert f"- {expected}" in advice
+
+
+def test_all_readings_at_once():
+    data = {name: value for name, _, value in READINGS[:len(SAFE_RANGES)]}
+    assert len(findings(data)) == len(SAFE_RANGES)
+    assert offline_advisory('Not Potable', CONFIDENCE, data).count('---') == 1
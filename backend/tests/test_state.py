@@ -0,0 +1,28 @@
+# backend/tests/test_state.py - WaterPointState SNAPSHOTS
+
+from state import WaterPointState
+from store import WaterStore
+
+
+def test_snapshot_starts_over_when_the_store_is_reset(tmp_path):
+    path = str(tmp_path / 'test.db')
+    store = WaterStore(path)
+    store.seed([{"id": i, "name": f"Point {i}", "lat": 18.5, "lon": -72.3, "status": "Potable", "verified": False,
+                 "region": "Ouest"} for i in (1, 2, 3)])
+    for _ in range(3):
+        store.set_status_if(1, store.get_point(1)['status'], 'Caution' if _ % 2 == 0 else 'Potable')
+    state = WaterPointState(store)
+    notified = []
+    state.subscribe(lambda changed, removed: notified.append(([p['id'] for p in changed], removed)))
+
+    # Restore an older, smaller database under the running state.
+    fresh = WaterStore(str(tmp_path / 'fresh.db'))
+    fresh.seed([{"id": 2, "name": "Point 2", "lat": 18.5, "lon": -72.3, "status": "Not Potable",
+                 "verified": False, "region": "Ouest"}])
+    assert fresh.data_version() < state.snapshot().version
+    state._store = fresh
+
+    snapshot = state.refresh()
+    assert snapshot.version == fresh.data_version()
+    assert list(snapshot.by_id) == [2] and snapshot.by_id[2]['status'] == 'Not Potable'
+    assert notified == [([2], [1, 3])]
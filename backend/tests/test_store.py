@@ -0,0 +1,53 @@
+# backend/tests/test_store.py - WaterStore READS
+
+import time
+
+import pytest
+
+from store import HISTORY_LENGTH, SQL_SELECT_HISTORY, WaterStore
+
+SAMPLE = {"ph": 7.0, "Sulfate": 330.0, "Turbidity": 4.0, "prediction": "Not Potable", "potable_confidence": 0.3}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WaterStore(str(tmp_path / 'test.db'))
+    store.seed([{"id": i, "name": f"Point {i}", "lat": 18.5, "lon": -72.3, "status": "Potable", "verified": False,
+                 "region": "Ouest", "history": {"Sulfate": [300, 301], "Turbidity": [1.0, 1.1]}} for i in (1, 2, 3)])
+    return store
+
+
+def test_history_is_the_latest_readings_per_point(store):
+    now = time.time()
+    store.record_tests([dict(SAMPLE, point_id=1, recorded_at=now + i, Sulfate=400 + i) for i in range(10)] +
+                       [dict(SAMPLE, point_id=2, recorded_at=now, Sulfate=500 + i) for i in range(6)])  # tied times
+    points = {p['id']: p for p in store.list_points()}
+    assert points[1]['history']['Sulfate'] == [406, 407, 408, 409]
+    assert len(points[2]['history']['Sulfate']) == HISTORY_LENGTH
+    assert points[3]['history']['Sulfate'] == [300, 301]
+    for point_id in (1, 3):
+        assert store.get_point(point_id)['history'] == points[point_id]['history']
+
+
+def test_history_read_cost_does_not_grow_with_test_results(store):
+    # Every step of the plan must be an index search: a SCAN of test_results would make each
+    # list_points() read the whole history.
+    plan = [row['detail'] for row in store.read().execute('EXPLAIN QUERY PLAN ' + SQL_SELECT_HISTORY)]
+    assert [step for step in plan if step.startswith('SCAN')] == ['SCAN p']
+    assert any('idx_results_point_time' in step for step in plan)
+
+
+def test_changes_since_a_newer_version_is_a_full_snapshot(store):
+    current = store.data_version()
+    assert store.changes_since(current) == (current, [], [], False)
+    # A client that synced before the database was reset or restored holds a version ahead of it.
+    version, changed, removed, full = store.changes_since(current + 5)
+    assert (version, removed, full) == (current, [], True)
+    assert [p['id'] for p in changed] == [1, 2, 3]
+
+
+def test_changes_since_an_older_version_is_a_delta(store):
+    before = store.data_version()
+    store.delete_point(2)
+    version, changed, removed, full = store.changes_since(before)
+    assert (version > before, changed, removed, full) == (True, [], [2], False)
@@ -0,0 +1,129 @@
+# backend/vision_cache.py - PERSISTENT CACHE OF VISION ANALYSES, KEYED BY IMAGE CONTENT
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS vision_cache (
+    image_sha256 TEXT NOT NULL,
+    variant TEXT NOT NULL,
+    analysis TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (image_sha256, variant)
+);
+CREATE INDEX IF NOT EXISTS vision_cache_last_used ON vision_cache(last_used);
+CREATE TABLE IF NOT EXISTS vision_cache_counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+INSERT OR IGNORE INTO vision_cache_counters VALUES ('hits', 0), ('misses', 0), ('evictions', 0)
+"""
+
+SQL_LOOKUP = "SELECT analysis FROM vision_cache WHERE image_sha256 = ? AND variant = ? AND created_at > ?"
+SQL_TOUCH = "UPDATE vision_cache SET last_used = ? WHERE image_sha256 = ? AND variant = ?"
+SQL_COUNT = "UPDATE vision_cache_counters SET value = value + ? WHERE name = ?"
+SQL_STORE = """
+INSERT OR REPLACE INTO vision_cache (image_sha256, variant, analysis, size, created_at, last_used)
+VALUES (?, ?, ?, ?, ?, ?)
+"""
+SQL_EXPIRE = "DELETE FROM vision_cache WHERE created_at <= ?"
+# Keeps the most recently used entries that fit in the size cap and drops the rest.
+SQL_EVICT = """
+DELETE FROM vision_cache WHERE rowid IN (
+    SELECT rowid FROM (SELECT rowid, SUM(size) OVER (ORDER BY last_used DESC, rowid DESC) AS kept
+                       FROM vision_cache)
+    WHERE kept > ?)
+"""
+SQL_STATS = "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM vision_cache WHERE created_at > ?"
+SQL_COUNTERS = "SELECT name, value FROM vision_cache_counters"
+
+
+def image_digest(image):
+    return hashlib.sha256(image).hexdigest()
+
+
+class VisionCache:
+    """
+    Vision model answers keyed by the SHA-256 of the (normalized) image plus a `variant` naming
+    the model and prompt, so a resubmitted photo costs a SQLite lookup instead of an LLM call.
+    It lives in its own SQLite file (WAL), so it survives restarts and every serve.py worker
+    shares it, hit/miss counters included. Entries expire after `ttl_seconds`, and the least
+    recently used ones are evicted once the analyses exceed `max_bytes`. Cache errors are
+    logged and treated as misses: the cache never fails a request.
+    """
+
+    def __init__(self, path, ttl_seconds=7 * 24 * 3600, max_bytes=64 * 1024 * 1024):
+        self.path = path
+        self.ttl = ttl_seconds
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        with self._write() as conn:
+            for statement in SCHEMA.split(';'):
+                conn.execute(statement)
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def close(self):
+        """Closes this thread's connection, e.g. in a parent process before it forks workers."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    @contextmanager
+    def _write(self):
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def get(self, image_sha256, variant):
+        now = time.time()
+        try:
+            with self._write() as conn:
+                row = conn.execute(SQL_LOOKUP, (image_sha256, variant, now - self.ttl)).fetchone()
+                if row is not None:
+                    conn.execute(SQL_TOUCH, (now, image_sha256, variant))
+                conn.execute(SQL_COUNT, (1, 'hits' if row is not None else 'misses'))
+        except sqlite3.Error as e:
+            print(f"⚠️ Vision cache lookup failed: {e}")
+            return None
+        return row[0] if row is not None else None
+
+    def put(self, image_sha256, variant, analysis):
+        size = len(analysis.encode('utf-8'))
+        if size > self.max_bytes:
+            return
+        now = time.time()
+        try:
+            with self._write() as conn:
+                conn.execute(SQL_EXPIRE, (now - self.ttl,))
+                conn.execute(SQL_STORE, (image_sha256, variant, analysis, size, now, now))
+                evicted = conn.execute(SQL_EVICT, (self.max_bytes,)).rowcount
+                if evicted:
+                    conn.execute(SQL_COUNT, (evicted, 'evictions'))
+        except sqlite3.Error as e:
+            print(f"⚠️ Vision cache store failed: {e}")
+
+    def stats(self):
+        conn = self._conn()
+        entries, size = conn.execute(SQL_STATS, (time.time() - self.ttl,)).fetchone()
+        counters = dict(conn.execute(SQL_COUNTERS).fetchall())
+        lookups = counters['hits'] + counters['misses']
+        return {'entries': entries, 'bytes': size, 'max_bytes': self.max_bytes, 'ttl_seconds': self.ttl,
+                'hits': counters['hits'], 'misses': counters['misses'], 'evictions': counters['evictions'],
+                'hit_ratio': round(counters['hits'] / lookups, 4) if lookups else None}
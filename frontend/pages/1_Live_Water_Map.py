@@ -91,14 +91,26 @@ st.markdown("""
 </div>
 """, unsafe_allow_html=True)
 
-@st.cache_data(ttl=30)  # Cache for 30 seconds for more frequent updates
 def get_water_points():
-    """Fetches water point data from the Flask backend."""
+    """
+    Delta-syncs water points from the Flask backend. Only points changed since the last sync are
+    downloaded, and an unchanged dataset costs a bodiless 304.
+    """
+    sync = st.session_state.setdefault("water_points_sync", {"version": 0, "etag": None, "points": {}})
+    headers = {"If-None-Match": sync["etag"]} if sync["etag"] else {}
     try:
-        response = requests.get(f"{FLASK_BACKEND_URL}/api/water_points", timeout=10)
+        response = requests.get(f"{FLASK_BACKEND_URL}/api/water_points", params={"since": sync["version"]}, headers=headers, timeout=10)
+        if response.status_code == 304:
+            return list(sync["points"].values())
         if response.status_code == 200:
-            data = response.json()
-            return data
+            delta = response.json()
+            points = {} if delta["full"] else dict(sync["points"])
+            for point in delta["changed"]:
+                points[point["id"]] = point
+            for point_id in delta["removed"]:
+                points.pop(point_id, None)
+            sync.update(version=delta["version"], etag=response.headers.get("ETag"), points=dict(sorted(points.items())))
+            return list(sync["points"].values())
         else:
             st.error(f"Backend returned status code: {response.status_code}")
             return None
@@ -148,6 +160,7 @@ with st.sidebar:
     # Refresh button
     if st.button("🔄 Refresh Data Now", type="primary"):
         st.cache_data.clear()
+        st.session_state.pop("water_points_sync", None)
         st.experimental_rerun()
 
 # Auto-refresh logic
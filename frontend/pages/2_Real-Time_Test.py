@@ -6,7 +6,6 @@ import plotly.graph_objects as go
 import plotly.express as px
 from datetime import datetime
 import json
-import time
 
 # Configuration
 FLASK_BACKEND_URL = "http://127.0.0.1:5000"
@@ -177,6 +176,27 @@ def get_safety_indicator(param_name, value):
     else:
         return "🔴 High", "danger"
 
+def stream_prediction(input_data):
+    """
+    Yields (event, data) from /predict/stream: 'verdict' first, then the instant offline 'draft'
+    advisory, then 'advice' pieces as Gemini writes them (source 'offline' when the fallback answers instead), then 'done' (or 'error'). A non-200 answer is yielded as ('http_error', response).
+    """
+    with requests.post(f"{FLASK_BACKEND_URL}/predict/stream", json=input_data, stream=True, timeout=(5, 60)) as response:
+        if response.status_code != 200:
+            yield 'http_error', response
+            return
+        event = 'message'
+        for line in response.iter_lines(decode_unicode=True):
+            if line.startswith('event:'):
+                event = line[len('event:'):].strip()
+            elif line.startswith('data:'):
+                yield event, json.loads(line[len('data:'):])
+            elif not line:
+                event = 'message'
+
+def advisory_html(text):
+    return f'<div style="background:linear-gradient(135deg, #667eea 0%, #764ba2 100%);color:white;padding:1.5rem;border-radius:10px;"><h4>🎯 Professional Recommendation</h4><p>{text}</p></div>'
+
 def create_parameter_radar_chart(input_data):
     categories, values, safe_ranges = [], [], []
     for param, value in input_data.items():
@@ -270,16 +290,20 @@ with st.form("prediction_form"):
 if submitted:
     input_data = {"ph": ph, "Hardness": hardness, "Solids": solids, "Chloramines": chloramines, "Sulfate": sulfate, "Conductivity": conductivity, "Organic_carbon": organic_carbon, "Trihalomethanes": trihalomethanes, "Turbidity": turbidity}
     
-    with st.spinner("🔄 Analyzing water sample with AI... Please wait."):
-        progress_bar = st.progress(0)
-        for i in range(100):
-            time.sleep(0.01)
-            progress_bar.progress(i + 1)
-        try:
-            response = requests.post(f"{FLASK_BACKEND_URL}/predict", json=input_data, timeout=30)
-            if response.status_code == 200:
-                result = response.json()
-                progress_bar.empty()
+    try:
+        # The verdict arrives as the first event, so the results render as soon as the model has
+        # scored the sample; the advisory then fills in piece by piece below them.
+        status = st.empty()
+        status.info("🔄 Analyzing water sample with AI... Please wait.")
+        advisory_text, advisory_box, drafted, advisory_source = '', None, False, None
+        for event, data in stream_prediction(input_data):
+            if event == 'http_error':
+                status.empty()
+                st.error(f"❌ Server Error: {data.status_code} - {data.text}")
+                break
+            if event == 'verdict':
+                status.empty()
+                result = data
                 st.markdown("## 📊 Analysis Results")
                 prediction = result.get('prediction', 'N/A')
                 confidence = result.get('confidence', {})
@@ -287,7 +311,7 @@ if submitted:
                     st.markdown('<div class="safe-result"><h2>✅ WATER IS SAFE TO DRINK</h2><p>The analysis indicates this water sample meets safety standards for consumption.</p></div>', unsafe_allow_html=True)
                 else:
                     st.markdown('<div class="unsafe-result"><h2>⚠️ WATER MAY NOT BE SAFE</h2><p>The analysis indicates potential safety concerns with this water sample.</p></div>', unsafe_allow_html=True)
-                
+
                 st.markdown("### 🎯 Confidence Analysis")
                 col_conf1, col_conf2 = st.columns(2)
                 with col_conf1:
@@ -297,10 +321,17 @@ if submitted:
                     unsafe_conf = confidence.get('Not Potable', 100.0 - potable_conf)
                     st.markdown(f"""<div style="background:#f8f9fa;padding:1rem;border-radius:8px;"><h4 style="color:#dc3545;">🔴 Unsafe Water Confidence</h4><div style="font-size:2em;font-weight:bold;">{unsafe_conf:.1f}%</div></div>""", unsafe_allow_html=True)
 
+                if result.get('alert_message'):
+                    st.markdown(f'<div class="alert-banner"><h4>🚨 Important Notice</h4><p>{result["alert_message"]}</p></div>', unsafe_allow_html=True)
+
+                st.markdown("### 🤖 AI Public Health Advisory")
+                advisory_box = st.empty()
+                advisory_box.markdown(advisory_html("🤖 Preparing the AI advisory..."), unsafe_allow_html=True)
+
                 st.markdown("### 📈 Parameter Analysis")
                 radar_chart = create_parameter_radar_chart(input_data)
                 st.plotly_chart(radar_chart, use_container_width=True)
-                
+
                 st.markdown("### 🔍 Detailed Parameter Assessment")
                 params_list = []
                 for param, value in input_data.items():
@@ -309,26 +340,32 @@ if submitted:
                         indicator, _ = get_safety_indicator(param, value)
                         params_list.append({"Parameter": param.replace('_', ' ').title(), "Value": f"{value} {param_info['unit']}", "Safe Range": f"{param_info['safe_min']}-{param_info['safe_max']} {param_info['unit']}", "Status": indicator})
                 st.dataframe(pd.DataFrame(params_list), use_container_width=True, hide_index=True)
-                
-                st.markdown("### 🤖 AI Public Health Advisory")
-                advisory_text = result.get('gemini_advice', 'No advisory available.')
-                st.markdown(f'<div style="background:linear-gradient(135deg, #667eea 0%, #764ba2 100%);color:white;padding:1.5rem;border-radius:10px;"><h4>🎯 Professional Recommendation</h4><p>{advisory_text}</p></div>', unsafe_allow_html=True)
-                
-                if result.get('alert_message'):
-                    st.markdown(f'<div class="alert-banner"><h4>🚨 Important Notice</h4><p>{result["alert_message"]}</p></div>', unsafe_allow_html=True)
-                
+
                 st.markdown("### 📥 Export Results")
                 export_data = {"timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "prediction": prediction, "confidence_safe": potable_conf, "location": location, "source": sample_source, **input_data}
                 st.download_button("📄 Download JSON Report", json.dumps(export_data, indent=2), f"water_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json", "application/json")
                 st.download_button("📊 Download CSV Data", pd.DataFrame([export_data]).to_csv(index=False), f"water_data_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv", "text/csv")
-            else:
-                st.error(f"❌ Server Error: {response.status_code} - {response.text}")
-        except requests.exceptions.ConnectionError:
-            st.error("🔌 Could not connect to the backend. Please ensure the Flask server is running.")
-        except requests.exceptions.Timeout:
-            st.error("⏱️ Request timed out. Please try again.")
-        except Exception as e:
-            st.error(f"❌ An unexpected error occurred: {str(e)}")
+            elif event == 'draft' and advisory_box is not None:
+                advisory_text, drafted = data['text'], True
+                advisory_box.markdown(advisory_html(advisory_text + "<br><em>🤖 The AI advisor is refining this advice...</em>"), unsafe_allow_html=True)
+            elif event == 'advice' and advisory_box is not None:
+                if drafted:  # the first piece of the final advisory replaces the draft
+                    advisory_text, drafted = '', False
+                advisory_text += data['text']
+                advisory_source = data.get('source')
+                advisory_box.markdown(advisory_html(advisory_text + " ▌"), unsafe_allow_html=True)
+            elif event == 'done' and advisory_box is not None:
+                if advisory_source == 'offline':  # Gemini was unavailable: say the advice is the rule-based fallback
+                    advisory_text += "<br><em>📴 The AI advisor is unavailable right now: this is the automatic offline advisory, built from your readings.</em>"
+                advisory_box.markdown(advisory_html(advisory_text or 'No advisory available.'), unsafe_allow_html=True)
+            elif event == 'error' and advisory_box is not None:
+                advisory_box.markdown(advisory_html(f"{advisory_text}<br><em>{data['error']}</em>"), unsafe_allow_html=True)
+    except requests.exceptions.ConnectionError:
+        st.error("🔌 Could not connect to the backend. Please ensure the Flask server is running.")
+    except requests.exceptions.Timeout:
+        st.error("⏱️ Request timed out. Please try again.")
+    except Exception as e:
+        st.error(f"❌ An unexpected error occurred: {str(e)}")
 
 st.markdown("---")
 st.markdown('<div style="text-align: center; color: #666; padding: 2rem;"><p>🔬 AquaLERT Real-Time Water Quality Analysis</p><p>Powered by Advanced AI & Machine Learning</p></div>', unsafe_allow_html=True)
\ No newline at end of file
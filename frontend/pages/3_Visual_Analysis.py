@@ -1,7 +1,6 @@
 # frontend/pages/3_📸_Visual_Analysis.py
 import streamlit as st
 import requests
-import base64
 import time
 from PIL import Image
 import io
@@ -309,6 +308,10 @@ if uploaded_file is not None:
     col_btn1, col_btn2, col_btn3 = st.columns([1, 2, 1])
     
     with col_btn2:
+        ask_gemini = st.checkbox(
+            "Always ask Gemini",
+            help="By default a quick local pre-screen answers clear-cut photos and only ambiguous ones go to Gemini"
+        )
         analyze_button = st.button(
             "🤖 Analyze Image with AI", 
             type="primary", 
@@ -328,17 +331,16 @@ if uploaded_file is not None:
                 progress_bar.progress(25)
                 time.sleep(0.5)
                 
-                # Encode image to base64
+                # Send the file as-is (multipart) instead of base64 inside JSON
                 bytes_data = uploaded_file.getvalue()
-                base64_encoded_data = base64.b64encode(bytes_data).decode('utf-8')
                 
                 status_text.text("🤖 Sending to AI for analysis...")
                 progress_bar.progress(50)
                 
-                payload = {
-                    "image": f"data:image/{uploaded_file.type.split('/')[-1]};base64,{base64_encoded_data}",
+                form_fields = {
                     "filename": uploaded_file.name,
-                    "timestamp": datetime.now().isoformat()
+                    "timestamp": datetime.now().isoformat(),
+                    "mode": "vision" if ask_gemini else "auto"
                 }
                 
                 status_text.text("⚡ Processing with Google Gemini...")
@@ -346,7 +348,8 @@ if uploaded_file is not None:
                 
                 response = requests.post(
                     f"{FLASK_BACKEND_URL}/analyze_image", 
-                    json=payload,
+                    files={"image": (uploaded_file.name, bytes_data, uploaded_file.type)},
+                    data=form_fields,
                     timeout=30
                 )
                 
@@ -376,6 +379,8 @@ if uploaded_file is not None:
                     
                     # Display the main analysis
                     st.markdown(f"### 📝 Detailed Analysis")
+                    if result.get('source') == 'prescreen':
+                        st.caption("⚡ Answered by the local pre-screen (no AI call). Tick \"Always ask Gemini\" for a full AI review.")
                     st.markdown(analysis_text)
                     
                     # Extract confidence if available
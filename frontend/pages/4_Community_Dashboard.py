@@ -5,12 +5,14 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
+import json
+from urllib.parse import urlencode
 from datetime import datetime, timedelta
 import time
-from io import StringIO # <-- 1. IMPORT StringIO
 
 # Configuration
 FLASK_BACKEND_URL = "http://127.0.0.1:5000"
+ARROW_STREAM = "application/vnd.apache.arrow.stream"
 UNSAFE_THRESHOLD = 400
 
 # Page Configuration
@@ -112,6 +114,8 @@ with st.sidebar:
         value=(datetime.now() - timedelta(days=30), datetime.now()),
         max_value=datetime.now()
     )
+    region_filter = st.selectbox("Region", ["All"] + st.session_state.get("dashboard_regions", []))
+    granularity = st.selectbox("Trend granularity", ["day", "week", "month"], format_func=str.title)
     
     st.markdown("---")
     
@@ -126,47 +130,74 @@ with st.sidebar:
     - Trend analysis
     """)
 
+def load_pyarrow():
+    """pyarrow if it is installed (it is optional: without it the page asks for JSON), else None."""
+    try:
+        import pyarrow
+    except ImportError:
+        return None
+    return pyarrow
+
+def read_arrow_response(response, pa):
+    """
+    Decodes an Arrow IPC stream body into (DataFrame, metadata). Numeric columns are handed to
+    pandas without copying, and each Arrow buffer is released as soon as it has been converted.
+    """
+    table = pa.ipc.open_stream(response.content).read_all()
+    metadata = json.loads(table.schema.metadata[b"aqualert"]) if table.schema.metadata else {}
+    return table.to_pandas(split_blocks=True, self_destruct=True), metadata
+
 @st.cache_data(ttl=300)
-def get_dashboard_data():
-    """Fetches summary data from the Flask backend with enhanced error handling."""
+def get_dashboard_data(start_date, end_date, region, granularity):
+    """
+    Fetches pre-aggregated rollups (one row per period and region) from the Flask backend.
+    Returns None when the backend is unreachable and an empty dict on other errors.
+    """
+    params = {"start": start_date.isoformat(), "end": end_date.isoformat(), "granularity": granularity}
+    if region != "All":
+        params["region"] = region
+    pa = load_pyarrow()
+    if pa is None:
+        params["format"] = "json"
     try:
         with st.spinner("🔄 Fetching latest data..."):
             response = requests.get(
                 f"{FLASK_BACKEND_URL}/api/community_summary",
+                params=params,
+                headers={"Accept": f"{ARROW_STREAM}, application/json;q=0.5" if pa else "application/json"},
                 timeout=10
             )
-            
+
         if response.status_code == 200:
-            # FIX: Wrap the JSON string in a StringIO object to adhere to modern pandas standards.
-            df = pd.read_json(StringIO(response.text))
-            if not df.empty:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                # Add additional computed columns
-                df['is_safe'] = df['prediction'] == 1
-                df['safety_margin'] = UNSAFE_THRESHOLD - df['sulfate']
-                return df
+            # Backends without pyarrow answer with JSON instead.
+            if pa is not None and response.headers.get("Content-Type", "").startswith(ARROW_STREAM):
+                buckets, summary = read_arrow_response(response, pa)
             else:
-                return pd.DataFrame()
+                summary = response.json()
+                buckets = pd.DataFrame(summary["buckets"])
+                if not buckets.empty:
+                    buckets["period"] = pd.to_datetime(buckets["period"])
+            if not buckets.empty:
+                buckets["safe_count"] = buckets["count"] - buckets["unsafe_count"]
+            return {"totals": summary["totals"], "regions": summary["regions"], "buckets": buckets}
         else:
             st.error(f"Server returned status code: {response.status_code}")
-            return pd.DataFrame()
-            
+            return {}
+
     except requests.exceptions.ConnectionError:
         return None
     except requests.exceptions.Timeout:
         st.error("⏱️ Request timed out. Please try again.")
-        return pd.DataFrame()
+        return {}
     except Exception as e:
         st.error(f"An unexpected error occurred: {str(e)}")
-        return pd.DataFrame()
+        return {}
 
-def create_enhanced_pie_chart(data):
+def create_enhanced_pie_chart(totals):
     """Creates an enhanced pie chart with better styling."""
-    pie_data = data['prediction_label'].value_counts()
-    
     fig = go.Figure(data=[go.Pie(
-        labels=pie_data.index,
-        values=pie_data.values,
+        labels=["Safe", "Unsafe"],
+        values=[totals["count"] - totals["unsafe_count"], totals["unsafe_count"]],
         hole=0.4,
         marker=dict(
             colors=['#28a745', '#dc3545'],
@@ -197,9 +228,9 @@ def create_enhanced_pie_chart(data):
     
     return fig
 
-def create_enhanced_bar_chart(data):
+def create_enhanced_bar_chart(buckets):
     """Creates an enhanced bar chart for regional data."""
-    bar_data = data['region'].value_counts()
+    bar_data = buckets.groupby("region")["count"].sum().sort_values(ascending=False)
     
     fig = go.Figure(data=[go.Bar(
         x=bar_data.index,
@@ -227,22 +258,26 @@ def create_enhanced_bar_chart(data):
     
     return fig
 
-def create_trend_chart(data):
+def create_trend_chart(buckets, granularity):
     """Creates an enhanced trend chart with multiple traces."""
-    if data.empty:
+    if buckets.empty:
         return go.Figure()
     
-    # Resample data
-    daily_data = data.set_index('timestamp').resample('D').agg({
-        'sulfate': ['mean', 'min', 'max'],
-        'prediction': 'count'
-    }).dropna()
-    
-    daily_data.columns = ['avg_sulfate', 'min_sulfate', 'max_sulfate', 'test_count']
+    # Combine the per-region rollups of each period; the mean is weighted by the sulfate sample count
+    buckets = buckets.assign(sulfate_sum=buckets['sulfate_mean'].fillna(0) * buckets['sulfate_count'])
+    daily_data = buckets.groupby('period').agg(
+        sulfate_sum=('sulfate_sum', 'sum'),
+        sulfate_count=('sulfate_count', 'sum'),
+        min_sulfate=('sulfate_min', 'min'),
+        max_sulfate=('sulfate_max', 'max'),
+        test_count=('count', 'sum')
+    )
+    daily_data['avg_sulfate'] = daily_data['sulfate_sum'] / daily_data['sulfate_count'].where(daily_data['sulfate_count'] > 0)
     
+    period_label = {'day': 'Daily', 'week': 'Weekly', 'month': 'Monthly'}[granularity]
     fig = make_subplots(
         rows=2, cols=1,
-        subplot_titles=('Daily Sulfate Levels', 'Daily Test Count'),
+        subplot_titles=(f'{period_label} Sulfate Levels', f'{period_label} Test Count'),
         vertical_spacing=0.12,
         row_heights=[0.7, 0.3]
     )
@@ -303,7 +338,7 @@ def create_trend_chart(data):
         go.Bar(
             x=daily_data.index,
             y=daily_data['test_count'],
-            name='Daily Tests',
+            name=f'{period_label} Tests',
             marker_color='#17a2b8',
             hovertemplate='<b>%{x}</b><br>Tests: %{y}<extra></extra>'
         ),
@@ -329,7 +364,13 @@ if auto_refresh:
     st.rerun()
 
 # Main dashboard logic
-dashboard_data = get_dashboard_data()
+if len(date_range) == 2:
+    start_date, end_date = date_range
+else:
+    start_date = end_date = date_range[0]
+dashboard_data = get_dashboard_data(start_date, end_date, region_filter, granularity)
+if dashboard_data:
+    st.session_state["dashboard_regions"] = dashboard_data["regions"]
 
 if dashboard_data is None:
     st.markdown("""
@@ -339,7 +380,7 @@ if dashboard_data is None:
     </div>
     """, unsafe_allow_html=True)
     
-elif dashboard_data.empty:
+elif not dashboard_data:
     st.markdown("""
     <div class="alert-box alert-warning">
         <h4>📭 No Data Available</h4>
@@ -348,23 +389,21 @@ elif dashboard_data.empty:
     """, unsafe_allow_html=True)
     
 else:
-    # Filter data by date range
-    if len(date_range) == 2:
-        start_date, end_date = date_range
-        mask = (dashboard_data['timestamp'].dt.date >= start_date) & (dashboard_data['timestamp'].dt.date <= end_date)
-        dashboard_data = dashboard_data.loc[mask]
+    totals = dashboard_data["totals"]
+    buckets = dashboard_data["buckets"]
     
-    if dashboard_data.empty:
+    if totals["count"] == 0:
         st.warning("No data available for the selected date range.")
     else:
         # Key Metrics Section
         st.markdown("## 📈 Key Metrics")
         
-        total_tests = len(dashboard_data)
-        unsafe_tests = len(dashboard_data[dashboard_data['prediction'] == 0])
+        total_tests = totals["count"]
+        unsafe_tests = totals["unsafe_count"]
         safe_tests = total_tests - unsafe_tests
         unsafe_percentage = (unsafe_tests / total_tests) * 100 if total_tests > 0 else 0
-        avg_sulfate = dashboard_data['sulfate'].mean()
+        avg_sulfate = totals["sulfate_mean"] or 0.0
+        recent_tests = int(buckets.loc[buckets['period'] >= (datetime.now() - timedelta(days=7)), 'count'].sum())
         
         col1, col2, col3, col4 = st.columns(4)
         
@@ -372,7 +411,7 @@ else:
             st.metric(
                 "Total Tests",
                 f"{total_tests:,}",
-                delta=f"+{len(dashboard_data[dashboard_data['timestamp'] >= (datetime.now() - timedelta(days=7))])}" if total_tests > 0 else None,
+                delta=f"+{recent_tests}" if total_tests > 0 else None,
                 delta_color="normal"
             )
         
@@ -433,35 +472,41 @@ else:
         
         with col_chart1:
             st.plotly_chart(
-                create_enhanced_pie_chart(dashboard_data),
+                create_enhanced_pie_chart(totals),
                 use_container_width=True,
                 config={'displayModeBar': False}
             )
         
         with col_chart2:
             st.plotly_chart(
-                create_enhanced_bar_chart(dashboard_data),
+                create_enhanced_bar_chart(buckets),
                 use_container_width=True,
                 config={'displayModeBar': False}
             )
         
         # Trend chart
         st.plotly_chart(
-            create_trend_chart(dashboard_data),
+            create_trend_chart(buckets, granularity),
             use_container_width=True,
             config={'displayModeBar': True}
         )
         
         # Data Table Section
-        with st.expander("📋 Raw Data Preview", expanded=False):
-            st.markdown("### Recent Test Results")
-            display_data = dashboard_data.sort_values('timestamp', ascending=False).head(100)
+        with st.expander("📋 Aggregated Data Preview", expanded=False):
+            st.markdown(f"### Test Results by {granularity.title()} and Region")
+            display_data = buckets.sort_values(['period', 'region'], ascending=[False, True])
             st.dataframe(
-                display_data[['timestamp', 'region', 'sulfate', 'prediction_label']],
+                display_data[['period', 'region', 'count', 'safe_count', 'unsafe_count', 'unsafe_ratio',
+                              'sulfate_mean', 'sulfate_min', 'sulfate_max']],
                 use_container_width=True,
                 hide_index=True
             )
             
+            export_params = {"start": start_date.isoformat(), "end": end_date.isoformat(), "format": "parquet"}
+            if region_filter != "All":
+                export_params["region"] = region_filter
+            st.markdown(f"[📦 Download raw test results (Parquet)]({FLASK_BACKEND_URL}/api/export/test_results?{urlencode(export_params)})")
+            
             # Download button
             csv = display_data.to_csv(index=False)
             st.download_button(